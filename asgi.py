@@ -0,0 +1,5 @@
+from src.app.asgi import create_asgi_app
+
+# Páginas públicas assíncronas (aiosqlite); admin e API seguem pelo WSGI.
+# Executar com: uvicorn asgi:app
+app = create_asgi_app("development")
@@ -7,12 +7,16 @@ from .config import config_by_name
 db = SQLAlchemy()
 csrf = CSRFProtect()
 
-def create_app(config_name='development'):
+def create_app(config_name='development', overrides=None, load_views=True):
 	"""
 	Factory function para criar a aplicação Flask.
 	
 	Args:
-		config_name: Nome da configuração a ser usada ('development' ou 'production')
+		config_name: Nome da configuração a ser usada ('development', 'production' ou 'testing')
+		overrides: Dicionário opcional de chaves de configuração aplicadas antes
+			de inicializar as extensões (ex.: SQLALCHEMY_DATABASE_URI em testes)
+		load_views: Se False, não importa nem registra os blueprints (comandos da
+			CLI que só usam o banco iniciam mais rápido)
 	
 	Returns:
 		Instância configurada da aplicação Flask
@@ -24,29 +28,76 @@ def create_app(config_name='development'):
 	# Carregar configuração
 	config_class = config_by_name.get(config_name, config_by_name['development'])
 	app.config.from_object(config_class)
+	if overrides:
+		app.config.update(overrides)
 	
-	# Inicializar SQLAlchemy
+	# IP real do cliente atrás do proxy reverso (limites por IP do login)
+	if app.config.get('PROXY_FIX_X_FOR'):
+		from werkzeug.middleware.proxy_fix import ProxyFix
+		app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+	
+	# Inicializar SQLAlchemy (com os pragmas do SQLite em cada conexão)
+	from .database import configure_engine, ensure_database_dir
+	ensure_database_dir(app)
 	db.init_app(app)
+	with app.app_context():
+		configure_engine(app, db.engine)
+	
+	# Instrumentação de SQL por requisição (Server-Timing e /admin/metrics)
+	if app.config.get('METRICS_ENABLED'):
+		from .metrics import RequestMetrics
+		with app.app_context():
+			RequestMetrics().init_app(app, db.engine)
+	
+	# Cache das páginas públicas renderizadas
+	if app.config.get('PAGE_CACHE_ENABLED'):
+		from .page_cache import PageCache
+		PageCache().init_app(app)
+	
+	# Dados da página de detalhe do parque, por parque
+	if app.config.get('PARK_DETAIL_CACHE_ENABLED'):
+		from .park_detail import ParkDetailCache
+		ParkDetailCache().init_app(app)
 	
 	# Inicializar CSRF Protection
 	csrf.init_app(app)
 	
-	# Adicionar helper de contexto para token CSRF
-	@app.context_processor
-	def inject_csrf_token():
-		from flask_wtf.csrf import generate_csrf
-		return dict(csrf_token=generate_csrf)
+	# Verificação de senha limitada e limites de tentativas do login
+	from .login_guard import LoginGuard
+	from .identity import IdentityCache
+	LoginGuard().init_app(app)
+	IdentityCache().init_app(app)
 	
 	# Importar modelos para garantir que sejam registrados
 	from . import models  # noqa: F401
 	
-	# Registrar blueprints
+	# Versões por tabela (invalidação entre processos) e catálogo de parques
+	from .versions import VersionRegistry
+	from .catalog import ParkCatalog
+	from . import counters  # noqa: F401  (contadores do dashboard)
+	from . import search  # noqa: F401  (índice FTS5, criado junto com as tabelas)
+	VersionRegistry().init_app(app)
+	ParkCatalog().init_app(app)
+	app.add_template_filter(models.difficulty_label)
+	
+	# Pacotes estáticos com hash e pré-comprimidos, se build-assets foi executado
+	from .assets import AssetManifest
+	AssetManifest().init_app(app)
+	
+	if not load_views:
+		return app
+	
+	# Registrar blueprints (registrar é barato; o custo está nos formulários do
+	# admin e no email-validator, importados só pela primeira view que os usa)
 	from .routes_public import bp as public_bp
 	from .routes_admin import bp as admin_bp
+	from .routes_api import bp as api_bp
 	
 	app.register_blueprint(public_bp)
 	# admin_bp já possui url_prefix='/admin'
 	app.register_blueprint(admin_bp)
+	# api_bp já possui url_prefix='/api/v1'
+	app.register_blueprint(api_bp)
 	
 	return app
 
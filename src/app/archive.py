@@ -0,0 +1,131 @@
+"""Arquivo de eventos encerrados (separação entre dados quentes e frios).
+
+As páginas públicas só mostram eventos futuros, mas a tabela ``events``
+acumula todos os já realizados, e seus índices crescem junto.
+``archive_events`` (comando ``archive-events`` da CLI, para rodar agendado)
+move os eventos encerrados para ``events_archive`` em lotes, um lote por
+transação, sem segurar a trava de escrita do SQLite por muito tempo. Ao
+sair de ``events``, o evento sai também do índice de busca, pelos gatilhos
+de ``search.py``.
+
+O evento mantém o id no arquivo; ``events`` usa AUTOINCREMENT para que um
+id arquivado nunca seja reaproveitado. A listagem do admin navega pelas
+duas tabelas com ``admin_events_query``.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, false, insert, literal, select, true, union_all
+
+from . import db
+from .counters import apply_deltas
+from .models import Event, EventArchive
+from .signals import notify_change
+from .versions import bump
+
+DEFAULT_ARCHIVE_DAYS = 30
+DEFAULT_ARCHIVE_BATCH_SIZE = 500
+
+# Colunas copiadas de events para events_archive
+ARCHIVED_COLUMNS = ('id', 'park_id', 'title', 'description', 'start_datetime', 'end_datetime', 'is_active')
+
+# Colunas da listagem do admin, comuns às duas tabelas
+LIST_COLUMNS = ('id', 'park_id', 'title', 'start_datetime', 'end_datetime', 'is_active')
+
+ADMIN_SCOPES = ('current', 'archived', 'all')
+
+ArchiveResult = namedtuple('ArchiveResult', 'archived batches park_ids')
+
+
+def events_autoincrement(connection):
+    """Indica se a tabela ``events`` do banco já foi criada com AUTOINCREMENT."""
+    ddl = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'events'"
+    ).scalar()
+    return ddl is not None and 'AUTOINCREMENT' in ddl.upper()
+
+
+def archive_events(cutoff=None, batch_size=DEFAULT_ARCHIVE_BATCH_SIZE):
+    """Move para ``events_archive`` os eventos encerrados antes de ``cutoff``.
+
+    Deve ser chamado dentro de um contexto de aplicação.
+
+    Args:
+        cutoff: Instante limite de término (padrão: agora menos ``EVENT_ARCHIVE_DAYS`` dias)
+        batch_size: Eventos por transação
+
+    Returns:
+        ``ArchiveResult``
+
+    Raises:
+        RuntimeError: ``events`` sem AUTOINCREMENT (rode ``upgrade-db`` antes)
+    """
+    if cutoff is None:
+        days = current_app.config.get('EVENT_ARCHIVE_DAYS', DEFAULT_ARCHIVE_DAYS)
+        cutoff = datetime.utcnow() - timedelta(days=days)
+    if not events_autoincrement(db.session.connection()):
+        raise RuntimeError('tabela events sem AUTOINCREMENT; rode upgrade-db antes de arquivar')
+
+    registry = current_app.extensions['data_versions']
+    archived = batches = 0
+    park_ids = set()
+    while True:
+        rows = db.session.execute(
+            select(Event.id, Event.park_id, Event.is_active)
+            .where(Event.end_datetime < cutoff)
+            .order_by(Event.end_datetime, Event.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+        connection = db.session.connection()
+        columns = [getattr(Event, name) for name in ARCHIVED_COLUMNS]
+        connection.execute(
+            insert(EventArchive).from_select(
+                [*ARCHIVED_COLUMNS, 'archived_at'],
+                select(*columns, literal(datetime.utcnow(), EventArchive.archived_at.type))
+                .where(Event.id.in_(ids)),
+            )
+        )
+        connection.execute(delete(Event).where(Event.id.in_(ids)))
+        # Fora do ORM: contadores e versões ajustados aqui, na mesma transação
+        active = sum(1 for row in rows if row.is_active)
+        apply_deltas(connection, {'events': -len(ids), 'events_active': -active,
+                                  'events_archived': len(ids)})
+        bumped = bump(connection, Event.__tablename__, EventArchive.__tablename__)
+        db.session.commit()
+        registry.apply(bumped)
+        archived += len(ids)
+        batches += 1
+        park_ids.update(row.park_id for row in rows)
+    if archived:
+        notify_change('event', *park_ids)
+    return ArchiveResult(archived, batches, park_ids)
+
+
+def _list_select(model, archived):
+    return select(*(getattr(model, name) for name in LIST_COLUMNS),
+                  (true() if archived else false()).label('archived'))
+
+
+def admin_events_query(scope='current'):
+    """Consulta da listagem de eventos do admin, paginável por (início, id).
+
+    Args:
+        scope: ``current`` (tabela ``events``), ``archived`` ou ``all`` (as duas, por UNION ALL)
+
+    Returns:
+        (query, colunas da chave de ordenação)
+    """
+    if scope == 'current':
+        source = _list_select(Event, False)
+    elif scope == 'archived':
+        source = _list_select(EventArchive, True)
+    elif scope == 'all':
+        source = union_all(_list_select(Event, False), _list_select(EventArchive, True))
+    else:
+        raise ValueError(f'escopo desconhecido: {scope}')
+    listing = source.subquery('listing')
+    return db.session.query(listing), [listing.c.start_datetime, listing.c.id]
@@ -0,0 +1,163 @@
+"""Modo ASGI: páginas públicas servidas de forma assíncrona (aiosqlite).
+
+No modo WSGI cada leitura do SQLite ocupa uma thread do servidor até
+terminar. Aqui as requisições GET do blueprint público rodam no laço de
+eventos: a view Flask de sempre (mesmos modelos, consultas e templates) é
+executada com ``AsyncSession.run_sync``, que a coloca num greenlet cujo
+``db.session`` é a sessão do engine assíncrono. Cada consulta espera pelo
+aiosqlite sem bloquear o laço, que atende outras conexões enquanto isso.
+
+O restante (admin, API, arquivos estáticos, POSTs) segue pelo app WSGI,
+numa thread, via ``asgiref.wsgi.WsgiToAsgi``.
+
+Dependências opcionais (``requirements-asgi.txt``): aiosqlite, asgiref e um
+servidor ASGI como o uvicorn::
+
+    uvicorn asgi:app --workers 1
+"""
+import io
+import sys
+
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import HTTPException
+
+from . import db
+from .database import configure_engine
+
+ASYNC_METHODS = {'GET', 'HEAD'}
+
+
+def async_database_url(url):
+    """URL do SQLAlchemy com o driver aiosqlite no lugar do pysqlite."""
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite':
+        raise ValueError(f'modo ASGI suporta apenas SQLite, não {url.get_backend_name()}')
+    return url.set(drivername='sqlite+aiosqlite')
+
+
+def build_environ(scope, body=b''):
+    """Ambiente WSGI equivalente a um ``scope`` HTTP do ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin1')
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+class AsgiApp:
+    """Aplicação ASGI: blueprint público assíncrono, o resto pelo WSGI."""
+
+    def __init__(self, flask_app, async_blueprints=('public',)):
+        self.flask_app = flask_app
+        self.async_blueprints = set(async_blueprints)
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.engine = create_async_engine(
+            async_database_url(flask_app.config['SQLALCHEMY_DATABASE_URI']),
+            **flask_app.config.get('ASGI_ENGINE_OPTIONS', {}),
+        )
+        configure_engine(flask_app, self.engine.sync_engine)
+        metrics = flask_app.extensions.get('request_metrics')
+        if metrics is not None:
+            metrics.instrument(self.engine.sync_engine)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.async_requests = 0
+
+    def is_async(self, scope):
+        """Indica se a requisição vai para uma view do blueprint público."""
+        if scope['method'] not in ASYNC_METHODS:
+            return False
+        adapter = self.flask_app.url_map.bind('localhost', script_name=scope.get('root_path') or None)
+        try:
+            endpoint, _ = adapter.match(scope['path'], method=scope['method'])
+        except HTTPException:
+            return False
+        return endpoint.split('.')[0] in self.async_blueprints
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http' and self.is_async(scope):
+            await self._handle(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _handle(self, scope, receive, send):
+        # GET/HEAD: o corpo da requisição é descartado
+        message = await receive()
+        while message.get('more_body'):
+            message = await receive()
+
+        self.async_requests += 1
+        environ = build_environ(scope)
+        async with self.sessionmaker() as session:
+            status, headers, body = await session.run_sync(self._dispatch, environ)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers],
+        })
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+
+    def _dispatch(self, sync_session, environ):
+        """Executa a view Flask no greenlet do ``run_sync``, com ``db.session`` assíncrono.
+
+        Mesmo ciclo de ``Flask.wsgi_app``, mas a resposta é lida por inteiro
+        aqui dentro, antes de o contexto (e a sessão) ser encerrado.
+        """
+        app = self.flask_app
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            try:
+                ctx.push()
+                db.session.registry.set(sync_session)
+                response = app.full_dispatch_request()
+            except Exception as exc:
+                error = exc
+                response = app.handle_exception(exc)
+            body = b''.join(response.iter_encoded())
+            response.close()
+            return response.status_code, list(response.headers.items()), body
+        finally:
+            if error is not None and app.should_ignore_error(error):
+                error = None
+            ctx.pop(error)
+
+
+def create_asgi_app(config_name='development', overrides=None):
+    """Cria a aplicação Flask e a envolve no ``AsgiApp``."""
+    from . import create_app
+    return AsgiApp(create_app(config_name, overrides=overrides))
@@ -0,0 +1,140 @@
+"""Pacotes estáticos com hash no nome e variantes pré-comprimidas.
+
+``build_assets`` (comando ``build-assets`` da CLI) junta e minifica os
+arquivos de cada pacote de ``BUNDLES``, grava o resultado em
+``static/dist/`` com o hash do conteúdo no nome (``main.3f2a1b9c0d.css``),
+gera as variantes ``.gz`` e ``.br`` (esta só com o pacote ``brotli``
+instalado) e escreve ``manifest.json`` (nome lógico -> arquivo gerado).
+
+Com o manifesto carregado, ``url_for('static', filename='css/main.css')``
+aponta para o arquivo com hash. Como o nome muda a cada alteração, esses
+arquivos são servidos com ``Cache-Control: immutable`` por um ano, na
+variante comprimida aceita pelo navegador. Sem manifesto (ex.: em
+desenvolvimento) tudo funciona como antes, a partir dos fontes.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+from pathlib import Path
+
+from flask import current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # opcional
+    brotli = None
+
+# Pacote (nome lógico usado nos templates) -> arquivos de origem, em ordem
+BUNDLES = {
+    'css/main.css': ('css/main.css', 'css/style.css'),
+    'js/main.js': ('js/main.js',),
+}
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Extensão da variante -> Content-Encoding, em ordem de preferência
+ENCODINGS = (('.br', 'br'), ('.gz', 'gzip'))
+
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """Remove comentários de bloco, linhas só de comentário e indentação (conservador)."""
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def build_assets(static_folder, dist_folder=None):
+    """Gera os pacotes, suas variantes comprimidas e o manifesto.
+
+    Args:
+        static_folder: Pasta ``static`` com os fontes
+        dist_folder: Pasta de saída (padrão: ``static/dist``); arquivos antigos são removidos
+
+    Returns:
+        Manifesto: nome lógico -> caminho relativo à pasta ``static``
+    """
+    static_folder = Path(static_folder)
+    dist_folder = Path(dist_folder) if dist_folder else static_folder / DIST_DIR
+    dist_folder.mkdir(parents=True, exist_ok=True)
+    for old in dist_folder.iterdir():
+        if old.is_file():
+            old.unlink()
+
+    manifest = {}
+    for name, sources in BUNDLES.items():
+        suffix = Path(name).suffix
+        content = '\n'.join(
+            (static_folder / source).read_text(encoding='utf-8') for source in sources
+        )
+        data = MINIFIERS[suffix](content).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        filename = f'{Path(name).stem}.{digest}{suffix}'
+        (dist_folder / filename).write_bytes(data)
+        # mtime=0: o mesmo conteúdo gera sempre o mesmo .gz
+        (dist_folder / f'{filename}.gz').write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            (dist_folder / f'{filename}.br').write_bytes(brotli.compress(data, quality=11))
+        manifest[name] = f'{DIST_DIR}/{filename}'
+
+    (dist_folder / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    return manifest
+
+
+class AssetManifest:
+    """Troca os nomes em ``url_for('static')`` e serve os pacotes gerados."""
+
+    def __init__(self):
+        self.files = {}
+        self.dist_folder = None
+
+    def init_app(self, app):
+        app.extensions['assets'] = self
+        if not app.config.get('ASSETS_USE_MANIFEST', True):
+            return
+        self.dist_folder = Path(app.config.get('ASSETS_DIST_FOLDER') or Path(app.static_folder) / DIST_DIR)
+        manifest = self.dist_folder / MANIFEST_NAME
+        if not manifest.exists():
+            return
+        self.files = json.loads(manifest.read_text(encoding='utf-8'))
+        app.url_defaults(self._rewrite_static_url)
+        app.view_functions['static'] = self._send_static
+
+    def _rewrite_static_url(self, endpoint, values):
+        if endpoint == 'static' and values.get('filename') in self.files:
+            values['filename'] = self.files[values['filename']]
+
+    def _send_static(self, filename):
+        prefix = f'{DIST_DIR}/'
+        if not filename.startswith(prefix):
+            return current_app.send_static_file(filename)
+        name = filename[len(prefix):]
+        for extension, encoding in ENCODINGS:
+            if request.accept_encodings[encoding] and (self.dist_folder / f'{name}{extension}').is_file():
+                response = send_from_directory(self.dist_folder, f'{name}{extension}',
+                                               mimetype=mimetypes.guess_type(name)[0])
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(self.dist_folder, name)
+        response.vary.add('Accept-Encoding')
+        # send_from_directory marca no-cache, o que faria o navegador revalidar sempre
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        return response
@@ -0,0 +1,181 @@
+"""Horários efetivos de funcionamento dos parques.
+
+``resolve`` lê numa única consulta todos os períodos que tocam um intervalo
+de datas e, em memória, varre as fronteiras ordenadas dos períodos de cada
+parque, escolhendo para cada trecho o período vencedor. Quando períodos se
+sobrepõem, vence o que começou por último; empatando, o mais curto; depois,
+o de maior id. Assim um período especial (feriado, obra) cadastrado dentro
+de uma temporada prevalece sobre ela, sempre com o mesmo resultado.
+
+Um período com ``end_date`` anterior a ``start_date`` (ex.: 01/12 a 15/03
+cadastrado com o mesmo ano) é tratado como virada de ano: termina no ano
+seguinte.
+
+Datas e horários são do fuso dos parques (``PARK_TIMEZONE``).
+"""
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from flask import current_app
+from sqlalchemy import or_, select
+
+from . import db
+from .models import AvailabilityPeriod
+
+# Período de funcionamento (campos do modelo + horários já convertidos)
+Hours = namedtuple('Hours', 'id park_id season_name open_time close_time start_date end_date opens closes')
+
+# Trecho contínuo de dias [start, end] regido pelo mesmo período
+Segment = namedtuple('Segment', 'start end hours')
+
+# Situação de um parque agora: aberto?, horário de hoje e próxima mudança
+OpenStatus = namedtuple('OpenStatus', 'is_open hours next_change')
+
+
+def park_timezone():
+    return ZoneInfo(current_app.config.get('PARK_TIMEZONE', 'America/Sao_Paulo'))
+
+
+def local_now():
+    """Data/hora atual no fuso dos parques (sem tzinfo, para comparar com as colunas)."""
+    return datetime.now(park_timezone()).replace(tzinfo=None)
+
+
+def _parse_time(value):
+    try:
+        return time.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _effective_end(start_date, end_date):
+    """Fim real do período, somando um ano quando ele vira o ano."""
+    if end_date >= start_date:
+        return end_date
+    try:
+        return end_date.replace(year=end_date.year + 1)
+    except ValueError:  # 29/02
+        return end_date.replace(year=end_date.year + 1, day=28)
+
+
+def _priority(hours):
+    span = (hours.end_date - hours.start_date).days
+    return (hours.start_date, -span, hours.id)
+
+
+def periods_query(start, end, park_id=None):
+    """SELECT dos períodos que tocam [start, end] (ainda sem a virada de ano resolvida)."""
+    ap = AvailabilityPeriod
+    query = select(ap.id, ap.park_id, ap.season_name, ap.open_time, ap.close_time,
+                   ap.start_date, ap.end_date).where(
+        ap.start_date <= end,
+        or_(ap.end_date >= start, ap.end_date < ap.start_date),
+    )
+    if park_id is not None:
+        query = query.where(ap.park_id == park_id)
+    return query
+
+
+def to_hours(id, park_id, season_name, open_time, close_time, start_date, end_date):
+    """``Hours`` a partir das colunas de ``periods_query``."""
+    return Hours(id, park_id, season_name, open_time, close_time, start_date,
+                 _effective_end(start_date, end_date), _parse_time(open_time), _parse_time(close_time))
+
+
+def load_periods(start, end, park_id=None):
+    """Períodos que tocam [start, end], numa consulta (com a virada de ano resolvida)."""
+    periods = []
+    for row in db.session.execute(periods_query(start, end, park_id)):
+        hours = to_hours(*row)
+        if hours.end_date >= start:
+            periods.append(hours)
+    return periods
+
+
+def sweep(periods, start, end):
+    """Divide [start, end] em trechos com o período vencedor de cada parque.
+
+    Returns:
+        Dicionário park_id -> lista de ``Segment`` em ordem (dias sem período ficam de fora)
+    """
+    by_park = defaultdict(list)
+    for hours in periods:
+        by_park[hours.park_id].append(hours)
+
+    calendar = {}
+    for park_id, park_periods in by_park.items():
+        # Fronteiras: início de cada período e o dia seguinte ao seu fim, dentro do intervalo
+        bounds = {start, end + timedelta(days=1)}
+        for hours in park_periods:
+            bounds.add(max(hours.start_date, start))
+            bounds.add(min(hours.end_date, end) + timedelta(days=1))
+        bounds = sorted(b for b in bounds if start <= b <= end + timedelta(days=1))
+        park_periods.sort(key=lambda h: h.start_date)
+
+        segments = []
+        active = []
+        next_index = 0
+        for seg_start, seg_next in zip(bounds, bounds[1:]):
+            while next_index < len(park_periods) and park_periods[next_index].start_date <= seg_start:
+                active.append(park_periods[next_index])
+                next_index += 1
+            active = [h for h in active if h.end_date >= seg_start]
+            if not active:
+                continue
+            winner = max(active, key=_priority)
+            seg_end = seg_next - timedelta(days=1)
+            if segments and segments[-1].hours == winner and segments[-1].end + timedelta(days=1) == seg_start:
+                segments[-1] = Segment(segments[-1].start, seg_end, winner)
+            else:
+                segments.append(Segment(seg_start, seg_end, winner))
+        if segments:
+            calendar[park_id] = segments
+    return calendar
+
+
+def resolve(start, end, park_id=None):
+    """Calendário efetivo de todos os parques (ou de um) entre ``start`` e ``end``."""
+    return sweep(load_periods(start, end, park_id), start, end)
+
+
+def hours_on(segments, day):
+    """Período vigente em ``day`` numa lista de ``Segment`` (ou None)."""
+    for segment in segments:
+        if segment.start <= day <= segment.end:
+            return segment.hours
+    return None
+
+
+def open_status(now=None):
+    """Situação de cada parque no instante ``now`` (hora local), com uma consulta.
+
+    Returns:
+        Dicionário park_id -> ``OpenStatus`` (parques sem período hoje ou amanhã ficam de fora)
+    """
+    now = now or local_now()
+    today = now.date()
+    tomorrow = today + timedelta(days=1)
+    statuses = {}
+    for park_id, segments in resolve(today, tomorrow).items():
+        hours = hours_on(segments, today)
+        tomorrow_hours = hours_on(segments, tomorrow)
+        changes = []
+        is_open = False
+        if hours and hours.opens and hours.closes:
+            opens = datetime.combine(today, hours.opens)
+            closes = datetime.combine(today, hours.closes)
+            is_open = opens <= now < closes
+            changes += [t for t in (opens, closes) if t > now]
+        if tomorrow_hours and tomorrow_hours.opens:
+            changes.append(datetime.combine(tomorrow, tomorrow_hours.opens))
+        # Sem horário amanhã: reavaliar na virada do dia seguinte
+        changes.append(datetime.combine(tomorrow + timedelta(days=1), time()))
+        statuses[park_id] = OpenStatus(is_open, hours, min(changes))
+    return statuses
+
+
+def seconds_until(moment, now=None):
+    """Segundos (inteiros, no mínimo 1) de ``now`` até ``moment``, em hora local."""
+    now = now or local_now()
+    return max(1, int((moment - now).total_seconds()) + 1)
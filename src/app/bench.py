@@ -0,0 +1,480 @@
+"""Gerador de dados sintéticos e benchmark de carga das rotas de leitura.
+
+``generate`` popula o banco com um catálogo na escala pedida, via
+``executemany`` do SQLAlchemy Core (sem instanciar objetos do ORM).
+``run_client`` e ``run_http`` requisitam cada rota GET dos blueprints
+público e admin (pelo cliente de testes do Flask ou por HTTP, com várias
+threads contra um servidor local WSGI ou ASGI) e medem latência e consultas por
+requisição — estas lidas do cabeçalho ``Server-Timing`` de ``metrics.py``.
+
+O relatório é um JSON; ``compare`` aponta regressões em relação a um
+relatório salvo anteriormente.
+
+``run_login_storm`` mede a latência de uma rota pública antes e durante
+uma rajada de logins com senha errada (ver ``login_guard.py``).
+"""
+import json
+import platform
+import random
+import re
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import partial
+from http.cookiejar import CookieJar
+
+from sqlalchemy import func, insert, select
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from . import db
+from .counters import recount
+from .metrics import percentile
+from .models import (AdminUser, Park, Trail, Event, AvailabilityPeriod, BiodiversityItem,
+                     TRAIL_DIFFICULTIES)
+from .versions import TABLE_ENTITIES, bump
+
+BenchScale = namedtuple('BenchScale', 'parks trails events biodiversity availability')
+
+# Escala padrão: rápida de gerar, mas grande o bastante para expor varreduras
+DEFAULT_SCALE = BenchScale(parks=20, trails=5000, events=20000, biodiversity=50000, availability=4)
+
+# Rotas GET que alteram dados, fazem streaming da tabela inteira ou encerram a sessão
+EXCLUDED_ENDPOINTS = {
+    'admin.login', 'admin.logout', 'admin.export',
+    'admin.trail_delete', 'admin.event_delete',
+}
+
+BENCH_ADMIN_EMAIL = 'bench@teste.com'
+BENCH_ADMIN_PASSWORD = 'bench123'
+
+_QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+_CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+# ========== DADOS SINTÉTICOS ==========
+
+def _insert_batches(table, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(insert(table), batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.execute(insert(table), batch)
+        db.session.commit()
+
+
+def generate(scale=DEFAULT_SCALE, seed=0, batch_size=10000):
+    """Insere um catálogo sintético na escala ``scale`` (chamar com contexto de aplicação).
+
+    Returns:
+        Dicionário tabela -> linhas inseridas
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    first_park = (db.session.scalar(select(func.max(Park.id))) or 0) + 1
+
+    _insert_batches(Park.__table__, (
+        {
+            'name': f'Parque Sintético {i:04d}',
+            'description': 'Parque gerado para benchmark.',
+            'type': rng.choice(('Nacional', 'Estadual', 'Municipal')),
+            'location': 'Teresópolis',
+            'created_at': now,
+        }
+        for i in range(scale.parks)
+    ), batch_size)
+    park_ids = range(first_park, first_park + scale.parks)
+
+    _insert_batches(Trail.__table__, (
+        {
+            'park_id': rng.choice(park_ids),
+            'name': f'Trilha {i:07d}',
+            'difficulty': rng.choice(TRAIL_DIFFICULTIES),
+            'duration_estimated': f'{rng.randint(1, 8)}h',
+            'description': 'Trilha gerada para benchmark.',
+            'is_open': rng.random() < 0.8,
+        }
+        for i in range(scale.trails)
+    ), batch_size)
+
+    def event_row(i):
+        start = now + timedelta(minutes=rng.randint(-180 * 24 * 60, 365 * 24 * 60))
+        return {
+            'park_id': rng.choice(park_ids),
+            'title': f'Evento {i:07d}',
+            'description': 'Evento gerado para benchmark.',
+            'start_datetime': start,
+            'end_datetime': start + timedelta(hours=rng.randint(1, 8)),
+            'is_active': rng.random() < 0.9,
+        }
+
+    _insert_batches(Event.__table__, (event_row(i) for i in range(scale.events)), batch_size)
+
+    _insert_batches(BiodiversityItem.__table__, (
+        {
+            'park_id': rng.choice(park_ids),
+            'name': f'Espécie {i:07d}',
+            'type': rng.choice(('fauna', 'flora')),
+            'description': 'Item gerado para benchmark.',
+        }
+        for i in range(scale.biodiversity)
+    ), batch_size)
+
+    # Temporadas consecutivas cobrindo o ano corrente em cada parque
+    year = date.today().year
+    span = 365 // max(scale.availability, 1)
+    _insert_batches(AvailabilityPeriod.__table__, (
+        {
+            'park_id': park_id,
+            'season_name': f'Temporada {n + 1}',
+            'open_time': '08:00',
+            'close_time': '17:00',
+            'start_date': date(year, 1, 1) + timedelta(days=n * span),
+            'end_date': date(year, 1, 1) + timedelta(days=(n + 1) * span - 1),
+        }
+        for park_id in park_ids for n in range(scale.availability)
+    ), batch_size)
+
+    connection = db.session.connection()
+    recount(connection)
+    bump(connection, *TABLE_ENTITIES)
+    db.session.commit()
+    return {
+        'parks': scale.parks,
+        'trails': scale.trails,
+        'events': scale.events,
+        'biodiversity_items': scale.biodiversity,
+        'availability_periods': scale.parks * scale.availability,
+    }
+
+
+def ensure_bench_admin():
+    """Cria o administrador usado pelo benchmark, se ainda não existir."""
+    if AdminUser.query.filter_by(email=BENCH_ADMIN_EMAIL).first() is None:
+        admin = AdminUser(name='Benchmark', email=BENCH_ADMIN_EMAIL)
+        admin.set_password(BENCH_ADMIN_PASSWORD)
+        db.session.add(admin)
+        db.session.commit()
+
+
+# ========== ROTAS ==========
+
+def bench_paths(app):
+    """URLs das rotas GET dos blueprints público e admin, com ids de exemplo.
+
+    Returns:
+        Lista de (endpoint, url)
+    """
+    from flask import url_for
+
+    with app.app_context():
+        sample = {
+            'park_id': db.session.scalar(select(func.min(Park.id))),
+            'trail_id': db.session.scalar(select(func.min(Trail.id))),
+            'event_id': db.session.scalar(select(func.min(Event.id))),
+            'period_id': db.session.scalar(select(func.min(AvailabilityPeriod.id))),
+        }
+        paths = []
+        with app.test_request_context():
+            for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+                blueprint = rule.endpoint.split('.')[0]
+                if blueprint not in ('public', 'admin') or 'GET' not in rule.methods:
+                    continue
+                if rule.endpoint in EXCLUDED_ENDPOINTS:
+                    continue
+                if any(sample.get(arg) is None for arg in rule.arguments):
+                    continue
+                args = {arg: sample[arg] for arg in rule.arguments}
+                paths.append((rule.endpoint, url_for(rule.endpoint, **args)))
+            # Filtros das listagens públicas
+            if sample['park_id'] is not None:
+                paths.append(('public.trails_list', url_for('public.trails_list', park_id=sample['park_id'])))
+                paths.append(('public.events_list', url_for('public.events_list', park_id=sample['park_id'])))
+            paths.append(('public.trails_list', url_for('public.trails_list', difficulty=TRAIL_DIFFICULTIES[1])))
+    return paths
+
+
+# ========== EXECUÇÃO ==========
+
+class PathResult:
+    """Medições de uma URL."""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.latencies = []
+        self.query_counts = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, latency_ms, status, server_timing):
+        match = _QUERIES_RE.search(server_timing or '')
+        with self._lock:
+            self.latencies.append(latency_ms)
+            if match:
+                self.query_counts.append(int(match.group(1)))
+            if status >= 400:
+                self.errors += 1
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        total_ms = sum(latencies)
+        return {
+            'endpoint': self.endpoint,
+            'requests': len(latencies),
+            'errors': self.errors,
+            'rps': len(latencies) / (total_ms / 1000) if total_ms else 0.0,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'queries_per_request': (sum(self.query_counts) / len(self.query_counts)
+                                    if self.query_counts else None),
+        }
+
+
+def _login(get, post):
+    """Faz login do administrador do benchmark usando funções get(url) -> html e post(url, dados)."""
+    html = get('/admin/login')
+    data = {'email': BENCH_ADMIN_EMAIL, 'password': BENCH_ADMIN_PASSWORD}
+    match = _CSRF_RE.search(html)
+    if match:
+        data['csrf_token'] = match.group(1)
+    post('/admin/login', data)
+
+
+def run_client(app, paths, requests_per_path=50, warmup=2):
+    """Executa o benchmark pelo cliente de testes do Flask (sequencial).
+
+    Returns:
+        (resultados por url, duração total em segundos)
+    """
+    public = app.test_client()
+    admin = app.test_client()
+    _login(lambda url: admin.get(url).get_data(as_text=True),
+           lambda url, data: admin.post(url, data=data))
+
+    results = {}
+    started = time.perf_counter()
+    for endpoint, url in paths:
+        client = admin if endpoint.startswith('admin.') else public
+        for _ in range(warmup):
+            client.get(url)
+        result = results[url] = PathResult(endpoint)
+        for _ in range(requests_per_path):
+            t0 = time.perf_counter()
+            resp = client.get(url)
+            resp.get_data()
+            result.add((time.perf_counter() - t0) * 1000, resp.status_code, resp.headers.get('Server-Timing'))
+    return results, time.perf_counter() - started
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def _start_server(app, server='wsgi'):
+    """Sobe um servidor local numa thread.
+
+    Args:
+        server: 'wsgi' (Werkzeug com threads) ou 'asgi' (uvicorn com ``AsgiApp``)
+
+    Returns:
+        (url base, função que encerra o servidor)
+    """
+    if server == 'asgi':
+        import socket
+
+        import uvicorn
+
+        from .asgi import AsgiApp
+
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        asgi_server = uvicorn.Server(uvicorn.Config(AsgiApp(app), log_level='warning', access_log=False))
+        thread = threading.Thread(target=asgi_server.run, kwargs={'sockets': [sock]}, daemon=True)
+        thread.start()
+        while not asgi_server.started:
+            time.sleep(0.01)
+
+        def stop():
+            asgi_server.should_exit = True
+            thread.join()
+            sock.close()
+        return f'http://127.0.0.1:{sock.getsockname()[1]}', stop
+
+    wsgi_server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=_QuietRequestHandler)
+    threading.Thread(target=wsgi_server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{wsgi_server.server_port}', wsgi_server.shutdown
+
+
+def _fetch(base, opener, url, data=None):
+    """GET (ou POST com ``data``) em ``base + url``.
+
+    Returns:
+        (status, cabeçalho Server-Timing, corpo); respostas de erro não levantam exceção
+    """
+    body = urllib.parse.urlencode(data).encode() if data is not None else None
+    try:
+        with opener.open(base + url, data=body) as resp:
+            return resp.status, resp.headers.get('Server-Timing'), resp.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.headers.get('Server-Timing'), exc.read()
+
+
+def run_http(app, paths, requests_per_path=50, concurrency=8, warmup=2, server='wsgi'):
+    """Executa o benchmark por HTTP contra um servidor local (WSGI com threads ou ASGI).
+
+    Returns:
+        (resultados por url, duração total em segundos)
+    """
+    base, stop_server = _start_server(app, server)
+    public = urllib.request.build_opener()
+    admin = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    fetch = partial(_fetch, base)
+
+    try:
+        _login(lambda url: fetch(admin, url)[2].decode(), lambda url, data: fetch(admin, url, data))
+
+        results = {url: PathResult(endpoint) for endpoint, url in paths}
+        jobs = []
+        for endpoint, url in paths:
+            opener = admin if endpoint.startswith('admin.') else public
+            for _ in range(warmup):
+                fetch(opener, url)
+            jobs += [(opener, url)] * requests_per_path
+        random.Random(0).shuffle(jobs)
+
+        def timed(job):
+            opener, url = job
+            t0 = time.perf_counter()
+            status, server_timing, _ = fetch(opener, url)
+            results[url].add((time.perf_counter() - t0) * 1000, status, server_timing)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(timed, jobs))
+        return results, time.perf_counter() - started
+    finally:
+        stop_server()
+
+
+def run_login_storm(app, probe_url='/parks', attackers=16, duration=5.0):
+    """Latência de ``probe_url`` sem carga e durante uma rajada de logins errados.
+
+    ``attackers`` threads enviam sem parar POSTs para ``/admin/login`` com a
+    senha errada do administrador do benchmark, enquanto uma thread mede a
+    rota pública, cada fase por ``duration`` segundos.
+
+    Returns:
+        Dicionário com ``idle`` e ``storm`` (resumos da rota pública) e
+        ``login`` (respostas do login por status)
+    """
+    base, stop_server = _start_server(app)
+
+    fetch = partial(_fetch, base)
+
+    def probe(result, until):
+        opener = urllib.request.build_opener()
+        while time.perf_counter() < until:
+            t0 = time.perf_counter()
+            status, server_timing, _ = fetch(opener, probe_url)
+            result.add((time.perf_counter() - t0) * 1000, status, server_timing)
+
+    statuses = {}
+    statuses_lock = threading.Lock()
+    stop = threading.Event()
+
+    def attack():
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        data = {'email': BENCH_ADMIN_EMAIL, 'password': 'senha-errada'}
+        match = _CSRF_RE.search(fetch(opener, '/admin/login')[2].decode())
+        if match:
+            data['csrf_token'] = match.group(1)
+        while not stop.is_set():
+            status = fetch(opener, '/admin/login', data)[0]
+            with statuses_lock:
+                statuses[status] = statuses.get(status, 0) + 1
+
+    try:
+        fetch(urllib.request.build_opener(), probe_url)  # aquecimento
+        idle = PathResult('idle')
+        probe(idle, time.perf_counter() + duration)
+
+        storm = PathResult('storm')
+        threads = [threading.Thread(target=attack, daemon=True) for _ in range(attackers)]
+        for attacker in threads:
+            attacker.start()
+        probe(storm, time.perf_counter() + duration)
+        stop.set()
+        for attacker in threads:
+            attacker.join()
+        return {
+            'idle': idle.summary(),
+            'storm': storm.summary(),
+            'login': {str(status): count for status, count in sorted(statuses.items())},
+        }
+    finally:
+        stop_server()
+
+
+def build_report(results, elapsed, meta):
+    """Monta o relatório JSON a partir dos resultados de ``run_client``/``run_http``."""
+    total = sum(len(r.latencies) for r in results.values())
+    return {
+        'meta': dict(meta,
+                     created_at=datetime.utcnow().isoformat(timespec='seconds'),
+                     python=platform.python_version(),
+                     sqlite=sqlite3.sqlite_version),
+        'total': {
+            'requests': total,
+            'errors': sum(r.errors for r in results.values()),
+            'seconds': elapsed,
+            'rps': total / elapsed if elapsed else 0.0,
+        },
+        'paths': {url: result.summary() for url, result in results.items()},
+    }
+
+
+def compare(report, baseline, tolerance=0.2, noise_ms=1.0):
+    """Lista as regressões de ``report`` em relação a ``baseline``.
+
+    Uma URL regride se o p95 piora mais que ``tolerance`` (e mais que
+    ``noise_ms``) ou se passa a fazer mais consultas por requisição.
+    """
+    regressions = []
+    for url, current in report['paths'].items():
+        previous = baseline.get('paths', {}).get(url)
+        if not previous:
+            continue
+        if (current['p95_ms'] > previous['p95_ms'] * (1 + tolerance)
+                and current['p95_ms'] - previous['p95_ms'] > noise_ms):
+            regressions.append(f"{url}: p95 {previous['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms")
+        if (current['queries_per_request'] is not None and previous['queries_per_request'] is not None
+                and current['queries_per_request'] > previous['queries_per_request'] + 0.5):
+            regressions.append(f"{url}: consultas/req {previous['queries_per_request']:.1f} -> "
+                               f"{current['queries_per_request']:.1f}")
+    previous_rps = baseline.get('total', {}).get('rps')
+    if previous_rps and report['total']['rps'] < previous_rps * (1 - tolerance):
+        regressions.append(f"total: {previous_rps:.0f} req/s -> {report['total']['rps']:.0f} req/s")
+    return regressions
+
+
+def print_report(report):
+    print(f"{'URL':<45} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'cons/req':>9}")
+    for url, row in report['paths'].items():
+        queries = '-' if row['queries_per_request'] is None else f"{row['queries_per_request']:.1f}"
+        print(f"{url[:45]:<45} {row['rps']:>8.0f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+              f"{row['p99_ms']:>8.2f} {queries:>9}")
+    total = report['total']
+    print(f"Total: {total['requests']} requisições em {total['seconds']:.2f}s "
+          f"({total['rps']:.0f} req/s), {total['errors']} erros.")
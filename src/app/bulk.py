@@ -0,0 +1,116 @@
+"""Operações em lote do admin, cada uma num único UPDATE/DELETE.
+
+Fechar todas as trilhas de um parque (ex.: após um temporal) clicando uma
+a uma custa uma carga, um commit e um redirecionamento por trilha. Aqui
+cada operação é um comando SQL sobre o conjunto selecionado (ids marcados
+ou um filtro), numa transação só, com ``RETURNING`` para contar as linhas
+afetadas e saber os parques envolvidos. Contadores do dashboard e versões
+das tabelas são ajustados na mesma transação, e os caches recebem um único
+``data_changed`` no fim.
+"""
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, update
+
+from . import db
+from .counters import apply_deltas
+from .models import Trail, Event, AvailabilityPeriod
+from .signals import notify_change
+from .versions import TABLE_ENTITIES, bump
+
+# Maior deslocamento aceito em shift_availability (~10 anos). Muito além disso o
+# date() do SQLite devolve NULL e o UPDATE falha nas colunas NOT NULL
+MAX_SHIFT_DAYS = 3660
+
+# affected: linhas alteradas/removidas; park_ids: parques afetados
+BulkResult = namedtuple('BulkResult', 'affected park_ids')
+
+
+def _conditions(model, ids=None, park_id=None):
+    conditions = []
+    if ids is not None:
+        conditions.append(model.id.in_(ids))
+    if park_id is not None:
+        conditions.append(model.park_id == park_id)
+    return conditions
+
+
+def _event_conditions(ids=None, park_id=None, start=None, end=None):
+    """Filtro de eventos: ids marcados, parque e/ou início entre as datas ``start`` e ``end``."""
+    conditions = _conditions(Event, ids, park_id)
+    if start is not None:
+        conditions.append(Event.start_datetime >= start)
+    if end is not None:
+        conditions.append(Event.start_datetime < end + timedelta(days=1))
+    return conditions
+
+
+def _execute(stmt, conditions, deltas=None):
+    """Executa ``stmt`` (com ``RETURNING``) e conclui a transação.
+
+    Raises:
+        ValueError: nenhum filtro informado (não altera a tabela inteira)
+    """
+    if not conditions:
+        raise ValueError('informe ids ou um filtro')
+    table = stmt.table.name
+    connection = db.session.connection()
+    rows = connection.execute(stmt.where(*conditions)).all()
+    if rows:
+        if deltas is not None:
+            apply_deltas(connection, deltas(rows))
+        bumped = bump(connection, table)
+    db.session.commit()
+    park_ids = {row.park_id for row in rows}
+    if rows:
+        current_app.extensions['data_versions'].apply(bumped)
+        notify_change(TABLE_ENTITIES[table], *park_ids)
+    return BulkResult(len(rows), park_ids)
+
+
+def set_trails_open(is_open, ids=None, park_id=None):
+    """Abre ou fecha as trilhas selecionadas (só as que ainda não estão assim)."""
+    conditions = _conditions(Trail, ids, park_id)
+    if conditions:
+        conditions.append(Trail.is_open != is_open)
+    stmt = update(Trail).values(is_open=is_open).returning(Trail.park_id)
+    return _execute(stmt, conditions,
+                    lambda rows: {'trails_open': len(rows) if is_open else -len(rows)})
+
+
+def set_events_active(is_active, ids=None, park_id=None, start=None, end=None):
+    """Ativa ou desativa os eventos selecionados (só os que ainda não estão assim)."""
+    conditions = _event_conditions(ids, park_id, start, end)
+    if conditions:
+        conditions.append(Event.is_active != is_active)
+    stmt = update(Event).values(is_active=is_active).returning(Event.park_id)
+    return _execute(stmt, conditions,
+                    lambda rows: {'events_active': len(rows) if is_active else -len(rows)})
+
+
+def delete_events(ids=None, park_id=None, start=None, end=None):
+    """Exclui os eventos selecionados."""
+    def deltas(rows):
+        counts = Counter(bool(row.is_active) for row in rows)
+        return {'events': -len(rows), 'events_active': -counts[True]}
+
+    stmt = delete(Event).returning(Event.park_id, Event.is_active)
+    return _execute(stmt, _event_conditions(ids, park_id, start, end), deltas)
+
+
+def shift_availability(days, ids=None, park_id=None):
+    """Desloca início e fim dos períodos selecionados em ``days`` dias (negativo: antecipa).
+
+    Raises:
+        ValueError: ``days`` fora de ±``MAX_SHIFT_DAYS``
+    """
+    if abs(days) > MAX_SHIFT_DAYS:
+        raise ValueError(f'deslocamento acima de {MAX_SHIFT_DAYS} dias')
+    modifier = f'{days:+d} days'
+    stmt = update(AvailabilityPeriod).values(
+        start_date=func.date(AvailabilityPeriod.start_date, modifier),
+        end_date=func.date(AvailabilityPeriod.end_date, modifier),
+    ).returning(AvailabilityPeriod.park_id)
+    return _execute(stmt, _conditions(AvailabilityPeriod, ids, park_id))
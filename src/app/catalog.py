@@ -0,0 +1,71 @@
+"""Catálogo de parques compartilhado em memória.
+
+A lista de parques muda raramente, mas é lida em quase toda página (filtros
+públicos e campos ``park_id`` dos formulários admin). O catálogo mantém um
+retrato imutável ``(id, name, type, location, description)`` ordenado por
+nome, montado uma vez e trocado atomicamente quando a versão da tabela
+``parks`` (ver ``versions.py``) muda — inclusive por escritas de outros
+processos.
+"""
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+from flask import current_app
+from sqlalchemy import select
+
+from . import db
+from .models import Park
+
+ParkEntry = namedtuple('ParkEntry', 'id name type location description')
+
+
+class CatalogSnapshot:
+    """Retrato imutável do catálogo num dado carimbo de versão."""
+
+    __slots__ = ('version', 'parks', 'by_id')
+
+    def __init__(self, version, parks):
+        self.version = version
+        self.parks = tuple(parks)
+        self.by_id = MappingProxyType({p.id: p for p in self.parks})
+
+    def choices(self):
+        """Lista ``(id, nome)`` para campos ``SelectField``."""
+        return [(p.id, p.name) for p in self.parks]
+
+
+class ParkCatalog:
+    """Catálogo de parques lido por todas as threads do processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def init_app(self, app):
+        app.extensions['park_catalog'] = self
+
+    def get(self):
+        """Retrato atual, reconstruído se a versão de ``parks`` mudou."""
+        version = current_app.extensions['data_versions'].get(Park.__tablename__)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._build(version)
+                self._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def _build(version):
+        rows = db.session.execute(
+            select(Park.id, Park.name, Park.type, Park.location, Park.description).order_by(Park.name)
+        ).all()
+        return CatalogSnapshot(version, (ParkEntry(*row) for row in rows))
+
+
+def park_catalog():
+    """Retrato atual do catálogo de parques da aplicação."""
+    return current_app.extensions['park_catalog'].get()
@@ -1,18 +1,412 @@
 import argparse
+import getpass
+import json
+import sys
+import time
+from collections import Counter
 from datetime import datetime, timedelta, date
+from pathlib import Path
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.schema import CreateTable
 
 from . import db
 from . import create_app
-from .models import AdminUser, Park, Trail, Event, AvailabilityPeriod
+from .versions import bump
+from .models import AdminUser, Park, Trail, Event, AvailabilityPeriod, BiodiversityItem, normalize_difficulty
 
 
 def init_db(app):
 	"""Cria as tabelas no banco de dados."""
+	from .counters import recount
 	with app.app_context():
 		db.create_all()
+		recount(db.session.connection())
+		db.session.commit()
 		print("Banco de dados inicializado (tabelas criadas).")
 
 
+def migrate_difficulty_codes(connection):
+	"""Converte dificuldades gravadas como texto livre ('Difícil') nos códigos ('dificil').
+
+	Returns:
+		(linhas convertidas, valores desconhecidos deixados como estão)
+	"""
+	updated = 0
+	unknown = []
+	values = connection.execute(select(Trail.difficulty).distinct()).scalars().all()
+	for value in values:
+		code = normalize_difficulty(value)
+		if code is None:
+			unknown.append(value)
+		elif code != value:
+			updated += connection.execute(
+				Trail.__table__.update().where(Trail.difficulty == value).values(difficulty=code)
+			).rowcount
+	if updated:
+		bump(connection, Trail.__tablename__)
+	return updated, unknown
+
+
+def add_missing_columns(connection):
+	"""Adiciona às tabelas existentes as colunas declaradas nos modelos que faltam.
+
+	Colunas NOT NULL precisam de ``server_default`` no modelo.
+
+	Returns:
+		Lista de "tabela.coluna" adicionadas
+	"""
+	inspector = inspect(connection)
+	added = []
+	for table in db.metadata.sorted_tables:
+		existing = {column['name'] for column in inspector.get_columns(table.name)}
+		for column in table.columns:
+			if column.name in existing:
+				continue
+			ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(connection.dialect)}'
+			if column.server_default is not None:
+				default = column.server_default.arg
+				ddl += f' DEFAULT {getattr(default, "text", default)}'
+			if not column.nullable:
+				ddl += ' NOT NULL'
+			connection.exec_driver_sql(ddl)
+			added.append(f'{table.name}.{column.name}')
+	return added
+
+
+def _foreign_key_actions(table):
+	"""Chaves estrangeiras declaradas no modelo: (colunas, tabela referida, ON DELETE)."""
+	return {
+		(tuple(c.name for c in fk.columns), fk.referred_table.name, (fk.ondelete or '').upper())
+		for fk in table.foreign_key_constraints
+	}
+
+
+def tables_to_rebuild(connection):
+	"""Tabelas cuja DDL gravada no banco difere do modelo no AUTOINCREMENT ou no ON DELETE.
+
+	O SQLite não altera essas opções numa tabela existente; ela precisa ser recriada.
+	"""
+	stored = dict(connection.exec_driver_sql("SELECT name, sql FROM sqlite_master WHERE type = 'table'").all())
+	inspector = inspect(connection)
+	rebuild = []
+	for table in db.metadata.sorted_tables:
+		if table.name not in stored:
+			continue
+		reflected = {
+			(tuple(fk['constrained_columns']), fk['referred_table'], (fk['options'].get('ondelete') or '').upper())
+			for fk in inspector.get_foreign_keys(table.name)
+		}
+		if (table.dialect_options['sqlite']['autoincrement'] != ('AUTOINCREMENT' in stored[table.name].upper())
+				or reflected != _foreign_key_actions(table)):
+			rebuild.append(table)
+	return rebuild
+
+
+def rebuild_table(connection, table):
+	"""Recria ``table`` com a DDL atual do modelo, preservando linhas e ids.
+
+	Segue o roteiro do SQLite para alterar tabelas: cria a nova com outro
+	nome, copia os dados, apaga a antiga e renomeia. Índices e gatilhos vão
+	junto com a tabela antiga e precisam ser recriados depois. Deve rodar com
+	``PRAGMA foreign_keys=OFF``: apagar uma tabela referida com as chaves
+	ativas apagaria em cascata as linhas filhas.
+	"""
+	new_name = f'{table.name}__new'
+	ddl = str(CreateTable(table).compile(dialect=connection.dialect)).strip()
+	connection.exec_driver_sql(ddl.replace(f'CREATE TABLE {table.name} ', f'CREATE TABLE {new_name} ', 1))
+	existing = {column['name'] for column in inspect(connection).get_columns(table.name)}
+	columns = ', '.join(column.name for column in table.columns if column.name in existing)
+	connection.exec_driver_sql(f'INSERT INTO {new_name} ({columns}) SELECT {columns} FROM {table.name}')
+	connection.exec_driver_sql(f'DROP TABLE {table.name}')
+	connection.exec_driver_sql(f'ALTER TABLE {new_name} RENAME TO {table.name}')
+
+
+def upgrade_db(app):
+	"""Atualiza o esquema de um banco existente sem apagar dados.
+
+	Cria tabelas novas e os índices declarados nos modelos que ainda não
+	existem no arquivo SQLite (``db.create_all`` não cria índices em
+	tabelas já existentes), recria as tabelas cujo AUTOINCREMENT ou
+	``ON DELETE`` mudou e converte dados para o formato atual.
+	"""
+	from .counters import recount
+	from .search import ensure_search_index
+	with app.app_context():
+		db.create_all()
+		added = add_missing_columns(db.session.connection())
+		db.session.commit()
+		if added:
+			print(f"Colunas adicionadas: {', '.join(added)}")
+		rebuilt = tables_to_rebuild(db.session.connection())
+		if rebuilt:
+			connection = db.session.connection()
+			# Fora de transação (o PRAGMA é ignorado dentro de uma): nada foi escrito ainda nesta
+			foreign_keys = connection.exec_driver_sql('PRAGMA foreign_keys').scalar()
+			connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+			try:
+				for table in rebuilt:
+					rebuild_table(connection, table)
+				# Gatilhos da busca foram apagados com as tabelas antigas; índices são recriados abaixo
+				ensure_search_index(connection)
+				orphans = connection.exec_driver_sql('PRAGMA foreign_key_check').all()
+				db.session.commit()
+			finally:
+				db.session.connection().exec_driver_sql(f'PRAGMA foreign_keys={foreign_keys}')
+			print(f"Tabelas recriadas: {', '.join(table.name for table in rebuilt)}")
+			if orphans:
+				counts = Counter(row[0] for row in orphans)
+				print("Registros sem parque (corrija ou exclua): "
+				      + ', '.join(f'{name}: {count}' for name, count in sorted(counts.items())))
+		inspector = inspect(db.engine)
+		created = []
+		for table in db.metadata.sorted_tables:
+			existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+			for index in table.indexes:
+				if index.name not in existing:
+					index.create(bind=db.engine)
+					created.append(index.name)
+		if created:
+			print(f"Índices criados: {', '.join(created)}")
+		updated, unknown = migrate_difficulty_codes(db.session.connection())
+		if updated:
+			print(f"Dificuldades convertidas para código: {updated} trilhas")
+		if unknown:
+			print(f"Dificuldades não reconhecidas (corrija no admin): {', '.join(map(repr, unknown))}")
+		recount(db.session.connection())
+		db.session.commit()
+		print("Banco de dados atualizado.")
+		return created
+
+
+def build_assets_cmd(app):
+	"""Gera os pacotes CSS/JS minificados, com hash no nome e pré-comprimidos."""
+	from .assets import build_assets, brotli
+	dist_folder = app.config.get('ASSETS_DIST_FOLDER')
+	manifest = build_assets(app.static_folder, dist_folder)
+	for name, path in manifest.items():
+		print(f"{name} -> {path}")
+	if brotli is None:
+		print("Pacote 'brotli' não instalado: só variantes .gz geradas.")
+	print("Pacotes gerados; reinicie a aplicação para carregar o manifesto.")
+	return manifest
+
+
+def set_password(app, email, password):
+	"""Troca a senha de um administrador, encerrando as sessões abertas dele."""
+	with app.app_context():
+		admin = AdminUser.query.filter_by(email=email).first()
+		if admin is None:
+			print(f"Administrador não encontrado: {email}")
+			return False
+		admin.set_password(password)
+		db.session.commit()
+		print(f"Senha de {email} alterada; sessões anteriores revogadas.")
+		return True
+
+
+def reindex_db(app):
+	"""Reconstrói o índice de busca (FTS5) a partir das tabelas."""
+	from .search import ensure_search_index, rebuild_search_index
+	with app.app_context():
+		connection = db.session.connection()
+		ensure_search_index(connection)
+		total = rebuild_search_index(connection)
+		db.session.commit()
+		print(f"Índice de busca reconstruído: {total} documentos.")
+		return total
+
+
+def archive_events_cmd(app, days=None, batch_size=None):
+	"""Move para events_archive os eventos encerrados há mais de ``days`` dias."""
+	from .archive import DEFAULT_ARCHIVE_BATCH_SIZE, archive_events
+	batch_size = batch_size or DEFAULT_ARCHIVE_BATCH_SIZE
+	with app.app_context():
+		days = app.config['EVENT_ARCHIVE_DAYS'] if days is None else days
+		try:
+			result = archive_events(datetime.utcnow() - timedelta(days=days), batch_size=batch_size)
+		except RuntimeError as exc:
+			print(f"Erro: {exc}")
+			return None
+		print(f"Eventos arquivados: {result.archived} ({result.batches} lotes)")
+		return result
+
+
+def recount_db(app):
+	"""Reconstrói os contadores do dashboard a partir das tabelas."""
+	from .counters import recount
+	with app.app_context():
+		values = recount(db.session.connection())
+		db.session.commit()
+		for name, value in values.items():
+			print(f"{name}: {value}")
+		print("Contadores recalculados.")
+
+
+def public_check_paths():
+	"""Retorna as URLs públicas exercitadas pela verificação de planos de consulta."""
+	park = Park.query.order_by(Park.id).first()
+	park_id = park.id if park else 1
+	return [
+		'/',
+		'/parks',
+		f'/parks/{park_id}',
+		f'/parks/{park_id}/calendar',
+		'/trails',
+		f'/trails?park_id={park_id}',
+		f'/trails?park_id={park_id}&difficulty=moderada',
+		'/events',
+		f'/events?park_id={park_id}',
+		'/search?q=trilha',
+	]
+
+
+# Tabelas pequenas lidas inteiras de propósito (uma linha por tabela do banco)
+FULL_SCAN_ALLOWED = {'data_versions'}
+
+
+def check_query_plans(app):
+	"""Confere com EXPLAIN QUERY PLAN se as consultas das rotas públicas usam índices.
+
+	Cada rota pública é requisitada pelo cliente de testes do Flask; as
+	instruções SELECT emitidas são capturadas e analisadas. Uma consulta
+	falha se o plano contém uma varredura completa (``SCAN <tabela>`` sem
+	``USING INDEX``) de alguma tabela dos modelos.
+
+	Returns:
+		Lista de tuplas (url, sql, plano, ok)
+	"""
+	results = []
+	with app.app_context():
+		engine = db.engine
+		tables = set(db.metadata.tables) - FULL_SCAN_ALLOWED
+		paths = public_check_paths()
+		captured = []
+
+		def capture(conn, cursor, statement, parameters, context, executemany):
+			if statement.lstrip().upper().startswith('SELECT'):
+				captured.append((statement, parameters))
+
+		client = app.test_client()
+		page_cache = app.extensions.get('page_cache')
+		event.listen(engine, 'before_cursor_execute', capture)
+		try:
+			for path in paths:
+				del captured[:]
+				if page_cache is not None:
+					page_cache.clear()
+				client.get(path)
+				for statement, parameters in list(captured):
+					with engine.connect() as conn:
+						rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+					plan = [row[-1] for row in rows]
+					full_scans = [
+						step for step in plan
+						if step.startswith('SCAN ') and 'USING' not in step
+						and step.split()[1] in tables
+					]
+					results.append((path, statement, plan, not full_scans))
+		finally:
+			event.remove(engine, 'before_cursor_execute', capture)
+	return results
+
+
+def report_query_plans(app):
+	"""Imprime o resultado de ``check_query_plans`` e indica se tudo usa índice."""
+	results = check_query_plans(app)
+	failures = [r for r in results if not r[3]]
+	for path, statement, plan, ok in results:
+		status = 'OK ' if ok else 'SCAN'
+		print(f"[{status}] {path}: {' | '.join(plan)}")
+		if not ok:
+			print(f"       {' '.join(statement.split())}")
+	print(f"{len(results)} consultas analisadas, {len(failures)} sem índice.")
+	return not failures
+
+
+def run_bench(args):
+	"""Gera o catálogo sintético (se o banco estiver vazio), mede as rotas e compara com um relatório salvo.
+
+	Returns:
+		Código de saída (1 se houver regressões)
+	"""
+	from .bench import (BenchScale, DEFAULT_SCALE, generate, ensure_bench_admin, bench_paths,
+	                    run_client, run_http, build_report, compare, print_report)
+	database = Path(args.database).resolve()
+	if args.regenerate and database.exists():
+		database.unlink()
+	overrides = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}', 'METRICS_ENABLED': True}
+	if args.no_page_cache:
+		overrides['PAGE_CACHE_ENABLED'] = False
+	app = create_app(args.config, overrides=overrides)
+	scale = BenchScale(*(getattr(DEFAULT_SCALE, field) if getattr(args, field) is None else getattr(args, field)
+	                     for field in BenchScale._fields))
+
+	with app.app_context():
+		db.create_all()
+		if Park.query.first() is None:
+			started = time.perf_counter()
+			counts = generate(scale)
+			print(f"Dados sintéticos gerados em {time.perf_counter() - started:.1f}s: "
+			      + ', '.join(f'{name}={count}' for name, count in counts.items()))
+		ensure_bench_admin()
+		rows = {
+			table.name: db.session.scalar(select(func.count()).select_from(table))
+			for table in (Park.__table__, Trail.__table__, Event.__table__,
+			              AvailabilityPeriod.__table__, BiodiversityItem.__table__)
+		}
+
+	if args.login_storm:
+		return run_login_bench(args, overrides)
+
+	paths = bench_paths(app)
+	if args.mode in ('http', 'asgi'):
+		results, elapsed = run_http(app, paths, args.requests, concurrency=args.concurrency,
+		                            server='asgi' if args.mode == 'asgi' else 'wsgi')
+	else:
+		results, elapsed = run_client(app, paths, args.requests)
+
+	report = build_report(results, elapsed, {
+		'mode': args.mode,
+		'config': args.config,
+		'rows': rows,
+		'requests_per_path': args.requests,
+		'concurrency': args.concurrency if args.mode != 'client' else 1,
+		'page_cache': not args.no_page_cache,
+	})
+	print_report(report)
+	if args.output:
+		Path(args.output).write_text(json.dumps(report, indent=2), encoding='utf-8')
+		print(f"Relatório salvo em {args.output}")
+
+	if args.baseline:
+		baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+		regressions = compare(report, baseline, tolerance=args.tolerance)
+		for line in regressions:
+			print(f"REGRESSÃO {line}")
+		print(f"{len(regressions)} regressões em relação a {args.baseline}.")
+		if regressions:
+			return 1
+	return 0
+
+
+def run_login_bench(args, overrides):
+	"""Mede /parks durante uma rajada de logins, sem e com a proteção do login."""
+	from .bench import run_login_storm
+	report = {}
+	for label, enabled in (('sem proteção', False), ('com proteção', True)):
+		app = create_app(args.config, overrides=dict(overrides, LOGIN_GUARD_ENABLED=enabled))
+		result = run_login_storm(app, attackers=args.attackers, duration=args.duration)
+		report[label] = result
+		print(f"{label}: /parks p50 {result['idle']['p50_ms']:.2f}ms -> {result['storm']['p50_ms']:.2f}ms, "
+		      f"p95 {result['idle']['p95_ms']:.2f}ms -> {result['storm']['p95_ms']:.2f}ms "
+		      f"({result['storm']['requests']} req na rajada); logins por status: {result['login']}")
+	if args.output:
+		Path(args.output).write_text(json.dumps(report, indent=2), encoding='utf-8')
+		print(f"Relatório salvo em {args.output}")
+	return 0
+
+
 def seed_db(app):
 	"""Insere dados mínimos de exemplo."""
 	with app.app_context():
@@ -70,7 +464,7 @@ def seed_db(app):
 			{
 				'park': 'Parque Nacional da Serra dos Órgãos',
 				'name': 'Trilha da Pedra do Sino',
-				'difficulty': 'difícil',
+				'difficulty': 'dificil',
 				'duration_estimated': '6-8h',
 				'description': 'Uma das trilhas mais famosas, com vista incrível no cume.',
 				'is_open': True,
@@ -78,7 +472,7 @@ def seed_db(app):
 			{
 				'park': 'Parque Nacional da Serra dos Órgãos',
 				'name': 'Trilha Suspensa',
-				'difficulty': 'fácil',
+				'difficulty': 'facil',
 				'duration_estimated': '1-2h',
 				'description': 'Trilha adaptada, excelente para iniciantes e famílias.',
 				'is_open': True,
@@ -194,18 +588,105 @@ def seed_db(app):
 		print("Banco populado com dados de exemplo.")
 
 
+# Comandos que requisitam páginas e precisam dos blueprints
+VIEW_COMMANDS = {'check-indexes'}
+
+# Chaves de importer.IMPORT_SPECS, repetidas aqui para o argparse não importar
+# o importador (e com ele os formulários WTForms) em todo comando
+ENTITIES = ('availability', 'biodiversity', 'events', 'parks', 'trails')
+
+
 def main():
 	parser = argparse.ArgumentParser(description='CLI do Terê Verde Online')
-	parser.add_argument('command', choices=['init-db', 'seed'], help='Comando a executar')
+	parser.add_argument('command', choices=['init-db', 'seed', 'upgrade-db', 'check-indexes', 'recount', 'import', 'export', 'bench', 'reindex', 'set-password', 'build-assets', 'startup-report', 'archive-events'], help='Comando a executar')
 	parser.add_argument('--config', default='development', help='Nome da configuração (development|production)')
+	parser.add_argument('--entity', choices=ENTITIES, help='Entidade a importar/exportar (import, export)')
+	parser.add_argument('--file', help='Arquivo CSV ou NDJSON a ler (import) ou gravar (export; padrão: saída padrão)')
+	parser.add_argument('--format', choices=['csv', 'ndjson'], help='Formato do arquivo (padrão: pela extensão; csv no export)')
+	parser.add_argument('--batch-size', type=int, help='Linhas por transação (import, archive-events)')
+	parser.add_argument('--dry-run', action='store_true', help='Só valida o arquivo, sem gravar (import)')
+	parser.add_argument('--email', help='Email do administrador (set-password)')
+	parser.add_argument('--days', type=int, help='Arquiva eventos encerrados há mais dias que isso (archive-events; padrão: EVENT_ARCHIVE_DAYS)')
+	startup = parser.add_argument_group('startup-report')
+	startup.add_argument('--path', default='/', help='URL da primeira requisição medida')
+	startup.add_argument('--budget-ms', type=float, help='Sai com código 1 se importação + create_app + 1ª requisição passar disso')
+	bench = parser.add_argument_group('bench')
+	bench.add_argument('--database', default='data/bench.db', help='Arquivo SQLite usado pelo benchmark')
+	bench.add_argument('--regenerate', action='store_true', help='Apaga o banco do benchmark e gera os dados de novo')
+	# Escala: sem valor, usa bench.DEFAULT_SCALE
+	bench.add_argument('--parks', type=int)
+	bench.add_argument('--trails', type=int)
+	bench.add_argument('--events', type=int)
+	bench.add_argument('--biodiversity', type=int)
+	bench.add_argument('--availability', type=int, help='Temporadas por parque')
+	bench.add_argument('--mode', choices=['client', 'http', 'asgi'], default='client',
+	                   help='Cliente de testes, HTTP com servidor WSGI (threads) ou HTTP com servidor ASGI (asgi.py)')
+	bench.add_argument('--requests', type=int, default=50, help='Requisições por URL')
+	bench.add_argument('--concurrency', type=int, default=8, help='Conexões simultâneas nos modos http e asgi')
+	bench.add_argument('--no-page-cache', action='store_true', help='Desliga o cache de páginas')
+	bench.add_argument('--output', help='Salva o relatório JSON neste arquivo')
+	bench.add_argument('--baseline', help='Relatório JSON anterior para comparação')
+	bench.add_argument('--tolerance', type=float, default=0.2, help='Piora relativa aceita no p95 e em req/s')
+	bench.add_argument('--login-storm', action='store_true', help='Mede /parks durante uma rajada de logins errados, sem e com a proteção do login')
+	bench.add_argument('--attackers', type=int, default=16, help='Threads enviando logins na rajada')
+	bench.add_argument('--duration', type=float, default=5.0, help='Segundos de cada fase da rajada')
 	args = parser.parse_args()
+	if args.command == 'bench':
+		sys.exit(run_bench(args))
+	if args.command == 'import' and not (args.entity and args.file):
+		parser.error('import exige --entity e --file')
+	if args.command == 'export' and not args.entity:
+		parser.error('export exige --entity')
+	if args.command == 'set-password' and not args.email:
+		parser.error('set-password exige --email')
+
+	if args.command == 'startup-report':
+		from .startup import measure_startup, print_startup_report
+		report = measure_startup(args.config, path=args.path)
+		print_startup_report(report)
+		if args.budget_ms and report['total_ms'] > args.budget_ms:
+			print(f"ACIMA DO ORÇAMENTO: {report['total_ms']:.0f}ms > {args.budget_ms:.0f}ms")
+			sys.exit(1)
+		return
 
-	app = create_app(args.config)
+	# Só a verificação de índices requisita páginas; os demais comandos dispensam os blueprints
+	app = create_app(args.config, load_views=args.command in VIEW_COMMANDS)
 
 	if args.command == 'init-db':
 		init_db(app)
 	elif args.command == 'seed':
 		seed_db(app)
+	elif args.command == 'upgrade-db':
+		upgrade_db(app)
+	elif args.command == 'recount':
+		recount_db(app)
+	elif args.command == 'reindex':
+		reindex_db(app)
+	elif args.command == 'build-assets':
+		build_assets_cmd(app)
+	elif args.command == 'archive-events':
+		if archive_events_cmd(app, args.days, args.batch_size) is None:
+			sys.exit(1)
+	elif args.command == 'set-password':
+		password = getpass.getpass('Nova senha: ')
+		if not password or password != getpass.getpass('Repita a senha: '):
+			print('As senhas não conferem.')
+			sys.exit(1)
+		if not set_password(app, args.email, password):
+			sys.exit(1)
+	elif args.command == 'check-indexes':
+		if not report_query_plans(app):
+			sys.exit(1)
+	elif args.command == 'import':
+		from .importer import DEFAULT_BATCH_SIZE, import_file
+		result = import_file(app, args.entity, args.file, fmt=args.format,
+		                     batch_size=args.batch_size or DEFAULT_BATCH_SIZE, dry_run=args.dry_run)
+		if result.invalid:
+			sys.exit(1)
+	elif args.command == 'export':
+		from .exporter import export_to_file
+		fmt = args.format or ('ndjson' if (args.file or '').endswith('.ndjson') else 'csv')
+		export_to_file(app, args.entity, args.file, fmt=fmt)
 
 
 if __name__ == "__main__":
@@ -3,8 +3,7 @@ from pathlib import Path
 
 # Caminho base do projeto (subindo um nível de src/app/)
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
-DATA_DIR = BASE_DIR / 'data'
-DATA_DIR.mkdir(exist_ok=True)
+DATA_DIR = BASE_DIR / 'data'  # criado por create_app quando o banco fica nele
 
 class BaseConfig:
     """Configuração base para todas as configurações"""
@@ -15,9 +14,78 @@ class BaseConfig:
     DATABASE_PATH = DATA_DIR / 'tere_verde.db'
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{DATABASE_PATH}'
 
+    # Pragmas aplicados a cada conexão SQLite (ver database.py)
+    SQLITE_PRAGMAS = {
+        'busy_timeout': 5000,  # ms esperando um lock antes de "database is locked"
+        'foreign_keys': 'ON',  # ON DELETE CASCADE dos filhos de parks
+    }
+
+    # Intervalo máximo para perceber escritas feitas por outros processos
+    VERSION_RECHECK_SECONDS = 2
+
+    # Fuso horário dos parques (horários de funcionamento e "aberto agora")
+    PARK_TIMEZONE = 'America/Sao_Paulo'
+
+    # Itens por página nas listagens (paginação por cursor)
+    PAGE_SIZE = 50
+    ADMIN_PAGE_SIZE = 100
+
+    # Eventos encerrados há mais dias que isso vão para events_archive (archive-events)
+    EVENT_ARCHIVE_DAYS = 30
+
+    # Tempo (s) que navegadores e proxies podem guardar as páginas públicas
+    PUBLIC_MAX_AGE = 60
+
+    # Tempo (s) que clientes da API podem reutilizar uma resposta sem revalidar
+    API_MAX_AGE = 30
+
+    # Custo do bcrypt; hashes com outro custo são refeitos no próximo login
+    BCRYPT_ROUNDS = 12
+
+    # Identidade do admin guardada na sessão (ver identity.py)
+    ADMIN_IDENTITY_TTL = 300  # segundos até reconferir no banco
+    ADMIN_IDENTITY_CACHE_SIZE = 256
+
+    # Proteção do login (ver login_guard.py)
+    LOGIN_GUARD_ENABLED = True
+    LOGIN_HASH_WORKERS = 2  # verificações bcrypt simultâneas
+    LOGIN_HASH_QUEUE = 8  # verificações aguardando vaga; acima disso, 503
+    LOGIN_HASH_TIMEOUT = 10  # segundos
+    LOGIN_WINDOW_SECONDS = 300
+    LOGIN_MAX_FAILURES_PER_IP = 20
+    LOGIN_MAX_FAILURES_PER_EMAIL = 5
+
+    # Proxies reversos confiáveis à frente da aplicação. Com N > 0, o IP do
+    # cliente (limites por IP do login) vem do X-Forwarded-For gravado por
+    # eles (ProxyFix); com 0, é o da conexão. Sem proxy, deixe 0: o cabeçalho
+    # seria enviado pelo próprio cliente
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+
+    # Pacotes estáticos gerados por "cli build-assets" (ver assets.py)
+    ASSETS_USE_MANIFEST = True
+    ASSETS_DIST_FOLDER = None  # padrão: src/app/static/dist
+
+    # Contadores do dashboard mantidos a cada escrita (tabela stat_counters)
+    STAT_COUNTERS_ENABLED = True
+
+    # Instrumentação de SQL por requisição (Server-Timing e /admin/metrics)
+    METRICS_ENABLED = True
+    METRICS_WINDOW = 1000  # medições mantidas por endpoint para os percentis
+
+    # Cache das páginas públicas renderizadas (invalidado pelas rotas admin)
+    PAGE_CACHE_ENABLED = True
+    PAGE_CACHE_MAX_ENTRIES = 256
+    PAGE_CACHE_TTL = 300  # segundos
+
+    # Dados da página de detalhe do parque, em cache por parque (ver park_detail.py)
+    PARK_DETAIL_CACHE_ENABLED = True
+    PARK_DETAIL_CACHE_MAX_ENTRIES = 512
+
 class DevelopmentConfig(BaseConfig):
     """Configuração para desenvolvimento"""
     DEBUG = True
+    # Fontes servidos direto, para editar CSS/JS sem rodar build-assets
+    ASSETS_USE_MANIFEST = False
 
 class ProductionConfig(BaseConfig):
     """Configuração para produção"""
@@ -25,9 +93,44 @@ class ProductionConfig(BaseConfig):
     # Em produção, SECRET_KEY deve ser definida via variável de ambiente
     SECRET_KEY = os.environ.get('SECRET_KEY') or None
 
+    # Em produção a aplicação fica atrás de um proxy reverso (cache das páginas públicas)
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1))
+
+    # WAL: leituras públicas não bloqueiam atrás das escritas do admin
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # seguro com WAL; só o último commit pode se perder numa queda de energia
+        'cache_size': -64000,  # KiB (64 MB) por conexão
+        'mmap_size': 268435456,  # 256 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+        'foreign_keys': 'ON',
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 10,
+        'max_overflow': 10,
+        'pool_timeout': 10,
+        'pool_pre_ping': True,
+    }
+    # Engine aiosqlite do modo ASGI (ver asgi.py)
+    ASGI_ENGINE_OPTIONS = {
+        'pool_size': 10,
+        'max_overflow': 10,
+        'pool_timeout': 10,
+    }
+
+class TestingConfig(BaseConfig):
+    """Configuração para testes automatizados (banco em memória)"""
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    BCRYPT_ROUNDS = 4  # mínimo do bcrypt; mantém os testes rápidos
+    ASSETS_USE_MANIFEST = False  # testes de assets apontam ASSETS_DIST_FOLDER para uma pasta temporária
+
 # Dicionário para escolher a configuração pelo nome
 config_by_name = {
     'development': DevelopmentConfig,
-    'production': ProductionConfig
+    'production': ProductionConfig,
+    'testing': TestingConfig
 }
 
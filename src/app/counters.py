@@ -0,0 +1,182 @@
+"""Estatísticas do dashboard administrativo.
+
+``aggregate_stats`` calcula todas as contagens numa única consulta.
+Com ``STAT_COUNTERS_ENABLED``, os totais também ficam na tabela
+``stat_counters``, atualizada na mesma transação de cada flush do ORM, e o
+dashboard passa a ler valores prontos (custo constante, independente do
+tamanho das tabelas). Só "eventos futuros" depende do relógio e continua
+sendo contado ao vivo, pelo índice ``ix_events_active_start``.
+
+Linhas apagadas pelo banco junto com um parque (``ON DELETE CASCADE``) não
+passam pelo ORM: antes do flush que exclui o parque, ``cascade_deltas``
+conta numa consulta o que vai sumir de cada tabela filha.
+
+Se os contadores divergirem (ex.: escrita feita fora do ORM), o comando
+``python -m src.app.cli recount`` os reconstrói.
+"""
+from collections import Counter, namedtuple
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, inspect, select, true, update
+from sqlalchemy.dialects.sqlite import insert
+
+from . import db
+from .models import Park, Trail, Event, EventArchive, AvailabilityPeriod, StatCounter
+
+# Contador: nome, modelo, atributo booleano que precisa ser verdadeiro (ou None)
+# e o nome da estatística no template do dashboard
+CounterSpec = namedtuple('CounterSpec', 'name model flag stat')
+
+# session.info: decrementos das linhas que o banco vai apagar em cascata
+_CASCADE_KEY = 'counters_cascaded'
+
+COUNTERS = (
+    CounterSpec('parks', Park, None, 'parks_count'),
+    CounterSpec('trails', Trail, None, 'trails_count'),
+    CounterSpec('trails_open', Trail, 'is_open', 'trails_open'),
+    CounterSpec('events', Event, None, 'events_count'),
+    CounterSpec('events_active', Event, 'is_active', 'events_active'),
+    CounterSpec('events_archived', EventArchive, None, 'events_archived'),
+    CounterSpec('availability_periods', AvailabilityPeriod, None, 'availability_periods_count'),
+)
+
+
+def _count_query(spec):
+    query = select(func.count()).select_from(spec.model)
+    if spec.flag:
+        query = query.where(getattr(spec.model, spec.flag) == true())
+    return query
+
+
+def _upcoming_events_query(now):
+    return select(func.count()).select_from(Event).where(
+        Event.is_active == true(),
+        Event.start_datetime >= now,
+    )
+
+
+def aggregate_stats(now=None):
+    """Todas as estatísticas do dashboard numa única consulta."""
+    now = now or datetime.utcnow()
+    columns = [_count_query(spec).scalar_subquery().label(spec.stat) for spec in COUNTERS]
+    columns.append(_upcoming_events_query(now).scalar_subquery().label('events_upcoming'))
+    return dict(db.session.execute(select(*columns)).one()._mapping)
+
+
+def counter_stats(now=None):
+    """Estatísticas a partir de ``stat_counters`` (também numa única consulta).
+
+    Reconstrói os contadores se algum ainda não existir.
+    """
+    now = now or datetime.utcnow()
+    columns = [
+        select(StatCounter.value).where(StatCounter.name == spec.name).scalar_subquery().label(spec.stat)
+        for spec in COUNTERS
+    ]
+    columns.append(_upcoming_events_query(now).scalar_subquery().label('events_upcoming'))
+    stats = dict(db.session.execute(select(*columns)).one()._mapping)
+    if any(value is None for value in stats.values()):
+        recount(db.session.connection())
+        db.session.commit()
+        return counter_stats(now)
+    return stats
+
+
+def dashboard_stats():
+    """Estatísticas do dashboard, usando os contadores mantidos se habilitados."""
+    if current_app.config.get('STAT_COUNTERS_ENABLED'):
+        return counter_stats()
+    return aggregate_stats()
+
+
+def recount(connection):
+    """Recalcula todos os contadores a partir das tabelas.
+
+    Returns:
+        Dicionário nome -> valor
+    """
+    values = {spec.name: connection.execute(_count_query(spec)).scalar() for spec in COUNTERS}
+    for name, value in values.items():
+        stmt = insert(StatCounter).values(name=name, value=value)
+        connection.execute(stmt.on_conflict_do_update(index_elements=[StatCounter.name],
+                                                      set_={'value': value}))
+    return values
+
+
+def apply_deltas(connection, deltas):
+    """Soma ``deltas`` (nome -> incremento) aos contadores existentes.
+
+    Contadores ainda inexistentes não são criados: ficam ausentes até o
+    próximo ``recount``, para não partirem de uma base errada.
+    """
+    for name, delta in deltas.items():
+        if delta:
+            connection.execute(
+                update(StatCounter).where(StatCounter.name == name).values(value=StatCounter.value + delta)
+            )
+
+
+def cascade_deltas(connection, park_ids, excluded=None):
+    """Decrementos dos contadores das linhas filhas de ``park_ids`` (numa consulta).
+
+    Args:
+        excluded: Modelo -> ids que não entram na conta (já excluídos pelo ORM)
+    """
+    excluded = excluded or {}
+    columns = []
+    for spec in COUNTERS:
+        if spec.model is Park:
+            continue
+        query = _count_query(spec).where(spec.model.park_id.in_(park_ids))
+        if excluded.get(spec.model):
+            query = query.where(spec.model.id.not_in(excluded[spec.model]))
+        columns.append(query.scalar_subquery().label(spec.name))
+    counts = connection.execute(select(*columns)).one()._mapping
+    return {name: -value for name, value in counts.items()}
+
+
+def _flag_change(obj, flag):
+    """(antes, depois) do atributo booleano de um objeto alterado."""
+    history = inspect(obj).attrs[flag].history
+    if not history.added or not history.deleted:
+        return None  # sem alteração, ou valor anterior desconhecido
+    return bool(history.deleted[0]), bool(history.added[0])
+
+
+def _counters_enabled():
+    return has_app_context() and current_app.config.get('STAT_COUNTERS_ENABLED')
+
+
+@event.listens_for(db.session, 'before_flush')
+def _count_cascaded_rows(session, flush_context, instances):
+    session.info.pop(_CASCADE_KEY, None)
+    if not _counters_enabled():
+        return
+    park_ids = [obj.id for obj in session.deleted if isinstance(obj, Park)]
+    if park_ids:
+        excluded = {spec.model: [obj.id for obj in session.deleted if isinstance(obj, spec.model)]
+                    for spec in COUNTERS}
+        session.info[_CASCADE_KEY] = cascade_deltas(session.connection(), park_ids, excluded)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _update_counters(session, flush_context):
+    if not _counters_enabled():
+        return
+    deltas = Counter(session.info.pop(_CASCADE_KEY, {}))
+    for spec in COUNTERS:
+        for obj in session.new:
+            if isinstance(obj, spec.model) and (not spec.flag or getattr(obj, spec.flag)):
+                deltas[spec.name] += 1
+        for obj in session.deleted:
+            if isinstance(obj, spec.model) and (not spec.flag or getattr(obj, spec.flag)):
+                deltas[spec.name] -= 1
+        if spec.flag:
+            for obj in session.dirty:
+                if isinstance(obj, spec.model):
+                    change = _flag_change(obj, spec.flag)
+                    if change and change[0] != change[1]:
+                        deltas[spec.name] += 1 if change[1] else -1
+    if any(deltas.values()):
+        apply_deltas(session.connection(), deltas)
@@ -0,0 +1,81 @@
+"""Ajustes do SQLite: pasta do banco, pragmas por conexão e nova tentativa em ``SQLITE_BUSY``.
+
+Os pragmas de ``SQLITE_PRAGMAS`` são aplicados a cada conexão aberta pelo
+pool do engine. No perfil de produção isso liga o WAL (leitores não
+esperam pelo escritor) e ajusta cache, mmap e ``busy_timeout``. Mesmo com
+o WAL, duas escritas simultâneas ainda podem receber "database is locked";
+``retry_on_busy`` desfaz a transação e repete a operação com espera
+crescente e limitada.
+"""
+import random
+import time
+from functools import wraps
+
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+from . import db
+
+_BUSY_CODES = {5, 6}  # SQLITE_BUSY, SQLITE_LOCKED
+
+
+def ensure_database_dir(app):
+    """Cria a pasta do arquivo SQLite configurado, se ainda não existir."""
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+        Path(url.database).parent.mkdir(parents=True, exist_ok=True)
+
+
+def configure_engine(app, engine):
+    """Registra a aplicação dos pragmas de ``SQLITE_PRAGMAS`` em cada nova conexão."""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def is_busy_error(exc):
+    """Indica se a exceção é um "database is locked"/"busy" do SQLite."""
+    orig = getattr(exc, 'orig', exc)
+    code = getattr(orig, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in _BUSY_CODES
+    message = str(orig).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def retry_on_busy(func=None, attempts=5, base_delay=0.05, max_delay=1.0):
+    """Repete ``func`` quando o SQLite responde ``SQLITE_BUSY``.
+
+    A cada falha a sessão é desfeita e a espera dobra (com variação
+    aleatória), até ``max_delay``; depois de ``attempts`` tentativas o erro
+    é propagado.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            for attempt in range(1, attempts + 1):
+                try:
+                    return f(*args, **kwargs)
+                except OperationalError as exc:
+                    if attempt == attempts or not is_busy_error(exc):
+                        raise
+                    db.session.rollback()
+                    delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+                    time.sleep(delay * random.uniform(0.5, 1.0))
+        return decorated_function
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,109 @@
+"""Exportação em fluxo das tabelas do catálogo (CSV ou NDJSON).
+
+As linhas são lidas do banco em blocos (``yield_per``) e convertidas em
+texto bloco a bloco, então a memória usada não depende do tamanho da
+tabela. O formato é o mesmo aceito por ``importer.py``: entidades ligadas a
+um parque trazem a coluna ``park`` com o nome dele.
+"""
+import csv
+import io
+import json
+import sys
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from . import db
+from .models import Park, Trail, Event, AvailabilityPeriod, BiodiversityItem
+
+# Mesmas entidades de importer.IMPORT_SPECS, sem importar os formulários
+# (a área admin só os carrega quando uma view de formulário é aberta)
+EXPORT_MODELS = {
+    'parks': Park,
+    'trails': Trail,
+    'events': Event,
+    'availability': AvailabilityPeriod,
+    'biodiversity': BiodiversityItem,
+}
+
+EXPORT_ENTITIES = tuple(EXPORT_MODELS)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_columns(entity):
+    """Nomes das colunas exportadas, na ordem do arquivo."""
+    model = EXPORT_MODELS[entity]
+    names = [column.name for column in model.__table__.columns]
+    if 'park_id' in names:
+        names.insert(names.index('park_id') + 1, 'park')
+    return names
+
+
+def _export_query(entity):
+    model = EXPORT_MODELS[entity]
+    columns = [getattr(model, column.name) for column in model.__table__.columns]
+    query = select(*columns)
+    if 'park_id' in model.__table__.columns:
+        query = query.add_columns(Park.name.label('park')).join(Park, Park.id == model.park_id)
+    return query.order_by(model.id)
+
+
+def iter_row_chunks(entity, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Gera listas de linhas (dicionários) lidas do banco em blocos de ``chunk_size``."""
+    result = db.session.execute(_export_query(entity).execution_options(yield_per=chunk_size))
+    for partition in result.mappings().partitions():
+        yield partition
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return _json_default(value) if isinstance(value, (datetime, date)) else value
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'valor não serializável: {value!r}')
+
+
+def iter_export(entity, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Gera o arquivo de exportação em pedaços de texto (um por bloco lido)."""
+    columns = export_columns(entity)
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for rows in iter_row_chunks(entity, chunk_size):
+            writer.writerows([_csv_value(row[name]) for name in columns] for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    elif fmt == 'ndjson':
+        for rows in iter_row_chunks(entity, chunk_size):
+            yield ''.join(
+                json.dumps({name: row[name] for name in columns}, default=_json_default, ensure_ascii=False) + '\n'
+                for row in rows
+            )
+    else:
+        raise ValueError(f'formato desconhecido: {fmt}')
+
+
+def export_to_file(app, entity, path=None, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Escreve a exportação em ``path`` (ou na saída padrão)."""
+    with app.app_context():
+        if path:
+            with open(path, 'w', newline='', encoding='utf-8') as fh:
+                for chunk in iter_export(entity, fmt, chunk_size):
+                    fh.write(chunk)
+        else:
+            for chunk in iter_export(entity, fmt, chunk_size):
+                sys.stdout.write(chunk)
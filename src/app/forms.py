@@ -2,6 +2,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, BooleanField, SelectField, DateTimeField, DateField, TimeField, PasswordField
 from wtforms.validators import DataRequired, Email, Optional, Length
 from datetime import datetime
+from .models import TRAIL_DIFFICULTIES, DIFFICULTY_LABELS, normalize_difficulty
 
 
 class LoginForm(FlaskForm):
@@ -26,11 +27,11 @@ class TrailForm(FlaskForm):
     """Formulário para criar/editar trilhas"""
     park_id = SelectField('Parque', coerce=int, validators=[DataRequired()])
     name = StringField('Nome', validators=[DataRequired(), Length(max=200)])
-    difficulty = SelectField('Dificuldade', choices=[
-        ('fácil', 'Fácil'),
-        ('moderada', 'Moderada'),
-        ('difícil', 'Difícil')
-    ], validators=[DataRequired()])
+    # Aceita 'Difícil', 'dificil' etc. e guarda o código sem acento
+    difficulty = SelectField('Dificuldade',
+                             choices=[(code, DIFFICULTY_LABELS[code]) for code in TRAIL_DIFFICULTIES],
+                             filters=[normalize_difficulty],
+                             validators=[DataRequired()])
     duration_estimated = StringField('Duração Estimada', validators=[Optional(), Length(max=50)])
     description = TextAreaField('Descrição', validators=[Optional()])
     is_open = BooleanField('Aberta', default=True)
@@ -62,3 +63,12 @@ class AvailabilityPeriodForm(FlaskForm):
     end_date = DateField('Data de Término', validators=[DataRequired()], format='%Y-%m-%d')
 
 
+class BiodiversityItemForm(FlaskForm):
+    """Formulário para itens de biodiversidade (usado na importação em lote)"""
+    park_id = SelectField('Parque', coerce=int, validators=[DataRequired()])
+    name = StringField('Nome', validators=[DataRequired(), Length(max=200)])
+    type = SelectField('Tipo', choices=[
+        ('fauna', 'Fauna'),
+        ('flora', 'Flora')
+    ], validators=[DataRequired()])
+    description = TextAreaField('Descrição', validators=[Optional()])
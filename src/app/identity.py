@@ -0,0 +1,108 @@
+"""Identidade do administrador logado, sem consulta ao banco por página.
+
+No login, a sessão (cookie assinado pelo Flask) recebe o id, o nome e a
+``credential_version`` do administrador, com o instante de emissão.
+``credential_version`` muda quando a senha é trocada; remover o usuário
+também invalida a identidade.
+
+Para conferir a versão sem consultar o banco, ``IdentityCache`` guarda num
+LRU a versão atual de cada administrador, junto com a versão da tabela
+``admin_users`` no ``VersionRegistry`` quando ela foi lida. Qualquer escrita
+em ``admin_users`` muda essa versão e as entradas passam a ser relidas: na
+hora, neste processo; em até ``VERSION_RECHECK_SECONDS``, nos demais.
+Passado ``ADMIN_IDENTITY_TTL``, a identidade é conferida no banco mesmo
+assim e reemitida.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from flask import current_app, session
+from sqlalchemy import select
+
+from . import db
+from .models import AdminUser
+
+SESSION_KEY = 'admin'
+
+AdminIdentity = namedtuple('AdminIdentity', 'id name')
+
+# Versão da credencial lida do banco (None = usuário removido) e a versão
+# de ``admin_users`` no registro naquele momento
+_Entry = namedtuple('_Entry', 'stamp credential_version name')
+
+
+class IdentityCache:
+    """LRU admin_id -> versão atual da credencial."""
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('ADMIN_IDENTITY_CACHE_SIZE', self.max_entries)
+        self.ttl = app.config.get('ADMIN_IDENTITY_TTL', self.ttl)
+        app.extensions['admin_identities'] = self
+
+    def _load(self, admin_id, stamp):
+        row = db.session.execute(
+            select(AdminUser.credential_version, AdminUser.name).where(AdminUser.id == admin_id)
+        ).first()
+        entry = _Entry(stamp, row.credential_version, row.name) if row else _Entry(stamp, None, None)
+        with self._lock:
+            self._entries[admin_id] = entry
+            self._entries.move_to_end(admin_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def lookup(self, admin_id, force=False):
+        """Versão da credencial e nome atuais de ``admin_id`` (do LRU, se ainda valer)."""
+        stamp = current_app.extensions['data_versions'].get(AdminUser.__tablename__)
+        if not force:
+            with self._lock:
+                entry = self._entries.get(admin_id)
+                if entry is not None and entry.stamp == stamp:
+                    self._entries.move_to_end(admin_id)
+                    self.hits += 1
+                    return entry
+        self.misses += 1
+        return self._load(admin_id, stamp)
+
+
+def start_session(admin):
+    """Grava a identidade de ``admin`` na sessão (login)."""
+    session[SESSION_KEY] = {
+        'id': admin.id,
+        'name': admin.name,
+        'cv': admin.credential_version,
+        'iat': int(time.time()),
+    }
+
+
+def end_session():
+    session.pop(SESSION_KEY, None)
+
+
+def current_identity():
+    """``AdminIdentity`` do administrador logado, ou None se não há login válido.
+
+    Uma identidade revogada (senha trocada, usuário removido) é retirada da
+    sessão.
+    """
+    stored = session.get(SESSION_KEY)
+    if not stored:
+        return None
+    cache = current_app.extensions['admin_identities']
+    expired = time.time() - stored.get('iat', 0) >= cache.ttl
+    entry = cache.lookup(stored['id'], force=expired)
+    if entry.credential_version is None or entry.credential_version != stored.get('cv'):
+        session.pop(SESSION_KEY, None)
+        return None
+    if expired or entry.name != stored.get('name'):
+        session[SESSION_KEY] = dict(stored, name=entry.name, iat=int(time.time()))
+    return AdminIdentity(stored['id'], entry.name)
+
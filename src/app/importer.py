@@ -0,0 +1,260 @@
+"""Importação em lote de parques, trilhas, eventos, disponibilidade e biodiversidade.
+
+O arquivo (CSV com cabeçalho ou NDJSON, um objeto por linha) é lido em
+fluxo, sem carregá-lo inteiro na memória. Cada linha é validada pelo
+mesmo formulário usado no admin (``forms.py``); nas entidades ligadas a um
+parque, a coluna ``park`` traz o nome do parque, resolvido a partir de uma
+única consulta feita no início.
+
+As linhas válidas são gravadas em lotes: uma consulta descobre quais chaves
+naturais do lote já existem e, na mesma transação, um ``executemany`` insere
+as novas e outro atualiza as existentes. Como essas instruções não passam
+pelo flush do ORM, cada lote incrementa a versão da tabela na própria
+transação e, no final, os contadores do dashboard são recalculados.
+"""
+import csv
+import json
+import time
+from collections import namedtuple
+from datetime import datetime, time as dt_time
+
+from flask import current_app
+from sqlalchemy import insert, select, tuple_, update
+from werkzeug.datastructures import MultiDict
+from wtforms import BooleanField, DateTimeField
+
+from . import db
+from .counters import recount
+from .forms import ParkForm, TrailForm, EventForm, AvailabilityPeriodForm, BiodiversityItemForm
+from .models import (Park, Trail, Event, AvailabilityPeriod, BiodiversityItem, TRAIL_DIFFICULTIES,
+                     normalize_difficulty)
+from .signals import notify_change
+from .versions import TABLE_ENTITIES, bump
+
+# Entidade importável: modelo, formulário de validação e chave natural
+# (colunas que identificam uma linha já existente)
+ImportSpec = namedtuple('ImportSpec', 'model form key')
+
+IMPORT_SPECS = {
+    'parks': ImportSpec(Park, ParkForm, ('name',)),
+    'trails': ImportSpec(Trail, TrailForm, ('park_id', 'name')),
+    'events': ImportSpec(Event, EventForm, ('park_id', 'title', 'start_datetime')),
+    'availability': ImportSpec(AvailabilityPeriod, AvailabilityPeriodForm, ('park_id', 'season_name')),
+    'biodiversity': ImportSpec(BiodiversityItem, BiodiversityItemForm, ('park_id', 'name')),
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+_TRUE_VALUES = {'1', 'true', 'sim', 's', 'yes', 'y', 'on'}
+
+
+class ImportResult:
+    """Totais de uma importação."""
+
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.updated = 0
+        self.errors = []  # (linha, mensagem)
+        self.elapsed = 0.0
+
+    @property
+    def invalid(self):
+        return len(self.errors)
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+
+def read_rows(path, fmt=None):
+    """Gera (número da linha, dicionário) a partir de um arquivo CSV ou NDJSON."""
+    fmt = fmt or ('csv' if str(path).lower().endswith('.csv') else 'ndjson')
+    with open(path, newline='', encoding='utf-8') as fh:
+        if fmt == 'csv':
+            # Linha 1 é o cabeçalho
+            for number, row in enumerate(csv.DictReader(fh), start=2):
+                yield number, row
+        else:
+            for number, line in enumerate(fh, start=1):
+                if line.strip():
+                    try:
+                        yield number, json.loads(line)
+                    except ValueError:
+                        yield number, None
+
+
+def _form_value(field, value):
+    """Converte um valor do arquivo para o texto que o campo do formulário espera."""
+    if value is None:
+        return ''
+    if isinstance(field, BooleanField):
+        text = str(value).strip().lower()
+        if text in _TRUE_VALUES or value is True:
+            return 'y'
+        return 'false'
+    if isinstance(field, DateTimeField) and value:
+        # Aceita ISO 8601 completo além do formato do formulário
+        try:
+            return datetime.fromisoformat(str(value)).strftime(field.format[0])
+        except ValueError:
+            pass
+    return str(value).strip()
+
+
+def form_fields(spec):
+    """Campos do formulário da entidade (nome -> campo), exceto ``park_id``."""
+    prototype = spec.form(formdata=None, meta={'csrf': False})
+    return {name: field for name, field in prototype._fields.items() if name != 'park_id'}
+
+
+def validate_row(spec, fields, row, park_ids):
+    """Valida uma linha com o formulário da entidade.
+
+    Args:
+        spec: ``ImportSpec`` da entidade
+        fields: Resultado de ``form_fields(spec)``
+        row: Dicionário lido do arquivo
+        park_ids: Nome do parque -> id
+
+    Returns:
+        (valores prontos para o modelo, None) ou (None, mensagem de erro)
+    """
+    if not isinstance(row, dict):
+        return None, 'JSON inválido'
+    data = MultiDict()
+    for name, field in fields.items():
+        if name in row:
+            data[name] = _form_value(field, row[name])
+        elif isinstance(field, BooleanField):
+            data[name] = 'y'  # mesmo padrão dos modelos (aberta/ativo)
+        else:
+            # Como um campo vazio no formulário (evita cair no default do campo)
+            data[name] = ''
+
+    # O filtro do formulário troca uma dificuldade desconhecida por None, que
+    # seria relatada como campo obrigatório: aponta o valor recebido
+    difficulty = data.get('difficulty')
+    if difficulty and normalize_difficulty(difficulty) is None:
+        return None, f"dificuldade inválida: {difficulty!r} (use {'/'.join(TRAIL_DIFFICULTIES)})"
+
+    park_id = None
+    if 'park_id' in spec.key:
+        park_name = (row.get('park') or '').strip()
+        park_id = park_ids.get(park_name)
+        if park_id is None:
+            return None, f'parque desconhecido: {park_name!r}'
+        data['park_id'] = str(park_id)
+
+    form = spec.form(formdata=data, meta={'csrf': False})
+    if park_id is not None:
+        form.park_id.choices = [(park_id, '')]
+    if not form.validate():
+        return None, '; '.join(f'{name}: {" ".join(msgs)}' for name, msgs in form.errors.items())
+
+    columns = spec.model.__table__.columns
+    values = {}
+    for name, value in form.data.items():
+        if name not in columns:
+            continue
+        if isinstance(value, dt_time):
+            value = value.strftime('%H:%M')
+        elif value == '' and columns[name].nullable:
+            value = None
+        values[name] = value
+    return values, None
+
+
+def _write_batch(spec, batch, result, touched_parks, dry_run):
+    """Insere/atualiza um lote de valores validados (última ocorrência de cada chave vence)."""
+    model = spec.model
+    by_key = {tuple(values[k] for k in spec.key): values for values in batch}
+    key_columns = [getattr(model, k) for k in spec.key]
+    existing = {
+        tuple(row[1:]): row[0]
+        for row in db.session.execute(
+            select(model.id, *key_columns).where(tuple_(*key_columns).in_(list(by_key)))
+        )
+    }
+    inserts, updates = [], []
+    for key, values in by_key.items():
+        if key in existing:
+            updates.append(dict(values, id=existing[key]))
+        else:
+            inserts.append(values)
+        if 'park_id' in values:
+            touched_parks.add(values['park_id'])
+    result.inserted += len(inserts)
+    result.updated += len(updates)
+    if dry_run:
+        return
+    if inserts:
+        db.session.execute(insert(model), inserts)
+    if updates:
+        db.session.execute(update(model), updates)
+    # Versão incrementada na mesma transação do lote, como num flush do ORM
+    bumped = bump(db.session.connection(), model.__tablename__)
+    db.session.commit()
+    current_app.extensions['data_versions'].apply(bumped)
+
+
+def import_rows(entity, rows, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Importa ``rows`` (iterável de (linha, dicionário)) na entidade informada.
+
+    Deve ser chamado dentro de um contexto de aplicação.
+
+    Args:
+        entity: Chave de ``IMPORT_SPECS``
+        rows: Linhas numeradas, como as geradas por ``read_rows``
+        batch_size: Linhas por transação
+        dry_run: Só valida (e conta o que seria inserido/atualizado), sem gravar
+
+    Returns:
+        ``ImportResult``
+    """
+    spec = IMPORT_SPECS[entity]
+    result = ImportResult()
+    started = time.perf_counter()
+
+    # Uma única consulta resolve todos os nomes de parque
+    park_ids = {name: pid for pid, name in db.session.execute(select(Park.id, Park.name))}
+
+    fields = form_fields(spec)
+    touched_parks = set()
+    batch = []
+    for number, row in rows:
+        result.read += 1
+        values, error = validate_row(spec, fields, row, park_ids)
+        if error:
+            result.errors.append((number, error))
+            continue
+        batch.append(values)
+        if len(batch) >= batch_size:
+            _write_batch(spec, batch, result, touched_parks, dry_run)
+            batch = []
+    if batch:
+        _write_batch(spec, batch, result, touched_parks, dry_run)
+
+    if not dry_run and (result.inserted or result.updated):
+        recount(db.session.connection())
+        db.session.commit()
+        notify_change(TABLE_ENTITIES[spec.model.__tablename__], *touched_parks)
+    else:
+        db.session.rollback()
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def import_file(app, entity, path, fmt=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Importa um arquivo e imprime o resumo (com linhas/s)."""
+    with app.app_context():
+        result = import_rows(entity, read_rows(path, fmt), batch_size=batch_size, dry_run=dry_run)
+    for number, message in result.errors[:20]:
+        print(f"linha {number}: {message}")
+    if result.invalid > 20:
+        print(f"... e mais {result.invalid - 20} linhas inválidas")
+    action = 'seriam inseridas' if dry_run else 'inseridas'
+    print(f"{result.read} linhas lidas em {result.elapsed:.2f}s ({result.rows_per_second:.0f} linhas/s): "
+          f"{result.inserted} {action}, {result.updated} atualizadas, {result.invalid} inválidas.")
+    return result
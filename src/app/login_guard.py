@@ -0,0 +1,147 @@
+"""Proteção do login do admin contra rajadas de tentativas.
+
+A verificação bcrypt é cara de propósito. Feita direto na thread da
+requisição, uma rajada de logins ocupa todos os workers e trava o site
+público. Aqui ela roda num executor com poucas threads
+(``LOGIN_HASH_WORKERS``) e uma fila curta (``LOGIN_HASH_QUEUE``). Quando a
+fila está cheia, o login responde 503 na hora em vez de esperar.
+
+Antes de verificar, ``AttemptThrottle`` recusa (429) IPs e e-mails com
+falhas demais na janela ``LOGIN_WINDOW_SECONDS``.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class LoginBusy(Exception):
+    """Todas as vagas de verificação de senha estão ocupadas."""
+
+
+class AttemptThrottle:
+    """Falhas recentes por chave (IP ou e-mail) numa janela deslizante."""
+
+    def __init__(self, window_seconds=300, max_keys=10000):
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._failures = OrderedDict()  # chave -> deque de instantes
+
+    def _recent(self, key, now):
+        attempts = self._failures.get(key)
+        if attempts is None:
+            return None
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+        if not attempts:
+            del self._failures[key]
+            return None
+        return attempts
+
+    def retry_after(self, limits):
+        """Segundos até liberar a chave mais restrita, ou 0 se nenhuma passou do limite.
+
+        Args:
+            limits: Pares (chave, máximo de falhas)
+        """
+        now = time.monotonic()
+        wait = 0
+        with self._lock:
+            for key, limit in limits:
+                attempts = self._recent(key, now)
+                if attempts and len(attempts) >= limit:
+                    wait = max(wait, int(attempts[-limit] + self.window - now) + 1)
+        return wait
+
+    def record_failure(self, *keys):
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                attempts = self._failures.get(key)
+                if attempts is None:
+                    attempts = self._failures[key] = deque()
+                attempts.append(now)
+                self._failures.move_to_end(key)
+            while len(self._failures) > self.max_keys:
+                self._failures.popitem(last=False)
+
+    def reset(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._failures.pop(key, None)
+
+
+class LoginGuard:
+    """Executor limitado para o bcrypt e limites de tentativas do login."""
+
+    def __init__(self, workers=2, queue=8, timeout=10.0, window_seconds=300,
+                 max_failures_per_ip=20, max_failures_per_email=5, enabled=True):
+        self.enabled = enabled
+        self.workers = workers
+        self.queue = queue
+        self.timeout = timeout
+        self.max_failures_per_ip = max_failures_per_ip
+        self.max_failures_per_email = max_failures_per_email
+        self.throttle = AttemptThrottle(window_seconds)
+        self.rejected = 0
+        self._start()
+
+    def _start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='login-bcrypt')
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue)
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config.get('LOGIN_GUARD_ENABLED', self.enabled)
+        self.workers = config.get('LOGIN_HASH_WORKERS', self.workers)
+        self.queue = config.get('LOGIN_HASH_QUEUE', self.queue)
+        self.timeout = config.get('LOGIN_HASH_TIMEOUT', self.timeout)
+        self.max_failures_per_ip = config.get('LOGIN_MAX_FAILURES_PER_IP', self.max_failures_per_ip)
+        self.max_failures_per_email = config.get('LOGIN_MAX_FAILURES_PER_EMAIL', self.max_failures_per_email)
+        self.throttle.window = config.get('LOGIN_WINDOW_SECONDS', self.throttle.window)
+        self._executor.shutdown(wait=False)
+        self._start()
+        app.extensions['login_guard'] = self
+
+    @staticmethod
+    def _keys(ip, email):
+        return f'ip:{ip}', f'email:{(email or "").strip().lower()}'
+
+    def retry_after(self, ip, email):
+        """Segundos que o cliente deve esperar (0 se pode tentar agora)."""
+        if not self.enabled:
+            return 0
+        ip_key, email_key = self._keys(ip, email)
+        return self.throttle.retry_after([(ip_key, self.max_failures_per_ip),
+                                          (email_key, self.max_failures_per_email)])
+
+    def record_failure(self, ip, email):
+        if self.enabled:
+            self.throttle.record_failure(*self._keys(ip, email))
+
+    def record_success(self, ip, email):
+        if self.enabled:
+            self.throttle.reset(self._keys(ip, email)[1])
+
+    def verify(self, check, *args):
+        """Executa ``check(*args)`` (a verificação da senha) no executor limitado.
+
+        Raises:
+            LoginBusy: sem vaga no executor, ou a verificação não terminou a tempo
+        """
+        if not self.enabled:
+            return check(*args)
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise LoginBusy()
+        try:
+            future = self._executor.submit(check, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise LoginBusy()
@@ -0,0 +1,138 @@
+"""Instrumentação de SQL por requisição.
+
+Registra, para cada requisição, o número de consultas, o tempo total gasto no
+banco e a instrução mais lenta (via eventos do engine do SQLAlchemy). Os
+valores vão para o cabeçalho ``Server-Timing`` e são agregados por endpoint
+para a página ``/admin/metrics``.
+"""
+import threading
+import time
+from collections import deque
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+
+def percentile(sorted_values, pct):
+    """Percentil pelo método nearest-rank sobre uma lista já ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class EndpointStats:
+    """Janela deslizante de medições de um endpoint."""
+
+    def __init__(self, window):
+        self.latencies = deque(maxlen=window)
+        self.query_counts = deque(maxlen=window)
+        self.db_times = deque(maxlen=window)
+        self.requests = 0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+
+    def add(self, latency_ms, query_count, db_ms, slowest_ms, slowest_statement):
+        self.requests += 1
+        self.latencies.append(latency_ms)
+        self.query_counts.append(query_count)
+        self.db_times.append(db_ms)
+        if slowest_statement and slowest_ms >= self.slowest_ms:
+            self.slowest_ms = slowest_ms
+            self.slowest_statement = slowest_statement
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        count = len(self.query_counts) or 1
+        return {
+            'requests': self.requests,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'queries_per_request': sum(self.query_counts) / count,
+            'db_ms_per_request': sum(self.db_times) / count,
+            'slowest_ms': self.slowest_ms,
+            'slowest_statement': self.slowest_statement,
+        }
+
+
+class RequestMetrics:
+    """Coletor de métricas de SQL por requisição, agregadas por endpoint."""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def init_app(self, app, engine):
+        self.window = app.config.get('METRICS_WINDOW', self.window)
+        app.extensions['request_metrics'] = self
+        self.instrument(engine)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def instrument(self, engine):
+        """Passa a medir as instruções de ``engine`` (ex.: o engine assíncrono do modo ASGI)."""
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    # ----- eventos do engine -----
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and 'sql_stats' in g:
+            conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('query_start')
+        if not starts or not has_request_context() or 'sql_stats' not in g:
+            return
+        elapsed = (time.perf_counter() - starts.pop()) * 1000
+        stats = g.sql_stats
+        stats['count'] += 1
+        stats['db_ms'] += elapsed
+        if elapsed >= stats['slowest_ms']:
+            stats['slowest_ms'] = elapsed
+            stats['slowest_statement'] = ' '.join(statement.split())
+
+    # ----- ciclo da requisição -----
+
+    @staticmethod
+    def _start_request():
+        g.sql_stats = {'count': 0, 'db_ms': 0.0, 'slowest_ms': 0.0, 'slowest_statement': None}
+        g.request_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        stats = g.pop('sql_stats', None)
+        started = g.pop('request_started', None)
+        if stats is None or started is None:
+            return response
+        total_ms = (time.perf_counter() - started) * 1000
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats["db_ms"]:.2f};desc="{stats["count"]} queries", '
+            f'db-slowest;dur={stats["slowest_ms"]:.2f}, app;dur={total_ms:.2f}'
+        )
+        self.record(request.endpoint or 'unknown', total_ms, stats['count'], stats['db_ms'],
+                    stats['slowest_ms'], stats['slowest_statement'])
+        return response
+
+    # ----- agregação -----
+
+    def record(self, endpoint, latency_ms, query_count, db_ms, slowest_ms=0.0, slowest_statement=None):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats(self.window)
+            stats.add(latency_ms, query_count, db_ms, slowest_ms, slowest_statement)
+
+    def snapshot(self):
+        """Resumo por endpoint, ordenado pelo maior tempo total de banco (por requisição × requisições)."""
+        with self._lock:
+            rows = [dict(endpoint=name, **stats.summary()) for name, stats in self._endpoints.items()]
+        return sorted(rows, key=lambda r: r['db_ms_per_request'] * r['requests'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
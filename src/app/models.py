@@ -1,6 +1,15 @@
+import unicodedata
 from datetime import datetime, date
+from flask import current_app, has_app_context
 from . import db
-from passlib.hash import bcrypt
+
+
+def password_hasher():
+    """bcrypt com o custo de ``BCRYPT_ROUNDS`` (padrão do passlib fora da aplicação)"""
+    # Importado só no primeiro uso: processos que não lidam com senhas não pagam pelo passlib
+    from passlib.hash import bcrypt
+    rounds = current_app.config.get('BCRYPT_ROUNDS') if has_app_context() else None
+    return bcrypt.using(rounds=rounds) if rounds else bcrypt
 
 
 class AdminUser(db.Model):
@@ -11,15 +20,27 @@ class AdminUser(db.Model):
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
+    # Muda a cada troca de senha; sessões com a versão antiga deixam de valer
+    credential_version = db.Column(db.Integer, nullable=False, default=1, server_default=db.text('1'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
     def set_password(self, plain_password: str):
-        """Define a senha do usuário usando bcrypt"""
-        self.password_hash = bcrypt.hash(plain_password)
+        """Define a senha do usuário usando bcrypt (e revoga as sessões abertas)"""
+        if self.password_hash is not None:
+            self.credential_version = (self.credential_version or 1) + 1
+        self.password_hash = password_hasher().hash(plain_password)
+    
+    def upgrade_password_hash(self, plain_password: str):
+        """Refaz o hash da mesma senha com o custo atual, sem revogar sessões"""
+        self.password_hash = password_hasher().hash(plain_password)
     
     def check_password(self, plain_password: str) -> bool:
         """Verifica se a senha fornecida corresponde à senha hash"""
-        return bcrypt.verify(plain_password, self.password_hash)
+        return password_hasher().verify(plain_password, self.password_hash)
+    
+    def password_needs_rehash(self) -> bool:
+        """Indica se o hash foi gerado com um custo diferente de ``BCRYPT_ROUNDS``"""
+        return password_hasher().needs_update(self.password_hash)
     
     def __repr__(self):
         return f'<AdminUser {self.email}>'
@@ -28,6 +49,9 @@ class AdminUser(db.Model):
 class Park(db.Model):
     """Modelo para parques"""
     __tablename__ = 'parks'
+    __table_args__ = (
+        db.Index('ix_parks_name', 'name'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -36,24 +60,57 @@ class Park(db.Model):
     location = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
-    # Relacionamentos
-    trails = db.relationship('Trail', backref='park', lazy='dynamic', cascade='all, delete-orphan')
-    events = db.relationship('Event', backref='park', lazy='dynamic', cascade='all, delete-orphan')
-    availability_periods = db.relationship('AvailabilityPeriod', backref='park', lazy='dynamic', cascade='all, delete-orphan')
-    biodiversity_items = db.relationship('BiodiversityItem', backref='park', lazy='dynamic', cascade='all, delete-orphan')
+    # Relacionamentos: o banco apaga os filhos (ON DELETE CASCADE); passive_deletes
+    # evita que o ORM os carregue e exclua um a um ao excluir o parque
+    trails = db.relationship('Trail', backref='park', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
+    events = db.relationship('Event', backref='park', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
+    availability_periods = db.relationship('AvailabilityPeriod', backref='park', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
+    biodiversity_items = db.relationship('BiodiversityItem', backref='park', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
+    archived_events = db.relationship('EventArchive', backref='park', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
     
     def __repr__(self):
         return f'<Park {self.name}>'
 
 
+# Códigos gravados em Trail.difficulty (sem acento) e seus rótulos
+TRAIL_DIFFICULTIES = ('facil', 'moderada', 'dificil')
+DIFFICULTY_LABELS = {'facil': 'Fácil', 'moderada': 'Moderada', 'dificil': 'Difícil'}
+
+
+def normalize_difficulty(value):
+    """Converte uma dificuldade digitada no código ('Fácil' -> 'facil'); valores desconhecidos viram None"""
+    if not value:
+        return None
+    folded = unicodedata.normalize('NFKD', str(value).strip().lower())
+    code = ''.join(ch for ch in folded if not unicodedata.combining(ch))
+    return code if code in TRAIL_DIFFICULTIES else None
+
+
+def difficulty_label(code):
+    """Rótulo de exibição de um código de dificuldade"""
+    return DIFFICULTY_LABELS.get(code, code)
+
+
 class Trail(db.Model):
     """Modelo para trilhas"""
     __tablename__ = 'trails'
+    __table_args__ = (
+        # Listagem pública: is_open = 1 ordenado por nome
+        db.Index('ix_trails_open_name', 'is_open', 'name'),
+        # Detalhe do parque e filtro por parque: park_id = ? ordenado por nome
+        db.Index('ix_trails_park_name', 'park_id', 'name'),
+        # Listagem admin paginada por (nome, id)
+        db.Index('ix_trails_name', 'name'),
+        # Filtro público por dificuldade: is_open = 1 AND difficulty = ? ordenado por nome
+        db.Index('ix_trails_open_difficulty_name', 'is_open', 'difficulty', 'name'),
+        # Contagens do filtro (GROUP BY parque, dificuldade, status) só pelo índice
+        db.Index('ix_trails_facets', 'park_id', 'difficulty', 'is_open'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    park_id = db.Column(db.Integer, db.ForeignKey('parks.id'), nullable=False)
+    park_id = db.Column(db.Integer, db.ForeignKey('parks.id', ondelete='CASCADE'), nullable=False)
     name = db.Column(db.String(200), nullable=False)
-    difficulty = db.Column(db.String(50), nullable=False)  # fácil, moderada, difícil
+    difficulty = db.Column(db.String(50), nullable=False)  # código: facil, moderada, dificil
     duration_estimated = db.Column(db.String(50))  # ex: "2h", "4h"
     description = db.Column(db.Text)
     is_open = db.Column(db.Boolean, default=True, nullable=False)
@@ -65,9 +122,21 @@ class Trail(db.Model):
 class Event(db.Model):
     """Modelo para eventos"""
     __tablename__ = 'events'
+    __table_args__ = (
+        # Próximos eventos: is_active = 1 AND start_datetime >= agora
+        db.Index('ix_events_active_start', 'is_active', 'start_datetime'),
+        # Mesma consulta filtrada por parque
+        db.Index('ix_events_park_active_start', 'park_id', 'is_active', 'start_datetime'),
+        # Listagem admin paginada por (início, id)
+        db.Index('ix_events_start', 'start_datetime'),
+        # Eventos encerrados, a mover para events_archive
+        db.Index('ix_events_end', 'end_datetime'),
+        # Ids nunca reutilizados: o id de um evento arquivado não volta para outro
+        {'sqlite_autoincrement': True},
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    park_id = db.Column(db.Integer, db.ForeignKey('parks.id'), nullable=False)
+    park_id = db.Column(db.Integer, db.ForeignKey('parks.id', ondelete='CASCADE'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     start_datetime = db.Column(db.DateTime, nullable=False)
@@ -78,12 +147,43 @@ class Event(db.Model):
         return f'<Event {self.title}>'
 
 
+class EventArchive(db.Model):
+    """Eventos encerrados, movidos de ``events`` pelo comando archive-events (ver ``archive.py``).
+
+    Mantém o id original, então um evento tem o mesmo id nas duas tabelas.
+    """
+    __tablename__ = 'events_archive'
+    __table_args__ = (
+        # Listagem admin paginada por (início, id)
+        db.Index('ix_events_archive_start', 'start_datetime'),
+        db.Index('ix_events_archive_park', 'park_id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    park_id = db.Column(db.Integer, db.ForeignKey('parks.id', ondelete='CASCADE'), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    start_datetime = db.Column(db.DateTime, nullable=False)
+    end_datetime = db.Column(db.DateTime, nullable=False)
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<EventArchive {self.title}>'
+
+
 class AvailabilityPeriod(db.Model):
     """Modelo para períodos de disponibilidade dos parques"""
     __tablename__ = 'availability_periods'
+    __table_args__ = (
+        # Período vigente: park_id = ? AND start_date <= hoje AND end_date >= hoje
+        db.Index('ix_availability_park_dates', 'park_id', 'start_date', 'end_date'),
+        # Listagem admin paginada por (início, id)
+        db.Index('ix_availability_start', 'start_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    park_id = db.Column(db.Integer, db.ForeignKey('parks.id'), nullable=False)
+    park_id = db.Column(db.Integer, db.ForeignKey('parks.id', ondelete='CASCADE'), nullable=False)
     season_name = db.Column(db.String(100), nullable=False)  # ex: "Alta Temporada Verão"
     open_time = db.Column(db.String(10), nullable=False)  # ex: "08:00"
     close_time = db.Column(db.String(10), nullable=False)  # ex: "17:00"
@@ -97,12 +197,43 @@ class AvailabilityPeriod(db.Model):
 class BiodiversityItem(db.Model):
     """Modelo para itens de biodiversidade (fauna e flora)"""
     __tablename__ = 'biodiversity_items'
+    __table_args__ = (
+        # Detalhe do parque: park_id = ? ordenado por tipo e nome
+        db.Index('ix_biodiversity_park_type_name', 'park_id', 'type', 'name'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    park_id = db.Column(db.Integer, db.ForeignKey('parks.id'), nullable=False)
+    park_id = db.Column(db.Integer, db.ForeignKey('parks.id', ondelete='CASCADE'), nullable=False)
     name = db.Column(db.String(200), nullable=False)
     type = db.Column(db.String(50), nullable=False)  # fauna, flora
     description = db.Column(db.Text)
     
     def __repr__(self):
         return f'<BiodiversityItem {self.name} ({self.type})>'
+
+
+class DataVersion(db.Model):
+    """Versão de cada tabela, incrementada a cada escrita (ver ``versions.py``).
+
+    Permite que processos diferentes saibam quando seus caches em memória
+    ficaram desatualizados.
+    """
+    __tablename__ = 'data_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)  # nome da tabela
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.name}={self.version}>'
+
+
+class StatCounter(db.Model):
+    """Contadores mantidos pelas escritas do ORM para o dashboard (ver ``counters.py``)"""
+    __tablename__ = 'stat_counters'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<StatCounter {self.name}={self.value}>'
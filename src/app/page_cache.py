@@ -0,0 +1,180 @@
+"""Cache em memória das páginas públicas renderizadas.
+
+O conteúdo público só muda quando um administrador salva algo, então o HTML
+renderizado é guardado num LRU limitado com TTL, chaveado pelo endpoint e
+pelos argumentos normalizados (``park_id``, ``difficulty``). As rotas
+administrativas invalidam apenas as páginas afetadas por meio do sinal
+``data_changed``.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, request, session, make_response
+
+from .models import normalize_difficulty
+from .signals import data_changed
+
+# Para cada entidade alterada: endpoint -> True se a invalidação é restrita
+# aos parques afetados (páginas filtradas por outro parque são mantidas).
+INVALIDATION_RULES = {
+    'park': {
+        'public.index': False,
+        'public.parks_list': False,
+        'public.trails_list': False,   # nome do parque aparece no filtro
+        'public.events_list': False,
+        'public.park_detail': True,
+    },
+    'trail': {
+        'public.index': False,
+        'public.trails_list': False,   # contagens por parque aparecem em todo filtro
+        'public.park_detail': True,
+    },
+    'event': {
+        'public.index': False,
+        'public.events_list': True,
+        'public.park_detail': True,
+    },
+    'availability': {
+        'public.parks_list': False,    # selo "aberto agora"
+        'public.park_detail': True,
+    },
+    'biodiversity': {
+        'public.park_detail': True,
+    },
+}
+
+
+def page_key():
+    """Chave de cache da requisição atual: (endpoint, park_id, difficulty, after, before)."""
+    park_id = (request.view_args or {}).get('park_id')
+    if park_id is None:
+        park_id = request.args.get('park_id', type=int) or None
+    return (request.endpoint, park_id, normalize_difficulty(request.args.get('difficulty')),
+            request.args.get('after') or None, request.args.get('before') or None)
+
+
+class PageCache:
+    """LRU limitado com TTL e contadores de acerto, falha e remoção."""
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('PAGE_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('PAGE_CACHE_TTL', self.ttl)
+        app.extensions['page_cache'] = self
+        data_changed.connect(self._on_data_changed, sender=app)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            body, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def set(self, key, body, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (body, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, entity, park_ids=()):
+        """Remove as páginas afetadas por uma mudança em ``entity``."""
+        rules = INVALIDATION_RULES.get(entity)
+        if rules is None:
+            return self.clear()
+        park_ids = set(park_ids)
+        with self._lock:
+            stale = [
+                key for key in self._entries
+                if key[0] in rules and (
+                    not rules[key[0]] or not park_ids or key[1] is None or key[1] in park_ids
+                )
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self.invalidations += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    def _on_data_changed(self, sender, entity=None, park_ids=()):
+        self.invalidate(entity, park_ids)
+
+
+def _has_pending_flashes():
+    # Só consulta a sessão quando há cookie, para não marcá-la como acessada
+    if current_app.config['SESSION_COOKIE_NAME'] not in request.cookies:
+        return False
+    return '_flashes' in session
+
+
+def cached_page(view):
+    """Serve a view pública a partir do ``PageCache`` quando possível.
+
+    A view pode encurtar o TTL da página definindo ``g.page_cache_ttl``
+    (ex.: até o próximo horário de abertura/fechamento).
+    """
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        cache = current_app.extensions.get('page_cache')
+        if cache is None or request.method != 'GET' or _has_pending_flashes():
+            return view(*args, **kwargs)
+        # Relê as versões (no máximo a cada VERSION_RECHECK_SECONDS) para que
+        # escritas de outros processos invalidem as páginas deste
+        versions = current_app.extensions.get('data_versions')
+        if versions is not None:
+            versions.snapshot()
+        key = page_key()
+        body = cache.get(key)
+        if body is not None:
+            response = make_response(body)
+            response.headers['X-Page-Cache'] = 'HIT'
+            return response
+        rv = view(*args, **kwargs)
+        ttl = g.pop('page_cache_ttl', None)
+        if isinstance(rv, str):
+            cache.set(key, rv, ttl=None if ttl is None else min(ttl, cache.ttl))
+            response = make_response(rv)
+            response.headers['X-Page-Cache'] = 'MISS'
+            return response
+        return rv
+    return decorated_function
@@ -0,0 +1,136 @@
+"""Paginação por cursor (keyset) para as listagens.
+
+Em vez de ``OFFSET``, cada página guarda a chave de ordenação do primeiro e
+do último item (ex.: ``(name, id)``) num cursor opaco. A página seguinte é
+buscada com ``WHERE (name, id) > (:name, :id)``, que o SQLite resolve pelo
+índice — páginas profundas custam o mesmo que a primeira.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from flask import abort, request
+from sqlalchemy import tuple_
+
+
+class KeysetPage:
+    """Uma página de resultados com os cursores para a anterior e a próxima."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _from_json(value, python_type):
+    if value is None:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values):
+    """Codifica a chave de ordenação de um item num cursor para a URL."""
+    raw = json.dumps([_to_json(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, columns):
+    """Decodifica um cursor; ``ValueError`` se ele não corresponder às colunas."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise ValueError('cursor inválido') from exc
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('cursor inválido')
+    try:
+        return tuple(_from_json(v, col.type.python_type) for v, col in zip(values, columns))
+    except (ValueError, TypeError) as exc:
+        raise ValueError('cursor inválido') from exc
+
+
+def _row_key(row, columns):
+    return tuple(getattr(row, col.key) for col in columns)
+
+
+def keyset_paginate(query, columns, size, after=None, before=None, descending=False):
+    """Pagina ``query`` pela chave ``columns`` (a última deve ser única, ex.: id).
+
+    Args:
+        query: Query do ORM já filtrada (sem ``order_by``)
+        columns: Colunas da chave de ordenação
+        size: Itens por página
+        after: Cursor do último item da página anterior (avançar)
+        before: Cursor do primeiro item da página seguinte (voltar)
+        descending: Ordena do maior para o menor
+
+    Returns:
+        ``KeysetPage``
+    """
+    key = tuple_(*columns)
+    forward = [c.desc() if descending else c.asc() for c in columns]
+    backward = [c.asc() if descending else c.desc() for c in columns]
+
+    if before is not None:
+        values = decode_cursor(before, columns)
+        condition = key > tuple_(*values) if descending else key < tuple_(*values)
+        rows = query.filter(condition).order_by(*backward).limit(size + 1).all()
+        has_more = len(rows) > size
+        rows = rows[:size]
+        rows.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        if after is not None:
+            values = decode_cursor(after, columns)
+            condition = key < tuple_(*values) if descending else key > tuple_(*values)
+            query = query.filter(condition)
+        rows = query.order_by(*forward).limit(size + 1).all()
+        has_next = len(rows) > size
+        rows = rows[:size]
+        has_prev = after is not None
+
+    if not rows:
+        return KeysetPage(rows)
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(_row_key(rows[-1], columns)) if has_next else None,
+        prev_cursor=encode_cursor(_row_key(rows[0], columns)) if has_prev else None,
+    )
+
+
+def paginate_request(query, columns, size, descending=False):
+    """``keyset_paginate`` com os cursores ``after``/``before`` da query string (400 se inválidos)."""
+    try:
+        return keyset_paginate(query, columns, size,
+                               after=request.args.get('after') or None,
+                               before=request.args.get('before') or None,
+                               descending=descending)
+    except ValueError:
+        abort(400)
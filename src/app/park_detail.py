@@ -0,0 +1,197 @@
+"""Dados da página de detalhe do parque, numa consulta e em cache.
+
+``load_park_detail`` busca o parque, as trilhas, os próximos eventos, os
+dez primeiros itens de biodiversidade e os períodos de funcionamento de
+hoje num único SELECT: cada lista vem de uma subconsulta escalar agregada
+com ``json_group_array`` (JSON1 do SQLite). O resultado é um ``ParkDetail``
+imutável (tuplas de namedtuples).
+
+``ParkDetailCache`` guarda um ``ParkDetail`` por parque até que uma escrita
+toque aquele parque (sinal ``data_changed``) ou até ``next_change``: o
+início do próximo evento listado ou a virada do dia no fuso dos parques,
+quando o período vigente pode mudar.
+"""
+import json
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, time, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import func, select, true
+
+from . import db
+from . import availability
+from .models import Park, Trail, Event, BiodiversityItem
+from .signals import data_changed
+
+BIODIVERSITY_LIMIT = 10
+
+ParkInfo = namedtuple('ParkInfo', 'id name type location description')
+TrailInfo = namedtuple('TrailInfo', 'id name difficulty duration_estimated description')
+EventInfo = namedtuple('EventInfo', 'id title description start_datetime end_datetime')
+BiodiversityInfo = namedtuple('BiodiversityInfo', 'id name type description')
+
+# next_change: instante (UTC, sem tzinfo) em que o conteúdo muda sem escritas
+ParkDetail = namedtuple('ParkDetail', 'park trails upcoming_events biodiversity_items '
+                                      'current_availability next_change')
+
+
+def _json_rows(query):
+    """Linhas de ``query`` como uma única coluna JSON (lista de listas)."""
+    rows = query.subquery()
+    return select(func.json_group_array(func.json_array(*rows.c))).scalar_subquery()
+
+
+def _datetime(value):
+    return datetime.fromisoformat(value)
+
+
+def _next_local_midnight_utc(local_now):
+    """Próxima meia-noite no fuso dos parques, em UTC sem tzinfo."""
+    midnight = datetime.combine(local_now.date() + timedelta(days=1), time(), availability.park_timezone())
+    return midnight.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def load_park_detail(park_id, now=None, local_now=None):
+    """Dados da página de detalhe de ``park_id`` num único round trip.
+
+    Args:
+        now: Instante (UTC) a partir do qual um evento é "próximo"
+        local_now: Data/hora no fuso dos parques (período vigente)
+
+    Returns:
+        ``ParkDetail``, ou None se o parque não existe
+    """
+    now = now or datetime.utcnow()
+    local_now = local_now or availability.local_now()
+    today = local_now.date()
+    trails = _json_rows(
+        select(Trail.id, Trail.name, Trail.difficulty, Trail.duration_estimated, Trail.description)
+        .where(Trail.park_id == park_id)
+    )
+    events = _json_rows(
+        select(Event.id, Event.title, Event.description, Event.start_datetime, Event.end_datetime)
+        .where(Event.park_id == park_id, Event.is_active == true(), Event.start_datetime >= now)
+    )
+    biodiversity = _json_rows(
+        select(BiodiversityItem.id, BiodiversityItem.name, BiodiversityItem.type, BiodiversityItem.description)
+        .where(BiodiversityItem.park_id == park_id)
+        .order_by(BiodiversityItem.type, BiodiversityItem.name, BiodiversityItem.id)
+        .limit(BIODIVERSITY_LIMIT)
+    )
+    periods = _json_rows(availability.periods_query(today, today, park_id))
+    row = db.session.execute(
+        select(Park.id, Park.name, Park.type, Park.location, Park.description,
+               trails.label('trails'), events.label('events'),
+               biodiversity.label('biodiversity'), periods.label('periods'))
+        .where(Park.id == park_id)
+    ).first()
+    if row is None:
+        return None
+
+    # A ordem dentro do json_group_array não é garantida: ordena aqui
+    trail_list = sorted((TrailInfo(*values) for values in json.loads(row.trails)),
+                        key=lambda t: (t.name, t.id))
+    event_list = sorted((EventInfo(id, title, description, _datetime(start), _datetime(end))
+                         for id, title, description, start, end in json.loads(row.events)),
+                        key=lambda e: (e.start_datetime, e.id))
+    biodiversity_list = sorted((BiodiversityInfo(*values) for values in json.loads(row.biodiversity)),
+                               key=lambda b: (b.type, b.name, b.id))
+    hours = [
+        availability.to_hours(id, pid, season, opens, closes, date.fromisoformat(start), date.fromisoformat(end))
+        for id, pid, season, opens, closes, start, end in json.loads(row.periods)
+    ]
+    segments = availability.sweep([h for h in hours if h.end_date >= today], today, today).get(park_id, [])
+
+    next_change = _next_local_midnight_utc(local_now)
+    if event_list:
+        next_change = min(next_change, event_list[0].start_datetime)
+    return ParkDetail(
+        park=ParkInfo(row.id, row.name, row.type, row.location, row.description),
+        trails=tuple(trail_list),
+        upcoming_events=tuple(event_list),
+        biodiversity_items=tuple(biodiversity_list),
+        current_availability=availability.hours_on(segments, today),
+        next_change=next_change,
+    )
+
+
+class ParkDetailCache:
+    """LRU park_id -> ``ParkDetail``, invalidado por parque."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Incrementado a cada invalidação: uma carga iniciada antes dela não é guardada
+        self._generation = 0
+        self.hits = self.misses = self.expirations = self.invalidations = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('PARK_DETAIL_CACHE_MAX_ENTRIES', self.max_entries)
+        app.extensions['park_detail_cache'] = self
+        data_changed.connect(self._on_data_changed, sender=app)
+
+    def get(self, park_id):
+        """``ParkDetail`` de ``park_id`` (do cache, se ainda valer), ou None se não existe."""
+        # Relê as versões (no máximo a cada VERSION_RECHECK_SECONDS): escritas de
+        # outros processos chegam como data_changed e limpam o cache
+        current_app.extensions['data_versions'].snapshot()
+        now = datetime.utcnow()
+        with self._lock:
+            detail = self._entries.get(park_id)
+            if detail is not None:
+                if detail.next_change > now:
+                    self._entries.move_to_end(park_id)
+                    self.hits += 1
+                    return detail
+                del self._entries[park_id]
+                self.expirations += 1
+            self.misses += 1
+            generation = self._generation
+        detail = load_park_detail(park_id, now)
+        if detail is None:
+            return None
+        with self._lock:
+            if generation == self._generation:
+                self._entries[park_id] = detail
+                self._entries.move_to_end(park_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return detail
+
+    def invalidate(self, park_ids=()):
+        """Remove os parques informados (todos, se nenhum)."""
+        with self._lock:
+            self._generation += 1
+            if park_ids:
+                stale = [pid for pid in park_ids if pid in self._entries]
+            else:
+                stale = list(self._entries)
+            for pid in stale:
+                del self._entries[pid]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    def _on_data_changed(self, sender, entity=None, park_ids=()):
+        # Todas as entidades aparecem na página do parque
+        self.invalidate(park_ids)
+
+
+def get_park_detail(park_id):
+    """``ParkDetail`` de ``park_id`` pelo cache da aplicação, se habilitado."""
+    cache = current_app.extensions.get('park_detail_cache')
+    if cache is None:
+        return load_park_detail(park_id)
+    return cache.get(park_id)
@@ -1,18 +1,59 @@
 from functools import wraps
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, abort
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, current_app, Response, stream_with_context, make_response
 from datetime import datetime, date, time
+from sqlalchemy.orm import joinedload
 from . import db
 from .models import AdminUser, Park, Trail, Event, AvailabilityPeriod
-from .forms import LoginForm, ParkForm, TrailForm, EventForm, AvailabilityPeriodForm
+from .signals import notify_change
+from .catalog import park_catalog
+from .counters import dashboard_stats
+from .pagination import paginate_request
+from .archive import ADMIN_SCOPES, admin_events_query
+from . import bulk
+from .exporter import EXPORT_ENTITIES, CONTENT_TYPES, iter_export
+from .database import retry_on_busy
+from .login_guard import LoginBusy
+from .identity import current_identity, start_session, end_session
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 
+@bp.context_processor
+def inject_csrf_token():
+    """Disponibiliza o token CSRF só nos templates da área admin.
+
+    Gerar o token cria a sessão (cookie); nas páginas públicas isso impediria
+    o cache compartilhado do proxy.
+    """
+    from flask_wtf.csrf import generate_csrf
+    return dict(csrf_token=generate_csrf)
+
+
+def _bulk_selection():
+    """Seleção de uma operação em lote: ids marcados ou, sem eles, o parque escolhido."""
+    ids = request.form.getlist('ids', type=int)
+    if ids:
+        return {'ids': ids}
+    park_id = request.form.get('park_id', type=int)
+    return {'park_id': park_id} if park_id else {}
+
+
+def _form_date(name):
+    """Data (AAAA-MM-DD) opcional do formulário; 400 se inválida."""
+    value = request.form.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        abort(400)
+
+
 def login_required(f):
     """Decorador para exigir login em rotas administrativas"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'admin_id' not in session:
+        if current_identity() is None:
             flash('Você precisa fazer login para acessar esta área.', 'warning')
             return redirect(url_for('admin.login'))
         return f(*args, **kwargs)
@@ -20,39 +61,64 @@ def login_required(f):
 
 
 def get_current_admin():
-    """Retorna o admin atual da sessão"""
-    if 'admin_id' in session:
-        return AdminUser.query.get(session['admin_id'])
-    return None
+    """Retorna a identidade (id, nome) do admin atual da sessão, sem consultar o banco"""
+    return current_identity()
 
 
 @bp.route('/login', methods=['GET', 'POST'])
 def login():
     """Página de login para administradores"""
+    from .forms import LoginForm
     form = LoginForm()
     
     if form.validate_on_submit():
         email = form.email.data
         password = form.password.data
+        guard = current_app.extensions['login_guard']
+        ip = request.remote_addr
+        
+        # Muitas falhas recentes deste IP ou para este email: nem verifica a senha
+        wait = guard.retry_after(ip, email)
+        if wait:
+            flash('Muitas tentativas de login. Tente novamente mais tarde.', 'error')
+            return _login_refused(form, 429, wait)
         
         # Buscar admin por email
         admin = AdminUser.query.filter_by(email=email).first()
         
-        if admin and admin.check_password(password):
-            # Login bem-sucedido
-            session['admin_id'] = admin.id
+        try:
+            valid = admin is not None and guard.verify(admin.check_password, password)
+        except LoginBusy:
+            flash('Muitos logins ao mesmo tempo. Tente novamente em instantes.', 'error')
+            return _login_refused(form, 503, 1)
+        
+        if valid:
+            # Login bem-sucedido; refaz o hash se o custo configurado mudou
+            guard.record_success(ip, email)
+            if admin.password_needs_rehash():
+                admin.upgrade_password_hash(password)
+                db.session.commit()
+            start_session(admin)
             flash(f'Bem-vindo, {admin.name}!', 'success')
             return redirect(url_for('admin.dashboard'))
         else:
+            guard.record_failure(ip, email)
             flash('Email ou senha incorretos.', 'error')
     
     return render_template('login.html', form=form)
 
 
+def _login_refused(form, status, retry_after):
+    """Página de login com o status de recusa e o cabeçalho Retry-After"""
+    response = make_response(render_template('login.html', form=form), status)
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
 @bp.route('/logout')
 def logout():
     """Logout do administrador"""
-    session.pop('admin_id', None)
+    end_session()
     flash('Logout realizado com sucesso.', 'success')
     return redirect(url_for('admin.login'))
 
@@ -61,25 +127,46 @@ def logout():
 @login_required
 def dashboard():
     """Dashboard administrativo com estatísticas"""
-    parks_count = Park.query.count()
-    trails_count = Trail.query.count()
-    trails_open = Trail.query.filter_by(is_open=True).count()
-    events_count = Event.query.count()
-    events_active = Event.query.filter_by(is_active=True).count()
-    events_upcoming = Event.query.filter(
-        Event.is_active == True,
-        Event.start_datetime >= datetime.utcnow()
-    ).count()
-    availability_periods_count = AvailabilityPeriod.query.count()
-    
-    return render_template('admin_dashboard.html',
-                         parks_count=parks_count,
-                         trails_count=trails_count,
-                         trails_open=trails_open,
-                         events_count=events_count,
-                         events_active=events_active,
-                         events_upcoming=events_upcoming,
-                         availability_periods_count=availability_periods_count)
+    return render_template('admin_dashboard.html', **dashboard_stats())
+
+
+@bp.route('/metrics')
+@login_required
+def metrics():
+    """Latência e uso do banco agregados por endpoint"""
+    collector = current_app.extensions.get('request_metrics')
+    endpoints = collector.snapshot() if collector else []
+    page_cache = current_app.extensions.get('page_cache')
+    detail_cache = current_app.extensions.get('park_detail_cache')
+    return render_template('admin_metrics.html',
+                         endpoints=endpoints,
+                         enabled=collector is not None,
+                         page_cache=page_cache.stats() if page_cache else None,
+                         detail_cache=detail_cache.stats() if detail_cache else None)
+
+
+@bp.route('/metrics/reset', methods=['POST'])
+@login_required
+def metrics_reset():
+    """Zerar as métricas coletadas"""
+    collector = current_app.extensions.get('request_metrics')
+    if collector:
+        collector.reset()
+        flash('Métricas zeradas.', 'success')
+    return redirect(url_for('admin.metrics'))
+
+
+@bp.route('/export/<entity>')
+@login_required
+def export(entity):
+    """Exporta uma tabela inteira em CSV ou NDJSON, em fluxo"""
+    fmt = request.args.get('format', 'csv')
+    if entity not in EXPORT_ENTITIES or fmt not in CONTENT_TYPES:
+        abort(404)
+    filename = f'{entity}-{datetime.utcnow():%Y%m%d}.{fmt}'
+    return Response(stream_with_context(iter_export(entity, fmt)),
+                    content_type=CONTENT_TYPES[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
 
 
 # ========== CRUD PARQUES ==========
@@ -88,14 +175,16 @@ def dashboard():
 @login_required
 def parks_list():
     """Lista todos os parques"""
-    parks = Park.query.order_by(Park.name).all()
+    parks = paginate_request(Park.query, [Park.name, Park.id], current_app.config['ADMIN_PAGE_SIZE'])
     return render_template('admin_parks.html', parks=parks)
 
 
 @bp.route('/parks/new', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def park_create():
     """Criar novo parque"""
+    from .forms import ParkForm
     form = ParkForm()
     
     if form.validate_on_submit():
@@ -107,6 +196,7 @@ def park_create():
         )
         db.session.add(park)
         db.session.commit()
+        notify_change('park', park.id)
         flash(f'Parque "{park.name}" criado com sucesso!', 'success')
         return redirect(url_for('admin.parks_list'))
     
@@ -115,8 +205,10 @@ def park_create():
 
 @bp.route('/parks/<int:park_id>/edit', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def park_edit(park_id):
     """Editar parque existente"""
+    from .forms import ParkForm
     park = Park.query.get_or_404(park_id)
     form = ParkForm(obj=park)
     
@@ -126,6 +218,7 @@ def park_edit(park_id):
         park.type = form.type.data
         park.location = form.location.data
         db.session.commit()
+        notify_change('park', park_id)
         flash(f'Parque "{park.name}" atualizado com sucesso!', 'success')
         return redirect(url_for('admin.parks_list'))
     
@@ -134,12 +227,14 @@ def park_edit(park_id):
 
 @bp.route('/parks/<int:park_id>/delete', methods=['POST'])
 @login_required
+@retry_on_busy
 def park_delete(park_id):
     """Excluir parque"""
     park = Park.query.get_or_404(park_id)
     park_name = park.name
     db.session.delete(park)
     db.session.commit()
+    notify_change('park', park_id)
     flash(f'Parque "{park_name}" excluído com sucesso!', 'success')
     return redirect(url_for('admin.parks_list'))
 
@@ -150,16 +245,20 @@ def park_delete(park_id):
 @login_required
 def trails_list():
     """Lista todas as trilhas"""
-    trails = Trail.query.order_by(Trail.name).all()
-    return render_template('admin_trails.html', trails=trails)
+    trails = paginate_request(Trail.query.options(joinedload(Trail.park)),
+                              [Trail.name, Trail.id],
+                              current_app.config['ADMIN_PAGE_SIZE'])
+    return render_template('admin_trails.html', trails=trails, park_choices=park_catalog().choices())
 
 
 @bp.route('/trails/new', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def trail_create():
     """Criar nova trilha"""
+    from .forms import TrailForm
     form = TrailForm()
-    form.park_id.choices = [(p.id, p.name) for p in Park.query.order_by(Park.name).all()]
+    form.park_id.choices = park_catalog().choices()
     
     if form.validate_on_submit():
         trail = Trail(
@@ -172,6 +271,7 @@ def trail_create():
         )
         db.session.add(trail)
         db.session.commit()
+        notify_change('trail', form.park_id.data)
         flash(f'Trilha "{trail.name}" criada com sucesso!', 'success')
         return redirect(url_for('admin.trails_list'))
     
@@ -180,13 +280,16 @@ def trail_create():
 
 @bp.route('/trails/<int:trail_id>/edit', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def trail_edit(trail_id):
     """Editar trilha existente"""
+    from .forms import TrailForm
     trail = Trail.query.get_or_404(trail_id)
     form = TrailForm(obj=trail)
-    form.park_id.choices = [(p.id, p.name) for p in Park.query.order_by(Park.name).all()]
+    form.park_id.choices = park_catalog().choices()
     
     if form.validate_on_submit():
+        old_park_id = trail.park_id
         trail.park_id = form.park_id.data
         trail.name = form.name.data
         trail.difficulty = form.difficulty.data
@@ -194,6 +297,7 @@ def trail_edit(trail_id):
         trail.description = form.description.data
         trail.is_open = form.is_open.data
         db.session.commit()
+        notify_change('trail', old_park_id, form.park_id.data)
         flash(f'Trilha "{trail.name}" atualizada com sucesso!', 'success')
         return redirect(url_for('admin.trails_list'))
     
@@ -202,44 +306,76 @@ def trail_edit(trail_id):
 
 @bp.route('/trails/<int:trail_id>/toggle', methods=['POST'])
 @login_required
+@retry_on_busy
 def trail_toggle(trail_id):
     """Alternar status aberta/fechada da trilha"""
     trail = Trail.query.get_or_404(trail_id)
     trail.is_open = not trail.is_open
     status = 'aberta' if trail.is_open else 'fechada'
+    park_id = trail.park_id
     db.session.commit()
+    notify_change('trail', park_id)
     flash(f'Trilha "{trail.name}" marcada como {status}!', 'success')
     return redirect(url_for('admin.trails_list'))
 
 @bp.route('/trails/<int:trail_id>/delete', methods=['GET'])
 @login_required
+@retry_on_busy
 def trail_delete(trail_id):
     """Excluir trilha"""
     trail = Trail.query.get_or_404(trail_id)
     trail_name = trail.name
+    park_id = trail.park_id
     db.session.delete(trail)
     db.session.commit()
+    notify_change('trail', park_id)
     flash(f'Trilha "{trail_name}" excluída com sucesso!', 'success')
     return redirect(url_for('admin.trails_list'))
 
 
+@bp.route('/trails/bulk', methods=['POST'])
+@login_required
+@retry_on_busy
+def trails_bulk():
+    """Abrir ou fechar de uma vez as trilhas marcadas ou todas as de um parque"""
+    action = request.form.get('action')
+    if action not in ('open', 'close'):
+        abort(400)
+    selection = _bulk_selection()
+    if not selection:
+        flash('Marque trilhas ou escolha um parque.', 'warning')
+        return redirect(url_for('admin.trails_list'))
+    result = bulk.set_trails_open(action == 'open', **selection)
+    status = 'abertas' if action == 'open' else 'fechadas'
+    flash(f'{result.affected} trilha(s) {status}.', 'success')
+    return redirect(url_for('admin.trails_list'))
+
+
 
 # ========== CRUD EVENTOS ==========
 
 @bp.route('/events')
 @login_required
 def events_list():
-    """Lista todos os eventos"""
-    events = Event.query.order_by(Event.start_datetime.desc()).all()
-    return render_template('admin_events.html', events=events)
+    """Lista os eventos: atuais, arquivados (``?scope=archived``) ou todos (``?scope=all``)"""
+    scope = request.args.get('scope', 'current')
+    if scope not in ADMIN_SCOPES:
+        abort(400)
+    query, columns = admin_events_query(scope)
+    events = paginate_request(query, columns, current_app.config['ADMIN_PAGE_SIZE'], descending=True)
+    catalog = park_catalog()
+    return render_template('admin_events.html', events=events, scope=scope,
+                           parks=catalog.by_id, park_choices=catalog.choices())
 
 
 @bp.route('/events/new', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def event_create():
     """Criar novo evento"""
+    from .forms import EventForm
     form = EventForm()
-    form.park_id.choices = [(p.id, p.name) for p in Park.query.order_by(Park.name).all()]
+    form.park_id.choices = park_catalog().choices()
     
     if form.validate_on_submit():
         event = Event(
@@ -252,6 +388,7 @@ def event_create():
         )
         db.session.add(event)
         db.session.commit()
+        notify_change('event', form.park_id.data)
         flash(f'Evento "{event.title}" criado com sucesso!', 'success')
         return redirect(url_for('admin.events_list'))
     
@@ -260,13 +397,16 @@ def event_create():
 
 @bp.route('/events/<int:event_id>/edit', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def event_edit(event_id):
     """Editar evento existente"""
+    from .forms import EventForm
     event = Event.query.get_or_404(event_id)
     form = EventForm(obj=event)
-    form.park_id.choices = [(p.id, p.name) for p in Park.query.order_by(Park.name).all()]
+    form.park_id.choices = park_catalog().choices()
     
     if form.validate_on_submit():
+        old_park_id = event.park_id
         event.park_id = form.park_id.data
         event.title = form.title.data
         event.description = form.description.data
@@ -274,6 +414,7 @@ def event_edit(event_id):
         event.end_datetime = form.end_datetime.data
         event.is_active = form.is_active.data
         db.session.commit()
+        notify_change('event', old_park_id, form.park_id.data)
         flash(f'Evento "{event.title}" atualizado com sucesso!', 'success')
         return redirect(url_for('admin.events_list'))
     
@@ -282,43 +423,81 @@ def event_edit(event_id):
 
 @bp.route('/events/<int:event_id>/toggle', methods=['POST'])
 @login_required
+@retry_on_busy
 def event_toggle(event_id):
     """Alternar status ativo/inativo do evento"""
     event = Event.query.get_or_404(event_id)
     event.is_active = not event.is_active
     status = 'ativo' if event.is_active else 'inativo'
+    park_id = event.park_id
     db.session.commit()
+    notify_change('event', park_id)
     flash(f'Evento "{event.title}" marcado como {status}!', 'success')
     return redirect(url_for('admin.events_list'))
 
 @bp.route('/events/<int:event_id>/delete', methods=['GET'])
 @login_required
+@retry_on_busy
 def event_delete(event_id):
     """Excluir evento"""
     event = Event.query.get_or_404(event_id)
     event_title = event.title
+    park_id = event.park_id
     db.session.delete(event)
     db.session.commit()
+    notify_change('event', park_id)
     flash(f'Evento "{event_title}" excluído com sucesso!', 'success')
     return redirect(url_for('admin.events_list'))
 
 
+@bp.route('/events/bulk', methods=['POST'])
+@login_required
+@retry_on_busy
+def events_bulk():
+    """Ativar, desativar ou excluir de uma vez os eventos marcados ou os de um parque (opcionalmente no período)"""
+    action = request.form.get('action')
+    if action not in ('activate', 'deactivate', 'delete'):
+        abort(400)
+    selection = _bulk_selection()
+    if not selection:
+        # Só datas pegariam os eventos de todos os parques num envio: exige o parque
+        flash('Marque eventos ou escolha um parque.', 'warning')
+        return redirect(url_for('admin.events_list'))
+    if 'ids' not in selection:
+        selection.update(start=_form_date('start'), end=_form_date('end'))
+    if action == 'delete':
+        result = bulk.delete_events(**selection)
+        flash(f'{result.affected} evento(s) excluído(s).', 'success')
+    else:
+        result = bulk.set_events_active(action == 'activate', **selection)
+        status = 'ativado(s)' if action == 'activate' else 'desativado(s)'
+        flash(f'{result.affected} evento(s) {status}.', 'success')
+    return redirect(url_for('admin.events_list'))
+
+
 # ========== CRUD DISPONIBILIDADE ==========
 
 @bp.route('/availability')
 @login_required
 def availability_list():
     """Lista todos os períodos de disponibilidade"""
-    periods = AvailabilityPeriod.query.order_by(AvailabilityPeriod.start_date.desc()).all()
-    return render_template('admin_availability.html', periods=periods)
+    periods = paginate_request(AvailabilityPeriod.query.options(joinedload(AvailabilityPeriod.park)),
+                               [AvailabilityPeriod.start_date, AvailabilityPeriod.id],
+                               current_app.config['ADMIN_PAGE_SIZE'],
+                               descending=True)
+    return render_template('admin_availability.html', periods=periods,
+                           park_choices=park_catalog().choices(),
+                           max_shift_days=bulk.MAX_SHIFT_DAYS)
 
 
 @bp.route('/availability/new', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def availability_create():
     """Criar novo período de disponibilidade"""
+    from .forms import AvailabilityPeriodForm
     form = AvailabilityPeriodForm()
-    form.park_id.choices = [(p.id, p.name) for p in Park.query.order_by(Park.name).all()]
+    form.park_id.choices = park_catalog().choices()
     
     if form.validate_on_submit():
         period = AvailabilityPeriod(
@@ -331,6 +510,7 @@ def availability_create():
         )
         db.session.add(period)
         db.session.commit()
+        notify_change('availability', form.park_id.data)
         flash(f'Período de disponibilidade "{period.season_name}" criado com sucesso!', 'success')
         return redirect(url_for('admin.availability_list'))
     
@@ -339,8 +519,10 @@ def availability_create():
 
 @bp.route('/availability/<int:period_id>/edit', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def availability_edit(period_id):
     """Editar período de disponibilidade existente"""
+    from .forms import AvailabilityPeriodForm
     period = AvailabilityPeriod.query.get_or_404(period_id)
     
     # Converter strings de horário para time objects para o formulário
@@ -355,9 +537,10 @@ def availability_edit(period_id):
         start_date=period.start_date,
         end_date=period.end_date
     )
-    form.park_id.choices = [(p.id, p.name) for p in Park.query.order_by(Park.name).all()]
+    form.park_id.choices = park_catalog().choices()
     
     if form.validate_on_submit():
+        old_park_id = period.park_id
         period.park_id = form.park_id.data
         period.season_name = form.season_name.data
         period.open_time = form.open_time.data.strftime('%H:%M')
@@ -365,6 +548,7 @@ def availability_edit(period_id):
         period.start_date = form.start_date.data
         period.end_date = form.end_date.data
         db.session.commit()
+        notify_change('availability', old_park_id, form.park_id.data)
         flash(f'Período de disponibilidade "{period.season_name}" atualizado com sucesso!', 'success')
         return redirect(url_for('admin.availability_list'))
     
@@ -373,15 +557,39 @@ def availability_edit(period_id):
 
 @bp.route('/availability/<int:period_id>/delete', methods=['POST'])
 @login_required
+@retry_on_busy
 def availability_delete(period_id):
     """Excluir período de disponibilidade"""
     period = AvailabilityPeriod.query.get_or_404(period_id)
     period_name = period.season_name
+    park_id = period.park_id
     db.session.delete(period)
     db.session.commit()
+    notify_change('availability', park_id)
     flash(f'Período de disponibilidade "{period_name}" excluído com sucesso!', 'success')
     return redirect(url_for('admin.availability_list'))
 
 
+@bp.route('/availability/bulk', methods=['POST'])
+@login_required
+@retry_on_busy
+def availability_bulk():
+    """Deslocar em N dias os períodos marcados ou todos os de um parque"""
+    days = request.form.get('days', type=int)
+    if not days:
+        flash('Informe um deslocamento em dias diferente de zero.', 'warning')
+        return redirect(url_for('admin.availability_list'))
+    if abs(days) > bulk.MAX_SHIFT_DAYS:
+        flash(f'O deslocamento deve ficar entre -{bulk.MAX_SHIFT_DAYS} e {bulk.MAX_SHIFT_DAYS} dias.', 'warning')
+        return redirect(url_for('admin.availability_list'))
+    selection = _bulk_selection()
+    if not selection:
+        flash('Marque períodos ou escolha um parque.', 'warning')
+        return redirect(url_for('admin.availability_list'))
+    result = bulk.shift_availability(days, **selection)
+    flash(f'{result.affected} período(s) deslocado(s) em {days:+d} dia(s).', 'success')
+    return redirect(url_for('admin.availability_list'))
+
+
 
 
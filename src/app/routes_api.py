@@ -0,0 +1,147 @@
+"""API JSON somente leitura (versão 1).
+
+Cada resposta leva um ``ETag`` forte derivado das versões das tabelas
+envolvidas (``versions.py``), dos filtros normalizados e, para dados que
+dependem do relógio, do minuto/dia atual (o dia no fuso dos parques). Um ``If-None-Match`` que casa
+com esse ETag recebe 304 sem consultar o ORM nem serializar nada.
+"""
+import hashlib
+from datetime import datetime, date
+from functools import wraps
+
+from flask import Blueprint, current_app, jsonify, request, make_response
+
+from . import availability as availability_engine
+from .catalog import park_catalog
+from .models import Trail, Event, normalize_difficulty
+from .pagination import paginate_request
+from .routes_public import open_trails_query, upcoming_events_query
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+def _time_bucket(granularity):
+    now = datetime.utcnow()
+    if granularity == 'minute':
+        return now.strftime('%Y-%m-%dT%H:%M')
+    if granularity == 'day':
+        # Mesmo dia de /parks e do calendário: o período vigente muda à meia-noite local
+        return availability_engine.local_now().date().isoformat()
+    return None
+
+
+def versioned(*tables, clock=None):
+    """Gera o ETag a partir das versões de ``tables`` e responde 304 se possível.
+
+    Args:
+        tables: Tabelas cujas escritas mudam a resposta
+        clock: 'minute' ou 'day' quando a resposta depende do relógio
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated_function(*args, **kwargs):
+            versions = current_app.extensions['data_versions']
+            parts = [request.endpoint, _time_bucket(clock)]
+            parts += [f'{t}:{versions.get(t)}' for t in tables]
+            parts += [f'{k}={v}' for k, v in sorted(_normalized_args().items())]
+            etag = hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:24]
+
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = jsonify(view(*args, **kwargs))
+            response.set_etag(etag)
+            response.cache_control.public = True
+            response.cache_control.max_age = current_app.config['API_MAX_AGE']
+            return response
+        return decorated_function
+    return decorator
+
+
+def _normalized_args():
+    args = {}
+    park_id = request.args.get('park_id', type=int)
+    if park_id:
+        args['park_id'] = park_id
+    difficulty = normalize_difficulty(request.args.get('difficulty'))
+    if difficulty:
+        args['difficulty'] = difficulty
+    for cursor in ('after', 'before'):
+        if request.args.get(cursor):
+            args[cursor] = request.args[cursor]
+    return args
+
+
+def _page_payload(page, serialize):
+    return {
+        'items': [serialize(item) for item in page],
+        'next': page.next_cursor,
+        'prev': page.prev_cursor,
+    }
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+@bp.route('/parks')
+@versioned('parks')
+def parks():
+    """Todos os parques"""
+    return {'items': [
+        {'id': p.id, 'name': p.name, 'type': p.type, 'location': p.location}
+        for p in park_catalog().parks
+    ]}
+
+
+@bp.route('/trails')
+@versioned('trails')
+def trails():
+    """Trilhas abertas, com os mesmos filtros de /trails"""
+    args = _normalized_args()
+    query = open_trails_query(args.get('park_id'), args.get('difficulty'))
+    page = paginate_request(query, [Trail.name, Trail.id], current_app.config['PAGE_SIZE'])
+    return _page_payload(page, lambda t: {
+        'id': t.id,
+        'park_id': t.park_id,
+        'name': t.name,
+        'difficulty': t.difficulty,
+        'duration_estimated': t.duration_estimated,
+        'is_open': t.is_open,
+    })
+
+
+@bp.route('/events')
+@versioned('events', clock='minute')
+def events():
+    """Próximos eventos ativos"""
+    query = upcoming_events_query(_normalized_args().get('park_id'))
+    page = paginate_request(query, [Event.start_datetime, Event.id], current_app.config['PAGE_SIZE'])
+    return _page_payload(page, lambda e: {
+        'id': e.id,
+        'park_id': e.park_id,
+        'title': e.title,
+        'start': _iso(e.start_datetime),
+        'end': _iso(e.end_datetime),
+    })
+
+
+@bp.route('/availability')
+@versioned('availability_periods', clock='day')
+def availability():
+    """Período vigente hoje (fuso dos parques) em cada parque, pelo mesmo cálculo do calendário"""
+    today = availability_engine.local_now().date()
+    calendar = availability_engine.resolve(today, today, _normalized_args().get('park_id'))
+    periods = [availability_engine.hours_on(calendar[park_id], today) for park_id in sorted(calendar)]
+    return {'items': [
+        {
+            'id': p.id,
+            'park_id': p.park_id,
+            'season_name': p.season_name,
+            'open_time': p.open_time,
+            'close_time': p.close_time,
+            'start_date': _iso(p.start_date),
+            'end_date': _iso(p.end_date),
+        }
+        for p in periods
+    ]}
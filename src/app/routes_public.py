@@ -1,22 +1,132 @@
-from flask import Blueprint, render_template, request, abort
-from datetime import datetime
+from flask import Blueprint, render_template, request, abort, current_app, session, g
+from datetime import datetime, timedelta, date
+from sqlalchemy.orm import joinedload
 from . import db
-from .models import Park, Trail, Event, BiodiversityItem, AvailabilityPeriod
+from collections import Counter
+from sqlalchemy import func
+from .models import (Park, Trail, Event,
+                     TRAIL_DIFFICULTIES, DIFFICULTY_LABELS, normalize_difficulty)
+from .page_cache import cached_page
+from .catalog import park_catalog
+from .park_detail import get_park_detail
+from .pagination import paginate_request
+from .search import search as search_documents
+from . import availability
 
 bp = Blueprint('public', __name__)
 
+# Tabelas que alimentam cada página (para o cabeçalho Last-Modified)
+PAGE_TABLES = {
+	'public.index': ('parks', 'trails', 'events'),
+	'public.parks_list': ('parks', 'availability_periods'),
+	'public.park_detail': ('parks', 'trails', 'events', 'availability_periods', 'biodiversity_items'),
+	'public.trails_list': ('parks', 'trails'),
+	'public.events_list': ('parks', 'events'),
+	'public.search': ('parks', 'trails', 'events', 'biodiversity_items'),
+	'public.park_calendar': ('parks', 'availability_periods'),
+}
+# Páginas que mudam com o relógio (próximos eventos, aberto agora), mesmo sem escritas
+CLOCK_DEPENDENT_PAGES = {'public.index', 'public.park_detail', 'public.events_list',
+                         'public.parks_list', 'public.park_calendar'}
+
+# Dias mostrados no calendário de funcionamento (padrão e máximo)
+CALENDAR_DAYS = 60
+CALENDAR_MAX_DAYS = 366
+
+
+@bp.context_processor
+def public_page_context():
+	return dict(public_page=True)
+
+
+@bp.after_request
+def add_cache_headers(response):
+	"""Cabeçalhos para cache compartilhado (proxy/CDN) das páginas públicas"""
+	if request.method != 'GET' or response.status_code != 200 or session.accessed:
+		return response
+	response.cache_control.public = True
+	response.cache_control.max_age = current_app.config['PUBLIC_MAX_AGE']
+	response.vary.add('Accept-Encoding')
+	tables = PAGE_TABLES.get(request.endpoint)
+	if tables:
+		last_modified = current_app.extensions['data_versions'].updated_at(*tables)
+		if request.endpoint in CLOCK_DEPENDENT_PAGES:
+			now = datetime.utcnow()
+			window_start = now - timedelta(seconds=now.second, microseconds=now.microsecond)
+			last_modified = max(last_modified or window_start, window_start)
+		if last_modified:
+			response.last_modified = last_modified
+			response.make_conditional(request)
+	return response
+
+
+def open_trails_query(park_id=None, difficulty=None):
+	"""Trilhas abertas, com filtros opcionais por parque e dificuldade normalizada"""
+	query = Trail.query.filter_by(is_open=True)
+	if park_id:
+		query = query.filter_by(park_id=park_id)
+	if difficulty:
+		query = query.filter(Trail.difficulty == difficulty)
+	return query
+
+
+class TrailFacets:
+	"""Contagens para o filtro de trilhas, a partir de um único GROUP BY"""
+
+	def __init__(self, rows):
+		# (park_id, difficulty, is_open) -> quantidade
+		self.counts = {(park_id, difficulty, bool(is_open)): n for park_id, difficulty, is_open, n in rows}
+
+	def open_by_park(self, difficulty=None):
+		"""Trilhas abertas por parque (com a dificuldade selecionada, se houver)"""
+		totals = Counter()
+		for (park_id, code, is_open), n in self.counts.items():
+			if is_open and (difficulty is None or code == difficulty):
+				totals[park_id] += n
+		return totals
+
+	def open_by_difficulty(self, park_id=None):
+		"""Trilhas abertas por dificuldade (no parque selecionado, se houver)"""
+		totals = Counter()
+		for (pid, code, is_open), n in self.counts.items():
+			if is_open and (park_id is None or pid == park_id):
+				totals[code] += n
+		return totals
+
+
+def trail_facets():
+	"""Trilhas por parque × dificuldade × status, numa consulta (coberta por ix_trails_facets)"""
+	rows = db.session.query(
+		Trail.park_id, Trail.difficulty, Trail.is_open, func.count()
+	).group_by(Trail.park_id, Trail.difficulty, Trail.is_open).all()
+	return TrailFacets(rows)
+
+
+def upcoming_events_query(park_id=None):
+	"""Eventos ativos que ainda não começaram, com filtro opcional por parque"""
+	query = Event.query.filter(
+		Event.is_active == True,
+		Event.start_datetime >= datetime.utcnow()
+	)
+	if park_id:
+		query = query.filter_by(park_id=park_id)
+	return query
+
 
 @bp.route('/')
+@cached_page
 def index():
 	"""Página inicial com visão geral dos parques e principais atrações"""
-	# Buscar todos os parques ordenados por nome
-	parks = Park.query.order_by(Park.name).all()
+	# Parques ordenados por nome (catálogo em memória)
+	parks = park_catalog().parks
 	
-	# Buscar trilhas abertas mais recentes (limitadas a 5)
-	recent_trails = Trail.query.filter_by(is_open=True).order_by(Trail.id.desc()).limit(5).all()
+	# Buscar trilhas abertas mais recentes (limitadas a 5), já com o parque
+	recent_trails = Trail.query.options(joinedload(Trail.park)).filter_by(
+		is_open=True
+	).order_by(Trail.id.desc()).limit(5).all()
 	
-	# Buscar próximos eventos ativos (limitados a 5)
-	upcoming_events = Event.query.filter(
+	# Buscar próximos eventos ativos (limitados a 5), já com o parque
+	upcoming_events = Event.query.options(joinedload(Event.park)).filter(
 		Event.is_active == True,
 		Event.start_datetime >= datetime.utcnow()
 	).order_by(Event.start_datetime).limit(5).all()
@@ -28,102 +138,115 @@ def index():
 
 
 @bp.route('/parks')
+@cached_page
 def parks_list():
-	"""Lista todos os parques com breve descrição"""
-	parks = Park.query.order_by(Park.name).all()
-	return render_template('parks.html', parks=parks)
+	"""Lista todos os parques com breve descrição e o selo de aberto agora"""
+	parks = park_catalog().parks
+	now = availability.local_now()
+	statuses = availability.open_status(now)
+	# A página fica em cache só até a próxima abertura/fechamento
+	if statuses:
+		g.page_cache_ttl = availability.seconds_until(min(s.next_change for s in statuses.values()), now)
+	return render_template('parks.html', parks=parks, statuses=statuses)
 
 
 @bp.route('/parks/<int:park_id>')
+@cached_page
 def park_detail(park_id):
 	"""Detalhes do parque com trilhas, eventos, biodiversidade e disponibilidade"""
-	park = Park.query.get_or_404(park_id)
-	
-	# Buscar trilhas do parque ordenadas por nome
-	trails = Trail.query.filter_by(park_id=park_id).order_by(Trail.name).all()
-	
-	# Buscar eventos futuros ativos do parque
-	upcoming_events = Event.query.filter(
-		Event.park_id == park_id,
-		Event.is_active == True,
-		Event.start_datetime >= datetime.utcnow()
-	).order_by(Event.start_datetime).all()
+	# Uma consulta (ou nenhuma, com o cache por parque); ver park_detail.py
+	detail = get_park_detail(park_id)
+	if detail is None:
+		abort(404)
+	# A página fica em cache só até o próximo evento começar ou o dia virar
+	g.page_cache_ttl = availability.seconds_until(detail.next_change, datetime.utcnow())
 	
-	# Buscar principais itens de biodiversidade (limitados a 10)
-	biodiversity_items = BiodiversityItem.query.filter_by(
-		park_id=park_id
-	).order_by(BiodiversityItem.type, BiodiversityItem.name).limit(10).all()
+	return render_template('park_detail.html',
+					   park=detail.park,
+					   trails=detail.trails,
+					   upcoming_events=detail.upcoming_events,
+					   biodiversity_items=detail.biodiversity_items,
+					   current_availability=detail.current_availability)
+
+
+@bp.route('/parks/<int:park_id>/calendar')
+def park_calendar(park_id):
+	"""Calendário de funcionamento do parque (a partir de ?start=AAAA-MM-DD, por ?days=N dias)"""
+	park = park_catalog().by_id.get(park_id)
+	if park is None:
+		abort(404)
+	try:
+		start = date.fromisoformat(request.args['start']) if request.args.get('start') else availability.local_now().date()
+	except ValueError:
+		abort(400)
+	days = min(max(request.args.get('days', CALENDAR_DAYS, type=int), 1), CALENDAR_MAX_DAYS)
+	end = start + timedelta(days=days - 1)
+	segments = availability.resolve(start, end, park_id=park_id).get(park_id, [])
 	
-	# Buscar período de disponibilidade atual (se houver)
-	today = datetime.utcnow().date()
-	current_availability = AvailabilityPeriod.query.filter(
-		AvailabilityPeriod.park_id == park_id,
-		AvailabilityPeriod.start_date <= today,
-		AvailabilityPeriod.end_date >= today
-	).first()
+	# Trechos sem período aparecem como "fechado"
+	calendar = []
+	cursor = start
+	for segment in segments:
+		if segment.start > cursor:
+			calendar.append(availability.Segment(cursor, segment.start - timedelta(days=1), None))
+		calendar.append(segment)
+		cursor = segment.end + timedelta(days=1)
+	if cursor <= end:
+		calendar.append(availability.Segment(cursor, end, None))
 	
-	return render_template('park_detail.html',
+	return render_template('park_calendar.html',
 					   park=park,
-					   trails=trails,
-					   upcoming_events=upcoming_events,
-					   biodiversity_items=biodiversity_items,
-					   current_availability=current_availability)
+					   calendar=calendar,
+					   start=start,
+					   end=end,
+					   days=days,
+					   previous_start=start - timedelta(days=days),
+					   next_start=end + timedelta(days=1))
 
 
 @bp.route('/trails')
+@cached_page
 def trails_list():
 	"""Lista todas as trilhas com filtros opcionais por parque e dificuldade"""
 	# Obter parâmetros de filtro
 	park_id = request.args.get('park_id', type=int)
-	difficulty = request.args.get('difficulty', type=str)
-	
-	# Construir query base
-	query = Trail.query.filter_by(is_open=True)
+	difficulty = normalize_difficulty(request.args.get('difficulty', type=str))
 	
-	# Aplicar filtros
-	if park_id:
-		query = query.filter_by(park_id=park_id)
-	
-	if difficulty and difficulty.lower() in ['fácil', 'facil', 'moderada', 'difícil', 'dificil']:
-		# Normalizar dificuldade
-		difficulty_map = {'facil': 'fácil', 'dificil': 'difícil'}
-		normalized_difficulty = difficulty_map.get(difficulty.lower(), difficulty.lower())
-		query = query.filter(Trail.difficulty.ilike(f'%{normalized_difficulty}%'))
+	# Trilhas abertas filtradas (parque carregado no mesmo SELECT para o template)
+	query = open_trails_query(park_id, difficulty).options(joinedload(Trail.park))
 	
-	# Ordenar por nome
-	trails = query.order_by(Trail.name).all()
+	# Página atual, ordenada por (nome, id)
+	trails = paginate_request(query, [Trail.name, Trail.id], current_app.config['PAGE_SIZE'])
 	
-	# Buscar todos os parques para o filtro
-	parks = Park.query.order_by(Park.name).all()
+	# Parques para o filtro (catálogo em memória) e contagens de cada opção
+	parks = park_catalog().parks
+	facets = trail_facets()
 	
 	return render_template('trails.html',
 					   trails=trails,
 					   parks=parks,
+					   difficulties=[(code, DIFFICULTY_LABELS[code]) for code in TRAIL_DIFFICULTIES],
+					   park_counts=facets.open_by_park(difficulty),
+					   difficulty_counts=facets.open_by_difficulty(park_id),
 					   selected_park_id=park_id,
 					   selected_difficulty=difficulty)
 
 
 @bp.route('/events')
+@cached_page
 def events_list():
 	"""Lista eventos futuros com filtro opcional por parque"""
 	# Obter parâmetro de filtro
 	park_id = request.args.get('park_id', type=int)
 	
-	# Construir query base para eventos futuros ativos
-	query = Event.query.filter(
-		Event.is_active == True,
-		Event.start_datetime >= datetime.utcnow()
-	)
-	
-	# Aplicar filtro por parque se fornecido
-	if park_id:
-		query = query.filter_by(park_id=park_id)
+	# Eventos futuros ativos (com o parque no mesmo SELECT)
+	query = upcoming_events_query(park_id).options(joinedload(Event.park))
 	
-	# Ordenar por data de início
-	events = query.order_by(Event.start_datetime).all()
+	# Página atual, ordenada por (data de início, id)
+	events = paginate_request(query, [Event.start_datetime, Event.id], current_app.config['PAGE_SIZE'])
 	
-	# Buscar todos os parques para o filtro
-	parks = Park.query.order_by(Park.name).all()
+	# Parques para o filtro (catálogo em memória)
+	parks = park_catalog().parks
 	
 	return render_template('events.html',
 					   events=events,
@@ -131,6 +254,14 @@ def events_list():
 					   selected_park_id=park_id)
 
 
+@bp.route('/search')
+def search():
+	"""Busca textual em parques, trilhas, eventos e biodiversidade"""
+	query = request.args.get('q', '', type=str).strip()[:200]
+	results = search_documents(query, limit=current_app.config['PAGE_SIZE']) if query else []
+	return render_template('search.html', query=query, results=results)
+
+
 @bp.route('/about')
 def about():
 	"""Página sobre o Terê Verde Online e uso consciente dos parques"""
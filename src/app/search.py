@@ -0,0 +1,175 @@
+"""Busca textual (SQLite FTS5) em parques, trilhas, eventos e biodiversidade.
+
+A tabela virtual ``search_index`` guarda um documento por linha das tabelas
+indexadas, com ``title`` e ``body``. O ``rowid`` codifica a origem
+(``id * 4 + código da entidade``), então atualizar ou remover um documento
+é uma busca pela chave primária. Gatilhos SQL mantêm o índice em dia com
+qualquer escrita — ORM, importação em lote ou SQL direto. Eventos
+desativados ficam fora do índice, como nas páginas públicas.
+
+O tokenizador ``unicode61 remove_diacritics 2`` ignora acentos: "dificil"
+encontra "difícil".
+"""
+import re
+from collections import namedtuple
+
+from markupsafe import Markup, escape
+from sqlalchemy import event, text
+
+from . import db
+
+SEARCH_TABLE = 'search_index'
+
+# Entidade: código no rowid, tabela de origem, expressões do documento e
+# condição para o documento existir (None = sempre)
+SearchSource = namedtuple('SearchSource', 'code table park_id title body condition')
+
+SEARCH_SOURCES = {
+    'park': SearchSource(0, 'parks', '{r}.id', '{r}.name',
+                         "coalesce({r}.description, '') || ' ' || coalesce({r}.location, '')", None),
+    'trail': SearchSource(1, 'trails', '{r}.park_id', '{r}.name',
+                          "coalesce({r}.description, '') || ' ' || {r}.difficulty", None),
+    'event': SearchSource(2, 'events', '{r}.park_id', '{r}.title',
+                          "coalesce({r}.description, '')", '{r}.is_active'),
+    'biodiversity': SearchSource(3, 'biodiversity_items', '{r}.park_id', '{r}.name',
+                                 "coalesce({r}.description, '') || ' ' || {r}.type", None),
+}
+_ENTITY_BY_CODE = {source.code: entity for entity, source in SEARCH_SOURCES.items()}
+_SOURCE_COUNT = len(SEARCH_SOURCES)
+
+# Colunas cuja alteração muda o documento indexado
+_WATCHED_COLUMNS = {
+    'parks': 'name, description, location',
+    'trails': 'park_id, name, description, difficulty',
+    'events': 'park_id, title, description, is_active',
+    'biodiversity_items': 'park_id, name, description, type',
+}
+
+# Peso de cada coluna no bm25 (park_id não é indexada)
+BM25_WEIGHTS = (0.0, 10.0, 1.0)
+
+_HL_START, _HL_END = '\x02', '\x03'
+
+SearchResult = namedtuple('SearchResult', 'entity id park_id title snippet rank')
+
+
+def _document_select(entity, ref):
+    """SELECT que gera o documento de ``entity`` a partir da linha ``ref`` (``new`` ou a tabela)."""
+    source = SEARCH_SOURCES[entity]
+    fmt = lambda expr: expr.format(r=ref)  # noqa: E731
+    sql = (f"SELECT {fmt('{r}.id')} * {_SOURCE_COUNT} + {source.code}, {fmt(source.park_id)}, "
+           f"{fmt(source.title)}, {fmt(source.body)}")
+    if ref != 'new':
+        sql += f' FROM {source.table}'
+    if source.condition:
+        sql += f' WHERE {fmt(source.condition)}'
+    return sql
+
+
+def _ddl_statements():
+    yield (f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+           "park_id UNINDEXED, title, body, tokenize = 'unicode61 remove_diacritics 2')")
+    for entity, source in SEARCH_SOURCES.items():
+        table = source.table
+        insert = f'INSERT INTO {SEARCH_TABLE}(rowid, park_id, title, body) {_document_select(entity, "new")}'
+        delete = f'DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * {_SOURCE_COUNT} + {source.code}'
+        yield (f'CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} '
+               f'BEGIN {insert}; END')
+        yield (f'CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE OF {_WATCHED_COLUMNS[table]} '
+               f'ON {table} BEGIN {delete}; {insert}; END')
+        yield (f'CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} '
+               f'BEGIN {delete}; END')
+
+
+def ensure_search_index(connection):
+    """Cria a tabela FTS5 e os gatilhos que faltarem; reconstrói o índice se ele for novo.
+
+    Returns:
+        True se a tabela do índice foi criada agora
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': SEARCH_TABLE},
+    ).first() is not None
+    for statement in _ddl_statements():
+        connection.exec_driver_sql(statement)
+    if not exists:
+        rebuild_search_index(connection)
+    return not exists
+
+
+def rebuild_search_index(connection):
+    """Recria todos os documentos do índice a partir das tabelas.
+
+    Returns:
+        Número de documentos indexados
+    """
+    connection.exec_driver_sql(f'DELETE FROM {SEARCH_TABLE}')
+    for entity in SEARCH_SOURCES:
+        connection.exec_driver_sql(
+            f'INSERT INTO {SEARCH_TABLE}(rowid, park_id, title, body) {_document_select(entity, SEARCH_SOURCES[entity].table)}'
+        )
+    connection.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+    return connection.exec_driver_sql(f'SELECT count(*) FROM {SEARCH_TABLE}').scalar()
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        ensure_search_index(connection)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(user_query):
+    """Converte o texto digitado numa expressão MATCH segura (termos entre aspas, último como prefixo)."""
+    tokens = _TOKEN_RE.findall(user_query or '')[:10]
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _highlight(value):
+    """Escapa o HTML do trecho e troca os marcadores do FTS5 por ``<mark>``."""
+    html = str(escape(value or ''))
+    return Markup(html.replace(_HL_START, '<mark>').replace(_HL_END, '</mark>'))
+
+
+def search(user_query, limit=50):
+    """Documentos que casam com ``user_query``, do mais ao menos relevante (bm25).
+
+    Returns:
+        Lista de ``SearchResult`` (título e trecho já em HTML seguro)
+    """
+    match = build_match_query(user_query)
+    if match is None:
+        return []
+    weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+    rows = db.session.execute(text(
+        f"SELECT rowid, park_id, "
+        f"highlight({SEARCH_TABLE}, 1, :hs, :he) AS title, "
+        f"snippet({SEARCH_TABLE}, 2, :hs, :he, '…', 16) AS snippet, "
+        f"bm25({SEARCH_TABLE}, {weights}) AS rank "
+        f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match "
+        f"ORDER BY rank LIMIT :limit"
+    ), {'match': match, 'limit': limit, 'hs': _HL_START, 'he': _HL_END}).all()
+    return [
+        SearchResult(
+            entity=_ENTITY_BY_CODE[rowid % _SOURCE_COUNT],
+            id=rowid // _SOURCE_COUNT,
+            park_id=park_id,
+            title=_highlight(title),
+            snippet=_highlight(snippet),
+            rank=rank,
+        )
+        for rowid, park_id, title, snippet, rank in rows
+    ]
@@ -0,0 +1,24 @@
+"""Sinais internos da aplicação.
+
+``data_changed`` é emitido depois que uma escrita é confirmada no banco,
+para que os caches derivados (páginas renderizadas, catálogos etc.) sejam
+invalidados de forma precisa.
+"""
+from blinker import Namespace
+from flask import current_app
+
+_signals = Namespace()
+
+#: Enviado com ``entity`` ('park', 'trail', 'event', 'availability',
+#: 'biodiversity') e ``park_ids`` (conjunto de parques afetados; vazio
+#: significa "qualquer parque").
+data_changed = _signals.signal('data-changed')
+
+
+def notify_change(entity, *park_ids):
+    """Avisa os caches da aplicação atual que ``entity`` mudou nos parques informados."""
+    data_changed.send(
+        current_app._get_current_object(),
+        entity=entity,
+        park_ids={pid for pid in park_ids if pid is not None},
+    )
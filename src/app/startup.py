@@ -0,0 +1,86 @@
+"""Relatório do tempo de inicialização da aplicação.
+
+``measure_startup`` roda num processo Python novo (importações a frio)
+com ``-X importtime``. Esse processo importa o pacote, chama
+``create_app`` e faz a primeira requisição, contra um banco SQLite
+temporário (o banco configurado não é tocado). O relatório traz o tempo de
+cada etapa e o tempo de importação próprio de cada módulo, agrupado por
+pacote de terceiros (``sqlalchemy``, ``flask``...) e por módulo da
+aplicação (``src.app.models``...).
+"""
+import json
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from .config import BASE_DIR
+
+# Executado no processo filho: argv = [config, path]
+_PROBE = """
+import json, os, sys, tempfile, time
+tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+database = 'sqlite:///' + os.path.join(tmp.name, 'startup.db')
+t0 = time.perf_counter()
+from src.app import create_app, db
+t1 = time.perf_counter()
+app = create_app(sys.argv[1], {'SQLALCHEMY_DATABASE_URI': database})
+t2 = time.perf_counter()
+with app.app_context():
+    db.create_all()
+client = app.test_client()
+t3 = time.perf_counter()
+status = client.get(sys.argv[2]).status_code
+t4 = time.perf_counter()
+with app.app_context():
+    db.engine.dispose()
+tmp.cleanup()
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000,
+                  'first_request_ms': (t4 - t3) * 1000, 'status': status}))
+"""
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def module_group(name):
+    """Módulos da aplicação ficam separados; os demais, pelo pacote de topo."""
+    if name == 'src.app' or name.startswith('src.app.'):
+        return name
+    return name.split('.')[0]
+
+
+def parse_importtime(output):
+    """Tempo próprio de importação (ms) por grupo, a partir da saída de ``-X importtime``."""
+    groups = Counter()
+    for line in output.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            groups[module_group(match.group(4))] += int(match.group(1)) / 1000
+    return groups
+
+
+def measure_startup(config_name='development', path='/'):
+    """Mede importação, ``create_app`` e primeira requisição num processo novo.
+
+    Returns:
+        Dicionário com os tempos (ms), o status da requisição e ``modules``
+        (grupo -> ms, do mais lento ao mais rápido)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE, config_name, path],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['total_ms'] = report['import_ms'] + report['create_app_ms'] + report['first_request_ms']
+    report['modules'] = dict(parse_importtime(result.stderr).most_common())
+    return report
+
+
+def print_startup_report(report, top=15):
+    print(f"Importação do pacote: {report['import_ms']:8.1f} ms")
+    print(f"create_app:           {report['create_app_ms']:8.1f} ms")
+    print(f"1ª requisição:        {report['first_request_ms']:8.1f} ms (status {report['status']})")
+    print(f"Total:                {report['total_ms']:8.1f} ms")
+    print("Importações mais lentas (tempo próprio):")
+    for name, ms in list(report['modules'].items())[:top]:
+        print(f"  {name:<30} {ms:8.1f} ms")
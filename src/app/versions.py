@@ -0,0 +1,149 @@
+"""Carimbos de versão por tabela, compartilhados entre processos.
+
+Toda escrita feita pelo ORM incrementa, na mesma transação, a linha da
+tabela afetada em ``data_versions``. Cada processo mantém um
+``VersionRegistry`` com a última leitura dessas versões, relida do banco no
+máximo a cada ``VERSION_RECHECK_SECONDS`` (ou logo após um commit local).
+Caches em memória comparam o carimbo com que foram montados ao valor atual
+do registro para saber se estão desatualizados.
+"""
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert
+
+from . import db
+from .models import DataVersion
+from .signals import data_changed
+
+# Tabela -> entidade usada pelo sinal ``data_changed``
+TABLE_ENTITIES = {
+    'parks': 'park',
+    'trails': 'trail',
+    'events': 'event',
+    'availability_periods': 'availability',
+    'biodiversity_items': 'biodiversity',
+}
+
+_PENDING_KEY = 'data_versions_pending'
+
+
+def bump(connection, *table_names):
+    """Incrementa as versões das tabelas na transação de ``connection``.
+
+    Returns:
+        Dicionário tabela -> (versão, updated_at) com os novos valores
+    """
+    now = datetime.utcnow()
+    bumped = {}
+    for name in sorted(set(table_names)):
+        stmt = insert(DataVersion).values(name=name, version=1, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DataVersion.name],
+            set_={'version': DataVersion.version + 1, 'updated_at': now},
+        ).returning(DataVersion.version, DataVersion.updated_at)
+        version, updated_at = connection.execute(stmt).one()
+        bumped[name] = (version, updated_at)
+    return bumped
+
+
+class VersionRegistry:
+    """Última leitura de ``data_versions`` neste processo."""
+
+    def __init__(self, recheck_seconds=2.0):
+        self.recheck_seconds = recheck_seconds
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._checked_at = None
+        self._app = None
+
+    def init_app(self, app):
+        self.recheck_seconds = app.config.get('VERSION_RECHECK_SECONDS', self.recheck_seconds)
+        self._app = app
+        app.extensions['data_versions'] = self
+
+    def get(self, name):
+        """Versão atual da tabela ``name`` (0 se nunca foi escrita)."""
+        return self.snapshot().get(name, (0, None))[0]
+
+    def updated_at(self, *names):
+        """Instante da escrita mais recente entre as tabelas informadas."""
+        versions = self.snapshot()
+        stamps = [versions[n][1] for n in names if n in versions and versions[n][1]]
+        return max(stamps) if stamps else None
+
+    def snapshot(self):
+        """Dicionário tabela -> (versão, updated_at), relido do banco se necessário."""
+        checked_at = self._checked_at
+        if checked_at is None or time.monotonic() - checked_at >= self.recheck_seconds:
+            self.refresh()
+        return self._versions
+
+    def refresh(self):
+        rows = db.session.execute(
+            select(DataVersion.name, DataVersion.version, DataVersion.updated_at)
+        ).all()
+        fresh = {name: (version, updated_at) for name, version, updated_at in rows}
+        with self._lock:
+            had_baseline = self._checked_at is not None
+            previous, self._versions = self._versions, fresh
+            self._checked_at = time.monotonic()
+        if had_baseline:
+            # Escritas feitas por outros processos: os caches locais não receberam
+            # o aviso preciso da rota admin, então invalidam a entidade inteira.
+            for name, (version, _) in fresh.items():
+                if name in TABLE_ENTITIES and previous.get(name, (0, None))[0] != version:
+                    data_changed.send(self._app, entity=TABLE_ENTITIES[name], park_ids=set())
+
+    def apply(self, bumped):
+        """Aplica versões geradas por um commit deste processo (sem reler o banco)."""
+        with self._lock:
+            if self._checked_at is None:
+                return  # a primeira leitura do banco já trará esses valores
+            versions = dict(self._versions)
+            versions.update(bumped)
+            self._versions = versions
+
+
+def cascaded_tables(table):
+    """Tabelas cujas linhas o banco apaga junto com as de ``table`` (ON DELETE CASCADE)."""
+    return {
+        fk.parent.table.name
+        for other in db.metadata.tables.values()
+        for fk in other.foreign_keys
+        if fk.column.table is table and (fk.ondelete or '').upper() == 'CASCADE'
+    }
+
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_flushed_tables(session, flush_context):
+    tables = set()
+    for obj in session.new:
+        tables.add(obj.__table__.name)
+    for obj in session.deleted:
+        tables.add(obj.__table__.name)
+        tables.update(cascaded_tables(obj.__table__))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tables.add(obj.__table__.name)
+    tables.discard(DataVersion.__tablename__)
+    if tables:
+        bumped = bump(session.connection(), *tables)
+        session.info.setdefault(_PENDING_KEY, {}).update(bumped)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_committed_versions(session):
+    bumped = session.info.pop(_PENDING_KEY, None)
+    if bumped and has_app_context():
+        registry = current_app.extensions.get('data_versions')
+        if registry is not None:
+            registry.apply(bumped)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_pending_versions(session):
+    session.info.pop(_PENDING_KEY, None)
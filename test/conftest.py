@@ -0,0 +1,59 @@
+import pytest
+
+from src.app import create_app, db
+from src.app.models import Park
+
+
+@pytest.fixture()
+def testing_app():
+	"""Aplicação com a configuração 'testing' (SQLite em memória)."""
+	app = create_app('testing')
+	with app.app_context():
+		db.create_all()
+		park = Park(name='Parque Teste', description='Descrição de teste', type='Municipal', location='Teresópolis')
+		db.session.add(park)
+		db.session.commit()
+		yield app
+		db.session.remove()
+		db.drop_all()
+
+
+@pytest.fixture()
+def testing_client(testing_app):
+	return testing_app.test_client()
+
+
+@pytest.fixture()
+def admin_client(testing_app):
+	"""Cliente de testes já autenticado na área administrativa."""
+	from src.app.models import AdminUser
+	admin = AdminUser(name='Admin Teste', email='admin@teste.com')
+	admin.set_password('secret123')
+	db.session.add(admin)
+	db.session.commit()
+	client = testing_app.test_client()
+	resp = client.post('/admin/login', data={'email': 'admin@teste.com', 'password': 'secret123'},
+	                   follow_redirects=True)
+	assert resp.request.path == '/admin/'
+	return client
+
+
+@pytest.fixture()
+def count_queries(testing_app):
+	"""Retorna uma função que conta os SELECTs emitidos durante uma chamada."""
+	from sqlalchemy import event
+
+	def counter(fn, *args, **kwargs):
+		statements = []
+
+		def capture(conn, cursor, statement, parameters, context, executemany):
+			statements.append(statement)
+
+		event.listen(db.engine, 'before_cursor_execute', capture)
+		try:
+			result = fn(*args, **kwargs)
+		finally:
+			event.remove(db.engine, 'before_cursor_execute', capture)
+		return result, statements
+
+	return counter
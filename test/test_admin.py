@@ -0,0 +1,215 @@
+def test_server_timing_header_and_metrics_page(admin_client):
+	resp = admin_client.get('/parks')
+	timing = resp.headers.get('Server-Timing', '')
+	assert 'db;dur=' in timing
+	assert 'app;dur=' in timing
+
+	resp = admin_client.get('/admin/metrics')
+	assert resp.status_code == 200
+	html = resp.get_data(as_text=True)
+	assert 'public.parks_list' in html
+	assert any(f'FROM {table}' in html for table in ('parks', 'data_versions', 'availability_periods'))
+
+
+def test_metrics_page_requires_login(testing_client):
+	resp = testing_client.get('/admin/metrics')
+	assert resp.status_code == 302
+	assert testing_client.post('/admin/metrics/reset').status_code == 302
+
+
+def test_metrics_reset_only_on_post(testing_app, admin_client):
+	admin_client.get('/parks')
+	collector = testing_app.extensions['request_metrics']
+
+	admin_client.get('/admin/metrics?reset=1')
+	assert any(row['endpoint'] == 'public.parks_list' for row in collector.snapshot())
+	assert admin_client.get('/admin/metrics/reset').status_code == 405
+
+	resp = admin_client.post('/admin/metrics/reset', follow_redirects=True)
+	assert 'Métricas zeradas.' in resp.get_data(as_text=True)
+	assert not any(row['endpoint'] == 'public.parks_list' for row in collector.snapshot())
+
+
+def test_dashboard_uses_single_query_and_counters_follow_writes(testing_app, admin_client, count_queries):
+	from src.app import db
+	from src.app.counters import aggregate_stats, counter_stats, recount
+	from src.app.models import Trail, Park
+
+	recount(db.session.connection())
+	db.session.commit()
+	park = Park.query.first()
+	admin_client.post('/admin/trails/new', data={
+		'park_id': park.id, 'name': 'Trilha Nova', 'difficulty': 'fácil', 'is_open': 'y'})
+	trail = Trail.query.filter_by(name='Trilha Nova').one()
+	admin_client.post(f'/admin/trails/{trail.id}/toggle')
+
+	resp, statements = count_queries(admin_client.get, '/admin/')
+	assert resp.status_code == 200
+	stat_queries = [s for s in statements if 'count(' in s.lower() or 'stat_counters' in s]
+	assert len(stat_queries) == 1
+
+	expected = aggregate_stats()
+	assert expected['trails_count'] == 1
+	assert expected['trails_open'] == 0
+	assert counter_stats() == expected
+
+	# Escrita fora do ORM faz os contadores divergirem; recount corrige
+	db.session.execute(db.text('DELETE FROM trails'))
+	db.session.commit()
+	assert counter_stats()['trails_count'] == 1
+	recount(db.session.connection())
+	db.session.commit()
+	assert counter_stats() == aggregate_stats()
+
+
+def test_export_streams_csv_for_logged_in_admin(admin_client, testing_client):
+	assert testing_client.get('/admin/export/parks').status_code == 302
+
+	resp = admin_client.get('/admin/export/parks')
+	assert resp.status_code == 200
+	assert resp.is_streamed
+	assert resp.mimetype == 'text/csv'
+	lines = resp.get_data(as_text=True).splitlines()
+	assert lines[0] == 'id,name,description,type,location,created_at'
+	assert 'Parque Teste' in lines[1]
+
+	assert admin_client.get('/admin/export/admin_users').status_code == 404
+
+
+def _create_admin(password_hash=None):
+	from src.app import db
+	from src.app.models import AdminUser
+	admin = AdminUser(name='Admin Teste', email='admin@teste.com')
+	if password_hash:
+		admin.password_hash = password_hash
+	else:
+		admin.set_password('secret123')
+	db.session.add(admin)
+	db.session.commit()
+	return admin
+
+
+def test_login_throttles_repeated_failures(testing_app, testing_client):
+	_create_admin()
+	limit = testing_app.config['LOGIN_MAX_FAILURES_PER_EMAIL']
+	for _ in range(limit):
+		resp = testing_client.post('/admin/login', data={'email': 'admin@teste.com', 'password': 'errada'})
+		assert resp.status_code == 200
+
+	# Bloqueado, mesmo com a senha certa
+	resp = testing_client.post('/admin/login', data={'email': 'admin@teste.com', 'password': 'secret123'})
+	assert resp.status_code == 429
+	assert int(resp.headers['Retry-After']) > 0
+
+	# Outro email do mesmo IP ainda pode tentar
+	resp = testing_client.post('/admin/login', data={'email': 'outro@teste.com', 'password': 'errada'})
+	assert resp.status_code == 200
+
+
+def test_login_ip_limit_uses_forwarded_client_behind_proxy():
+	from src.app import create_app, db
+
+	app = create_app('testing', {'PROXY_FIX_X_FOR': 1, 'LOGIN_MAX_FAILURES_PER_IP': 2})
+	with app.app_context():
+		db.create_all()
+		client = app.test_client()
+
+		def attempt(client_ip, email):
+			return client.post('/admin/login', data={'email': email, 'password': 'errada'},
+			                   headers={'X-Forwarded-For': client_ip}, environ_base={'REMOTE_ADDR': '10.0.0.1'})
+
+		assert [attempt('203.0.113.7', f'a{i}@teste.com').status_code for i in range(3)] == [200, 200, 429]
+		# Outro cliente atrás do mesmo proxy não herda o bloqueio
+		assert attempt('198.51.100.2', 'b@teste.com').status_code == 200
+
+
+def test_login_rehashes_password_with_configured_cost(testing_app, testing_client):
+	from passlib.hash import bcrypt
+	from src.app import db
+	from src.app.models import AdminUser
+
+	_create_admin(bcrypt.using(rounds=5).hash('secret123'))
+	resp = testing_client.post('/admin/login', data={'email': 'admin@teste.com', 'password': 'secret123'})
+	assert resp.status_code == 302
+
+	db.session.expire_all()
+	admin = AdminUser.query.filter_by(email='admin@teste.com').one()
+	assert admin.password_hash.startswith('$2b$04$')
+	assert admin.check_password('secret123')
+
+
+def test_login_guard_rejects_when_saturated():
+	import threading
+
+	import pytest
+	from src.app.login_guard import LoginBusy, LoginGuard
+
+	guard = LoginGuard(workers=1, queue=0)
+	started, release = threading.Event(), threading.Event()
+
+	def slow_check():
+		started.set()
+		return release.wait()
+
+	waiter = threading.Thread(target=guard.verify, args=(slow_check,))
+	waiter.start()
+	started.wait()
+	with pytest.raises(LoginBusy):
+		guard.verify(lambda: True)
+	release.set()
+	waiter.join()
+	assert guard.verify(lambda: True) is True
+
+
+def test_admin_pages_resolve_identity_without_querying_admin_users(admin_client, count_queries):
+	admin_client.get('/admin/metrics')
+	resp, statements = count_queries(admin_client.get, '/admin/metrics')
+	assert resp.status_code == 200
+	assert not [s for s in statements if 'admin_users' in s]
+
+
+def test_password_change_and_deletion_revoke_sessions(testing_app, admin_client):
+	from src.app import db
+	from src.app.models import AdminUser
+
+	admin = AdminUser.query.filter_by(email='admin@teste.com').one()
+	admin.set_password('nova-senha')
+	db.session.commit()
+	resp = admin_client.get('/admin/metrics')
+	assert resp.status_code == 302
+
+	client = testing_app.test_client()
+	client.post('/admin/login', data={'email': 'admin@teste.com', 'password': 'nova-senha'})
+	assert client.get('/admin/metrics').status_code == 200
+	db.session.delete(admin)
+	db.session.commit()
+	assert client.get('/admin/metrics').status_code == 302
+
+
+def test_credential_change_from_another_process_revokes_after_recheck(testing_app, admin_client):
+	from src.app import db
+	from src.app.versions import bump
+
+	assert admin_client.get('/admin/metrics').status_code == 200
+	connection = db.session.connection()
+	connection.execute(db.text('UPDATE admin_users SET credential_version = credential_version + 1'))
+	bump(connection, 'admin_users')
+	db.session.commit()
+
+	testing_app.extensions['data_versions'].refresh()
+	assert admin_client.get('/admin/metrics').status_code == 302
+
+
+def test_admin_parks_list_is_paginated(testing_app, admin_client):
+	from src.app import db
+	from src.app.models import Park
+
+	db.session.add_all([Park(name=f'Parque {c}', type='Estadual') for c in 'CBA'])
+	db.session.commit()
+	testing_app.config['ADMIN_PAGE_SIZE'] = 2
+
+	first = admin_client.get('/admin/parks').get_data(as_text=True)
+	assert 'Parque A' in first and 'Parque B' in first and 'Parque C' not in first
+	after = first.split('after=')[1].split('"')[0]
+	second = admin_client.get(f'/admin/parks?after={after}').get_data(as_text=True)
+	assert 'Parque C' in second and 'Parque Teste' in second and 'Parque A' not in second
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from src.app import db
+from src.app.models import Park, Trail, Event, AvailabilityPeriod
+
+
+def _seed():
+	park = Park.query.first()
+	now = datetime.utcnow()
+	db.session.add_all([
+		Trail(park_id=park.id, name='Trilha Fácil', difficulty='facil', is_open=True),
+		Trail(park_id=park.id, name='Trilha Difícil', difficulty='dificil', is_open=True),
+		Trail(park_id=park.id, name='Trilha Fechada', difficulty='facil', is_open=False),
+		Event(park_id=park.id, title='Evento', start_datetime=now + timedelta(days=2),
+		      end_datetime=now + timedelta(days=2, hours=1), is_active=True),
+	])
+	db.session.commit()
+	return park.id
+
+
+def test_api_lists_with_public_filters(testing_client):
+	park_id = _seed()
+
+	parks = testing_client.get('/api/v1/parks').get_json()
+	assert [p['name'] for p in parks['items']] == ['Parque Teste']
+
+	trails = testing_client.get(f'/api/v1/trails?park_id={park_id}&difficulty=facil').get_json()
+	assert [t['name'] for t in trails['items']] == ['Trilha Fácil']
+	assert trails['next'] is None
+
+	events = testing_client.get('/api/v1/events').get_json()
+	assert [e['title'] for e in events['items']] == ['Evento']
+	assert testing_client.get('/api/v1/availability').get_json() == {'items': []}
+
+
+def test_availability_uses_engine_and_park_local_day(testing_app, testing_client):
+	park = Park.query.first()
+	# UTC+14: a data local nunca é a mesma de UTC-12
+	testing_app.config['PARK_TIMEZONE'] = 'Etc/GMT-14'
+	local_today = datetime.now(ZoneInfo('Etc/GMT-14')).date()
+	start = local_today - timedelta(days=10)
+	db.session.add_all([
+		# Virada de ano gravada com fim antes do início
+		AvailabilityPeriod(park_id=park.id, season_name='Verão', open_time='08:00', close_time='18:00',
+		                   start_date=start, end_date=start - timedelta(days=1)),
+		AvailabilityPeriod(park_id=park.id, season_name='Feriado', open_time='10:00', close_time='14:00',
+		                   start_date=local_today, end_date=local_today),
+	])
+	db.session.commit()
+
+	resp = testing_client.get(f'/api/v1/availability?park_id={park.id}')
+	items = resp.get_json()['items']
+	assert [i['season_name'] for i in items] == ['Feriado']
+	assert items[0]['start_date'] == local_today.isoformat()
+
+	testing_app.config['PARK_TIMEZONE'] = 'Etc/GMT+12'
+	other = testing_client.get(f'/api/v1/availability?park_id={park.id}')
+	assert [i['season_name'] for i in other.get_json()['items']] == ['Verão']
+	assert other.headers['ETag'] != resp.headers['ETag']
+
+
+def test_if_none_match_returns_304_without_queries(testing_app, testing_client, count_queries):
+	_seed()
+	testing_app.extensions['data_versions'].recheck_seconds = 60
+	first = testing_client.get('/api/v1/trails')
+	etag = first.headers['ETag']
+	assert first.status_code == 200
+	assert not etag.startswith('W/')
+
+	resp, statements = count_queries(testing_client.get, '/api/v1/trails', headers={'If-None-Match': etag})
+	assert resp.status_code == 304
+	assert resp.get_data() == b''
+	assert resp.headers['ETag'] == etag
+	assert statements == []
+
+	# Filtros diferentes têm ETags diferentes
+	assert testing_client.get('/api/v1/trails?difficulty=facil').headers['ETag'] != etag
+
+
+def test_etag_changes_after_write(testing_client, admin_client):
+	_seed()
+	etag = testing_client.get('/api/v1/trails').headers['ETag']
+	trail = Trail.query.filter_by(name='Trilha Fácil').one()
+
+	admin_client.post(f'/admin/trails/{trail.id}/toggle')
+
+	resp = testing_client.get('/api/v1/trails', headers={'If-None-Match': etag})
+	assert resp.status_code == 200
+	assert resp.headers['ETag'] != etag
+	assert 'Trilha Fácil' not in [t['name'] for t in resp.get_json()['items']]
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+from src.app import db
+from src.app.archive import archive_events, events_autoincrement
+from src.app.cli import upgrade_db
+from src.app.counters import counter_stats, recount
+from src.app.models import Park, Event, EventArchive
+from src.app.search import search
+
+
+def _add_events(park, *days):
+	"""Um evento de 2h para cada deslocamento (em dias) a partir de agora."""
+	now = datetime.utcnow()
+	events = [
+		Event(park_id=park.id, title=f'Evento {day:+d}', description='Observação de aves',
+		      start_datetime=now + timedelta(days=day), end_datetime=now + timedelta(days=day, hours=2),
+		      is_active=True)
+		for day in days
+	]
+	db.session.add_all(events)
+	db.session.commit()
+	return events
+
+
+def test_archive_moves_finished_events_in_batches(testing_app):
+	park = Park.query.first()
+	_add_events(park, -90, -60, -45, -10, 5)
+	recount(db.session.connection())
+	db.session.commit()
+
+	result = archive_events(datetime.utcnow() - timedelta(days=30), batch_size=2)
+
+	assert (result.archived, result.batches) == (3, 2)
+	assert sorted(e.title for e in Event.query) == ['Evento +5', 'Evento -10']
+	archived = EventArchive.query.order_by(EventArchive.start_datetime).all()
+	assert [e.title for e in archived] == ['Evento -90', 'Evento -60', 'Evento -45']
+	assert all(e.archived_at is not None for e in archived)
+	stats = counter_stats()
+	assert (stats['events_count'], stats['events_active'], stats['events_archived']) == (2, 2, 3)
+	# Arquivados saem da busca pelos gatilhos de events
+	assert {hit.title for hit in search('aves')} == {'Evento +5', 'Evento -10'}
+
+
+def test_archived_ids_are_not_reused(testing_app):
+	park = Park.query.first()
+	old_id = _add_events(park, -60)[0].id
+
+	archive_events(datetime.utcnow() - timedelta(days=30))
+	new, = _add_events(park, 3)
+
+	assert new.id > old_id
+
+
+def test_upgrade_db_rebuilds_events_with_autoincrement(testing_app):
+	park = Park.query.first()
+	_add_events(park, -60, 3)
+	# Banco anterior: events sem AUTOINCREMENT
+	db.session.execute(db.text('CREATE TABLE events_old AS SELECT * FROM events'))
+	db.session.execute(db.text('DROP TABLE events'))
+	db.session.execute(db.text(
+		'CREATE TABLE events (id INTEGER PRIMARY KEY, park_id INTEGER NOT NULL, title VARCHAR(200) NOT NULL, '
+		'description TEXT, start_datetime DATETIME NOT NULL, end_datetime DATETIME NOT NULL, '
+		'is_active BOOLEAN NOT NULL)'))
+	db.session.execute(db.text('INSERT INTO events SELECT * FROM events_old'))
+	db.session.execute(db.text('DROP TABLE events_old'))
+	db.session.commit()
+	assert not events_autoincrement(db.session.connection())
+
+	upgrade_db(testing_app)
+
+	assert events_autoincrement(db.session.connection())
+	assert Event.query.count() == 2
+	assert {hit.title for hit in search('aves')} == {'Evento -60', 'Evento +3'}
+	assert archive_events(datetime.utcnow() - timedelta(days=30)).archived == 1
+
+
+def test_admin_lists_current_archived_and_all_events(testing_app, admin_client):
+	park = Park.query.first()
+	_add_events(park, -60, 3)
+	archive_events(datetime.utcnow() - timedelta(days=30))
+
+	current = admin_client.get('/admin/events').get_data(as_text=True)
+	archived = admin_client.get('/admin/events?scope=archived').get_data(as_text=True)
+	both = admin_client.get('/admin/events?scope=all').get_data(as_text=True)
+
+	assert 'Evento +3' in current and 'Evento -60' not in current
+	assert 'Evento -60' in archived and 'Evento +3' not in archived and 'Arquivado' in archived
+	assert 'Evento -60' in both and 'Evento +3' in both
+	assert both.index('Evento +3') < both.index('Evento -60')
+	assert 'Parque Teste' in both
+	assert admin_client.get('/admin/events?scope=lixo').status_code == 400
+
+
+def test_admin_union_listing_pages_across_tables(testing_app, admin_client):
+	testing_app.config['ADMIN_PAGE_SIZE'] = 2
+	park = Park.query.first()
+	_add_events(park, -90, -60, 3, 4)
+	archive_events(datetime.utcnow() - timedelta(days=30))
+
+	first = admin_client.get('/admin/events?scope=all').get_data(as_text=True)
+	assert 'Evento +4' in first and 'Evento +3' in first and 'scope=all' in first
+	after = first.split('after=')[1].split('&')[0].split('"')[0]
+	second = admin_client.get(f'/admin/events?scope=all&after={after}').get_data(as_text=True)
+	assert 'Evento -60' in second and 'Evento -90' in second and 'Evento +3' not in second
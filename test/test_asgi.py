@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('asgiref')
+
+from src.app import db
+from src.app.asgi import create_asgi_app
+from src.app.models import Park
+
+
+@pytest.fixture()
+def asgi_app(tmp_path):
+	app = create_asgi_app('testing', overrides={'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "asgi.db"}'})
+	with app.flask_app.app_context():
+		db.create_all()
+		db.session.add(Park(name='Parque Assíncrono', description='Descrição', type='Estadual', location='Teresópolis'))
+		db.session.commit()
+	yield app
+	asyncio.run(app.engine.dispose())
+
+
+def request(app, path, method='GET', query_string=b''):
+	"""Executa uma requisição ASGI e retorna (status, cabeçalhos, corpo)."""
+	scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query_string,
+	         'headers': [], 'http_version': '1.1', 'scheme': 'http',
+	         'server': ('localhost', 80), 'client': ('127.0.0.1', 50000)}
+	messages = []
+
+	async def receive():
+		return {'type': 'http.request', 'body': b''}
+
+	async def send(message):
+		messages.append(message)
+
+	asyncio.run(app(scope, receive, send))
+	start = messages[0]
+	body = b''.join(m.get('body', b'') for m in messages[1:])
+	return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, body.decode()
+
+
+def test_public_pages_use_async_engine(asgi_app):
+	from sqlalchemy import event
+
+	sync_statements = []
+	with asgi_app.flask_app.app_context():
+		engine = db.engine
+	event.listen(engine, 'before_cursor_execute', lambda *args: sync_statements.append(args[2]))
+
+	park_id = 1
+	for path in ('/', '/parks', f'/parks/{park_id}', f'/parks/{park_id}/calendar', '/trails', '/events', '/about'):
+		status, headers, body = request(asgi_app, path)
+		assert status == 200, path
+	status, headers, body = request(asgi_app, '/parks')
+	assert 'Parque Assíncrono' in body
+	assert 'queries' in headers['server-timing']
+
+	status, _, body = request(asgi_app, '/search', query_string=b'q=assincrono')
+	assert status == 200
+	assert '<mark>' in body
+
+	assert request(asgi_app, '/parks/999')[0] == 404
+	assert asgi_app.async_requests == 10
+	assert sync_statements == []
+
+
+def test_admin_and_head_requests(asgi_app):
+	status, _, body = request(asgi_app, '/admin/login')
+	assert status == 200
+	assert asgi_app.async_requests == 0
+
+	status, headers, body = request(asgi_app, '/parks', method='HEAD')
+	assert status == 200
+	assert body == ''
+	assert asgi_app.async_requests == 1
@@ -0,0 +1,50 @@
+import gzip
+import re
+
+from src.app import create_app
+from src.app.assets import build_assets
+
+
+def test_build_assets_writes_hashed_minified_bundles(tmp_path):
+	app = create_app('testing')
+	manifest = build_assets(app.static_folder, tmp_path)
+
+	css = manifest['css/main.css']
+	assert re.fullmatch(r'dist/main\.[0-9a-f]{10}\.css', css)
+	built = (tmp_path / css.split('/')[-1]).read_bytes()
+	with open(f'{app.static_folder}/css/main.css', 'rb') as f:
+		source = f.read()
+	assert 0 < len(built) < len(source)
+	assert b'/*' not in built
+	assert gzip.decompress((tmp_path / f"{css.split('/')[-1]}.gz").read_bytes()) == built
+
+	# Mesmo conteúdo, mesmo nome
+	assert build_assets(app.static_folder, tmp_path) == manifest
+
+
+def test_static_urls_use_manifest_and_serve_precompressed(tmp_path):
+	app = create_app('testing')
+	manifest = build_assets(app.static_folder, tmp_path)
+	app = create_app('testing', overrides={'ASSETS_USE_MANIFEST': True, 'ASSETS_DIST_FOLDER': str(tmp_path)})
+	client = app.test_client()
+
+	with app.app_context():
+		from src.app import db
+		db.create_all()
+		html = client.get('/about').get_data(as_text=True)
+	url = f"/static/{manifest['css/main.css']}"
+	assert url in html
+
+	resp = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+	assert resp.status_code == 200
+	assert resp.headers['Content-Encoding'] == 'gzip'
+	assert resp.mimetype == 'text/css'
+	assert 'Accept-Encoding' in resp.headers['Vary']
+	plain = client.get(url)
+	assert 'Content-Encoding' not in plain.headers
+	for response in (resp, plain):
+		assert sorted(response.headers['Cache-Control'].split(', ')) == ['immutable', 'max-age=31536000', 'public']
+	assert gzip.decompress(resp.data) == plain.data
+
+	# Arquivos fora dos pacotes continuam servidos normalmente
+	assert client.get('/static/css/style.css').status_code == 200
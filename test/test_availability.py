@@ -0,0 +1,72 @@
+from datetime import date, datetime, timedelta
+
+from src.app import db
+from src.app.availability import Hours, sweep, open_status, resolve
+from src.app.models import Park, AvailabilityPeriod
+
+
+def _hours(id, start, end, park_id=1, opens='08:00', closes='17:00'):
+	from datetime import time
+	return Hours(id, park_id, f'P{id}', opens, closes, start, end, time.fromisoformat(opens), time.fromisoformat(closes))
+
+
+def test_sweep_picks_latest_start_then_shortest_then_highest_id():
+	season = _hours(1, date(2025, 1, 1), date(2025, 1, 31))
+	holiday = _hours(2, date(2025, 1, 10), date(2025, 1, 12), closes='12:00')
+	twin_a = _hours(3, date(2025, 1, 20), date(2025, 1, 21))
+	twin_b = _hours(4, date(2025, 1, 20), date(2025, 1, 21))
+
+	segments = sweep([twin_b, holiday, season, twin_a], date(2025, 1, 5), date(2025, 2, 3))[1]
+
+	assert [(s.start.day, s.end.day, s.hours.id) for s in segments] == [
+		(5, 9, 1), (10, 12, 2), (13, 19, 1), (20, 21, 4), (22, 31, 1),
+	]
+
+
+def test_resolve_handles_year_wrap_in_one_query(testing_app, count_queries):
+	park = Park.query.first()
+	other = Park(name='Outro', type='Estadual')
+	db.session.add(other)
+	db.session.flush()
+	db.session.add_all([
+		# Cadastrado como 01/12 a 15/03 do mesmo ano: termina em março do ano seguinte
+		AvailabilityPeriod(park_id=park.id, season_name='Verão', open_time='08:00', close_time='17:00',
+		                   start_date=date(2025, 12, 1), end_date=date(2025, 3, 15)),
+		AvailabilityPeriod(park_id=other.id, season_name='Ano todo', open_time='09:00', close_time='16:00',
+		                   start_date=date(2025, 1, 1), end_date=date(2026, 12, 31)),
+	])
+	db.session.commit()
+
+	calendar, statements = count_queries(resolve, date(2026, 1, 1), date(2026, 1, 31))
+
+	assert len(statements) == 1
+	assert calendar[park.id][0].hours.season_name == 'Verão'
+	assert calendar[park.id][0].hours.end_date == date(2026, 3, 15)
+	assert set(calendar) == {park.id, other.id}
+
+	statuses = open_status(datetime(2026, 1, 10, 16, 30))
+	assert statuses[park.id].is_open
+	assert statuses[park.id].next_change == datetime(2026, 1, 10, 17, 0)
+	assert not statuses[other.id].is_open
+	assert statuses[other.id].next_change == datetime(2026, 1, 11, 9, 0)
+
+
+def test_parks_badge_and_calendar_pages(testing_client, count_queries):
+	park = Park.query.first()
+	today = date.today()
+	db.session.add(AvailabilityPeriod(park_id=park.id, season_name='Sempre aberto', open_time='00:00',
+	                                  close_time='23:59', start_date=today - timedelta(days=5),
+	                                  end_date=today + timedelta(days=5)))
+	db.session.commit()
+
+	html = testing_client.get('/parks').get_data(as_text=True)
+	assert 'Aberto agora' in html or 'Fechado agora' in html
+
+	resp, statements = count_queries(testing_client.get, f'/parks/{park.id}/calendar?days=20')
+	html = resp.get_data(as_text=True)
+	assert resp.status_code == 200
+	assert 'Sempre aberto' in html and 'Fechado' in html
+	assert len([s for s in statements if 'availability_periods' in s]) == 1
+
+	assert testing_client.get('/parks/999/calendar').status_code == 404
+	assert testing_client.get(f'/parks/{park.id}/calendar?start=ontem').status_code == 400
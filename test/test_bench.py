@@ -0,0 +1,28 @@
+import copy
+
+from src.app.bench import BenchScale, generate, ensure_bench_admin, bench_paths, run_client, build_report, compare
+from src.app.counters import counter_stats
+from src.app.models import Trail
+
+
+def test_bench_generates_data_and_reports_every_read_route(testing_app):
+	counts = generate(BenchScale(parks=2, trails=30, events=40, biodiversity=20, availability=2))
+	ensure_bench_admin()
+	assert Trail.query.count() == 30
+	assert counter_stats()['trails_count'] == 30
+
+	paths = bench_paths(testing_app)
+	endpoints = {endpoint for endpoint, _ in paths}
+	assert {'public.index', 'public.park_detail', 'admin.dashboard', 'admin.trail_edit'} <= endpoints
+	assert not endpoints & {'admin.trail_delete', 'admin.logout', 'admin.export'}
+
+	results, elapsed = run_client(testing_app, paths, requests_per_path=3, warmup=0)
+	report = build_report(results, elapsed, {'rows': counts})
+	assert report['total']['requests'] == 3 * len(paths)
+	assert report['total']['errors'] == 0
+	assert report['paths']['/admin/']['queries_per_request'] is not None
+
+	assert compare(report, report) == []
+	baseline = copy.deepcopy(report)
+	baseline['paths']['/admin/trails']['queries_per_request'] -= 1
+	assert [r for r in compare(report, baseline) if r.startswith('/admin/trails:')]
@@ -0,0 +1,105 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.app import db
+from src.app.bulk import MAX_SHIFT_DAYS, set_trails_open, delete_events, shift_availability
+from src.app.counters import counter_stats, recount
+from src.app.models import Park, Trail, Event, AvailabilityPeriod
+from src.app.signals import data_changed
+
+
+def _seed(count_parks=2):
+	parks = []
+	now = datetime.utcnow()
+	for p in range(count_parks):
+		park = Park(name=f'Parque {p}', type='Estadual')
+		db.session.add(park)
+		db.session.flush()
+		parks.append(park.id)
+		db.session.add_all(Trail(park_id=park.id, name=f'Trilha {p}-{i}', difficulty='moderada', is_open=i != 0)
+		                   for i in range(3))
+		db.session.add_all(Event(park_id=park.id, title=f'Evento {p}-{i}', start_datetime=now + timedelta(days=i + 1),
+		                         end_datetime=now + timedelta(days=i + 1, hours=2), is_active=True)
+		                   for i in range(3))
+		db.session.add(AvailabilityPeriod(park_id=park.id, season_name=f'Temporada {p}', open_time='08:00',
+		                                  close_time='17:00', start_date=date(2025, 1, 1), end_date=date(2025, 3, 31)))
+	db.session.commit()
+	recount(db.session.connection())
+	db.session.commit()
+	return parks
+
+
+def test_bulk_close_trails_of_a_park_in_one_statement(testing_app, count_queries):
+	park_a, park_b = _seed()
+	invalidations = []
+
+	def receiver(sender, **kwargs):
+		invalidations.append(kwargs)
+
+	with data_changed.connected_to(receiver, sender=testing_app):
+		result, statements = count_queries(set_trails_open, False, park_id=park_a)
+
+	assert result.affected == 2  # a terceira já estava fechada
+	assert result.park_ids == {park_a}
+	assert len([s for s in statements if s.lstrip().upper().startswith('UPDATE TRAILS')]) == 1
+	assert invalidations == [{'entity': 'trail', 'park_ids': {park_a}}]
+	assert Trail.query.filter_by(park_id=park_a, is_open=True).count() == 0
+	assert Trail.query.filter_by(park_id=park_b, is_open=True).count() == 2
+	assert counter_stats()['trails_open'] == 2
+
+
+def test_bulk_delete_and_shift_keep_counters(testing_app):
+	park_a, park_b = _seed()
+	ids = [e.id for e in Event.query.filter_by(park_id=park_a)][:2]
+
+	assert delete_events(ids=ids).affected == 2
+	assert shift_availability(7, park_id=park_b).affected == 1
+
+	stats = counter_stats()
+	assert (stats['events_count'], stats['events_active']) == (4, 4)
+	period = AvailabilityPeriod.query.filter_by(park_id=park_b).one()
+	assert (period.start_date, period.end_date) == (date(2025, 1, 8), date(2025, 4, 7))
+	with pytest.raises(ValueError):
+		delete_events()
+	with pytest.raises(ValueError):
+		shift_availability(MAX_SHIFT_DAYS + 1, park_id=park_b)
+
+
+def test_bulk_admin_endpoints(testing_app, admin_client):
+	park_a, park_b = _seed()
+	trail_ids = [t.id for t in Trail.query.filter_by(park_id=park_b, is_open=True)]
+
+	page = admin_client.get('/admin/trails').get_data(as_text=True)
+	assert 'name="ids"' in page and 'form="bulk-form"' in page
+
+	resp = admin_client.post('/admin/trails/bulk', data={'action': 'close', 'ids': trail_ids},
+	                         follow_redirects=True)
+	assert '2 trilha(s) fechadas.' in resp.get_data(as_text=True)
+	assert Trail.query.filter_by(is_open=True).count() == 2
+
+	tomorrow = (datetime.utcnow() + timedelta(days=1)).date().isoformat()
+	resp = admin_client.post('/admin/events/bulk', data={
+		'action': 'deactivate', 'park_id': park_a, 'start': tomorrow, 'end': tomorrow,
+	}, follow_redirects=True)
+	assert '1 evento(s) desativado(s).' in resp.get_data(as_text=True)
+	assert Event.query.filter_by(is_active=False).count() == 1
+
+	resp = admin_client.post('/admin/availability/bulk', data={'days': '-1', 'park_id': park_a},
+	                         follow_redirects=True)
+	assert '1 período(s) deslocado(s) em -1 dia(s).' in resp.get_data(as_text=True)
+	resp = admin_client.post('/admin/availability/bulk', data={'days': '3000000', 'park_id': park_a},
+	                         follow_redirects=True)
+	assert f'O deslocamento deve ficar entre -{MAX_SHIFT_DAYS} e {MAX_SHIFT_DAYS} dias.' in resp.get_data(as_text=True)
+	assert AvailabilityPeriod.query.filter_by(park_id=park_a).one().start_date == date(2024, 12, 31)
+
+	# Sem eventos marcados nem parque nada é alterado, mesmo com datas
+	resp = admin_client.post('/admin/events/bulk', data={'action': 'delete'}, follow_redirects=True)
+	assert 'Marque eventos ou escolha um parque.' in resp.get_data(as_text=True)
+	resp = admin_client.post('/admin/events/bulk', data={'action': 'delete', 'start': tomorrow},
+	                         follow_redirects=True)
+	assert 'Marque eventos ou escolha um parque.' in resp.get_data(as_text=True)
+	assert Event.query.count() == 6
+	assert admin_client.post('/admin/events/bulk', data={'action': 'x', 'park_id': park_a}).status_code == 400
+	assert admin_client.post('/admin/events/bulk', data={'action': 'delete', 'park_id': park_a,
+	                                                     'start': 'ontem'}).status_code == 400
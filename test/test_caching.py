@@ -0,0 +1,163 @@
+from src.app import db
+from src.app.models import Park, Trail
+from src.app.page_cache import PageCache
+
+
+def _add_park_with_trail(name):
+	park = Park(name=name, type='Estadual')
+	db.session.add(park)
+	db.session.flush()
+	trail = Trail(park_id=park.id, name=f'Trilha {name}', difficulty='moderada', is_open=True)
+	db.session.add(trail)
+	db.session.commit()
+	return park.id, trail.id
+
+
+def test_public_pages_are_served_from_cache(testing_client, count_queries):
+	first = testing_client.get('/trails?difficulty=facil')
+	assert first.headers['X-Page-Cache'] == 'MISS'
+
+	# 'facil' e 'fácil' normalizam para a mesma chave
+	second, statements = count_queries(testing_client.get, '/trails?difficulty=fácil')
+	assert second.headers['X-Page-Cache'] == 'HIT'
+	assert statements == []
+	assert second.get_data() == first.get_data()
+
+
+def test_trail_edit_only_evicts_pages_of_its_park(testing_app, admin_client):
+	park_a, trail_a = _add_park_with_trail('A')
+	park_b, _ = _add_park_with_trail('B')
+	urls = ['/', '/trails', f'/trails?park_id={park_a}', f'/trails?park_id={park_b}',
+	        f'/parks/{park_a}', f'/parks/{park_b}', '/events']
+	for url in urls:
+		admin_client.get(url)
+
+	resp = admin_client.post(f'/admin/trails/{trail_a}/toggle', follow_redirects=True)
+	assert resp.status_code == 200
+
+	cache_state = {url: admin_client.get(url).headers['X-Page-Cache'] for url in urls}
+	assert cache_state == {
+		'/': 'MISS',
+		'/trails': 'MISS',
+		f'/trails?park_id={park_a}': 'MISS',
+		f'/trails?park_id={park_b}': 'MISS',
+		f'/parks/{park_a}': 'MISS',
+		f'/parks/{park_b}': 'HIT',
+		'/events': 'HIT',
+	}
+	assert testing_app.extensions['page_cache'].stats()['invalidations'] == 5
+
+
+def test_trail_write_refreshes_facet_counts_of_other_parks(testing_app, admin_client):
+	park_a, trail_a = _add_park_with_trail('A')
+	park_b, _ = _add_park_with_trail('B')
+	url = f'/trails?park_id={park_b}'
+	assert 'A (1)' in admin_client.get(url).get_data(as_text=True)
+
+	admin_client.post(f'/admin/trails/{trail_a}/toggle', follow_redirects=True)
+
+	resp = admin_client.get(url)
+	assert resp.headers['X-Page-Cache'] == 'MISS'
+	html = resp.get_data(as_text=True)
+	assert 'A (0)' in html and 'A (1)' not in html
+
+
+def test_page_cache_is_bounded_and_expires():
+	cache = PageCache(max_entries=2, ttl=60)
+	cache.set(('a',), 'A')
+	cache.set(('b',), 'B')
+	assert cache.get(('a',)) == 'A'   # 'a' passa a ser o mais recente
+	cache.set(('c',), 'C')            # remove 'b'
+	assert cache.get(('b',)) is None
+	cache.set(('d',), 'D', ttl=0)
+	assert cache.get(('d',)) is None
+
+	stats = cache.stats()
+	assert stats['evictions'] == 2
+	assert stats['expirations'] == 1
+	assert stats['hits'] == 1
+
+
+def test_park_catalog_is_shared_and_rebuilt_after_park_write(testing_app, admin_client, count_queries):
+	from src.app.catalog import park_catalog
+
+	first = park_catalog()
+	again, statements = count_queries(park_catalog)
+	assert again is first
+	assert statements == []
+
+	resp = admin_client.post('/admin/parks/new', data={'name': 'Parque Novo', 'type': 'Nacional'})
+	assert resp.status_code == 302
+
+	rebuilt = park_catalog()
+	assert rebuilt is not first
+	assert rebuilt.version > first.version
+	assert 'Parque Novo' in [name for _, name in rebuilt.choices()]
+
+
+def test_park_catalog_detects_writes_from_other_processes(testing_app, testing_client):
+	from src.app.catalog import park_catalog
+	from src.app.versions import bump
+
+	testing_client.get('/parks')
+	before = park_catalog()
+
+	# Outro processo renomeia o parque e incrementa a versão de 'parks'
+	with db.engine.begin() as conn:
+		conn.execute(db.text("UPDATE parks SET name = 'Parque Renomeado'"))
+		bump(conn, 'parks')
+	testing_app.extensions['data_versions'].recheck_seconds = 0
+
+	resp = testing_client.get('/parks')
+	assert resp.headers['X-Page-Cache'] == 'MISS'
+	assert 'Parque Renomeado' in resp.get_data(as_text=True)
+	assert park_catalog().version == before.version + 1
+
+
+def test_park_catalog_builds_once_under_concurrent_readers(testing_app, monkeypatch):
+	import threading
+	from src.app.catalog import ParkCatalog
+
+	catalog = testing_app.extensions['park_catalog']
+	builds = []
+	original_build = ParkCatalog._build
+
+	def counting_build(version):
+		builds.append(version)
+		return original_build(version)
+
+	monkeypatch.setattr(ParkCatalog, '_build', staticmethod(counting_build))
+	results = []
+
+	def reader():
+		with testing_app.app_context():
+			results.append(catalog.get())
+
+	threads = [threading.Thread(target=reader) for _ in range(8)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+
+	assert len(builds) == 1
+	assert len({id(snapshot) for snapshot in results}) == 1
+
+
+def test_public_pages_are_cookieless_and_http_cacheable(testing_client):
+	resp = testing_client.get('/trails')
+	assert resp.status_code == 200
+	assert 'Set-Cookie' not in resp.headers
+	assert 'Cookie' not in resp.headers.get('Vary', '')
+	assert 'Accept-Encoding' in resp.headers['Vary']
+	assert resp.cache_control.public and resp.cache_control.max_age == 60
+	assert resp.last_modified is not None
+
+	revalidated = testing_client.get('/trails', headers={'If-Modified-Since': resp.headers['Last-Modified']})
+	assert revalidated.status_code == 304
+
+
+def test_admin_templates_still_get_csrf_token(admin_client):
+	resp = admin_client.get('/admin/parks')
+	assert resp.status_code == 200
+	assert 'name="csrf_token" value="' in resp.get_data(as_text=True)
+	assert not resp.cache_control.public
@@ -0,0 +1,246 @@
+from datetime import datetime, timedelta, date
+
+from sqlalchemy import inspect
+
+from src.app import db
+from src.app.cli import upgrade_db, check_query_plans, tables_to_rebuild
+from src.app.counters import aggregate_stats, counter_stats, recount
+from src.app.search import search
+from src.app.models import Park, Trail, Event, AvailabilityPeriod, BiodiversityItem
+
+
+def _seed_rows():
+	park = Park.query.first()
+	now = datetime.utcnow()
+	db.session.add_all([
+		Trail(park_id=park.id, name='Trilha A', difficulty='moderada', is_open=True),
+		Event(park_id=park.id, title='Evento A', start_datetime=now + timedelta(days=1),
+		      end_datetime=now + timedelta(days=1, hours=2), is_active=True),
+		AvailabilityPeriod(park_id=park.id, season_name='Temporada', open_time='08:00', close_time='17:00',
+		                   start_date=date.today() - timedelta(days=1), end_date=date.today() + timedelta(days=1)),
+		BiodiversityItem(park_id=park.id, name='Bromélia', type='flora'),
+	])
+	db.session.commit()
+
+
+def test_upgrade_db_creates_missing_indexes(testing_app):
+	db.session.execute(db.text('DROP INDEX ix_events_active_start'))
+	db.session.commit()
+	_seed_rows()
+
+	created = upgrade_db(testing_app)
+
+	assert created == ['ix_events_active_start']
+	names = {ix['name'] for ix in inspect(db.engine).get_indexes('events')}
+	assert 'ix_events_active_start' in names
+	# Nenhum dado foi perdido
+	assert Event.query.count() == 1
+
+
+def test_upgrade_db_adds_missing_columns(testing_app):
+	db.session.execute(db.text("INSERT INTO admin_users (name, email, password_hash, created_at) "
+	                           "VALUES ('Antigo', 'antigo@teste.com', 'x', '2024-01-01')"))
+	db.session.execute(db.text('ALTER TABLE admin_users DROP COLUMN credential_version'))
+	db.session.commit()
+
+	upgrade_db(testing_app)
+
+	columns = {c['name'] for c in inspect(db.engine).get_columns('admin_users')}
+	assert 'credential_version' in columns
+	assert db.session.execute(db.text('SELECT credential_version FROM admin_users')).scalar() == 1
+
+
+def test_public_queries_use_indexes(testing_app):
+	_seed_rows()
+
+	results = check_query_plans(testing_app)
+
+	assert results
+	assert [r for r in results if not r[3]] == []
+
+
+def _seed_many_parks(n):
+	now = datetime.utcnow()
+	for i in range(n):
+		park = Park(name=f'Parque {i}', type='Estadual')
+		db.session.add(park)
+		db.session.flush()
+		db.session.add(Trail(park_id=park.id, name=f'Trilha {i}', difficulty='fácil', is_open=True))
+		db.session.add(Event(park_id=park.id, title=f'Evento {i}', start_datetime=now + timedelta(days=i + 1),
+		                     end_datetime=now + timedelta(days=i + 1, hours=3), is_active=True))
+		db.session.add(AvailabilityPeriod(park_id=park.id, season_name=f'Temporada {i}', open_time='08:00',
+		                                  close_time='17:00', start_date=date.today(), end_date=date.today()))
+	db.session.commit()
+	db.session.expunge_all()
+
+
+def test_listings_load_parks_without_n_plus_one(admin_client, count_queries):
+	_seed_many_parks(8)
+
+	for url in ('/', '/trails', '/events', '/admin/trails', '/admin/events', '/admin/availability'):
+		resp, statements = count_queries(admin_client.get, url)
+		assert resp.status_code == 200
+		assert 'Parque 7' in resp.get_data(as_text=True)
+		park_lookups = [s for s in statements if 'FROM parks' in s and 'WHERE parks.id' in s]
+		assert park_lookups == [], url
+
+
+def test_retry_on_busy_retries_only_lock_errors(testing_app):
+	from sqlalchemy.exc import OperationalError
+	from src.app.database import retry_on_busy
+
+	calls = []
+
+	@retry_on_busy(attempts=3, base_delay=0.001)
+	def flaky(error):
+		calls.append(error)
+		if len(calls) < 3:
+			raise OperationalError('UPDATE trails', {}, Exception(error))
+		return 'ok'
+
+	assert flaky('database is locked') == 'ok'
+	assert len(calls) == 3
+
+	calls.clear()
+	try:
+		flaky('no such table: trails')
+	except OperationalError:
+		pass
+	assert len(calls) == 1
+
+
+def test_production_profile_readers_run_alongside_admin_writer(tmp_path):
+	import threading
+	from src.app import create_app
+	from src.app.config import ProductionConfig
+	from src.app.models import AdminUser
+
+	app = create_app('testing', overrides={
+		'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "concorrencia.db"}',
+		'SQLITE_PRAGMAS': ProductionConfig.SQLITE_PRAGMAS,
+		'SQLALCHEMY_ENGINE_OPTIONS': ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS,
+		'PAGE_CACHE_ENABLED': False,
+	})
+	with app.app_context():
+		db.create_all()
+		assert db.session.execute(db.text('PRAGMA journal_mode')).scalar() == 'wal'
+		park = Park(name='Parque Concorrente', type='Estadual')
+		admin = AdminUser(name='Admin', email='admin@teste.com')
+		admin.set_password('secret123')
+		db.session.add_all([park, admin])
+		db.session.commit()
+		park_id = park.id
+
+	errors = []
+	writes = 20
+	writer_done = threading.Event()
+
+	def writer():
+		try:
+			client = app.test_client()
+			client.post('/admin/login', data={'email': 'admin@teste.com', 'password': 'secret123'})
+			for i in range(writes):
+				resp = client.post('/admin/trails/new', data={
+					'park_id': park_id, 'name': f'Trilha {i:02d}', 'difficulty': 'moderada', 'is_open': 'y',
+				})
+				if resp.status_code != 302:
+					errors.append(('writer', resp.status_code))
+		except Exception as exc:  # pragma: no cover - falha reportada abaixo
+			errors.append(('writer', exc))
+		finally:
+			writer_done.set()
+
+	def reader():
+		try:
+			client = app.test_client()
+			while not writer_done.is_set():
+				for url in ('/trails', f'/parks/{park_id}', '/api/v1/trails'):
+					resp = client.get(url)
+					if resp.status_code != 200:
+						errors.append((url, resp.status_code))
+		except Exception as exc:  # pragma: no cover - falha reportada abaixo
+			errors.append(('reader', exc))
+
+	threads = [threading.Thread(target=reader) for _ in range(4)] + [threading.Thread(target=writer)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join(timeout=60)
+
+	assert errors == []
+	with app.app_context():
+		assert Trail.query.count() == writes
+		db.session.remove()
+		db.engine.dispose()
+
+
+def test_upgrade_db_converts_difficulty_to_codes(testing_app):
+	park = Park.query.first()
+	db.session.add_all([
+		Trail(park_id=park.id, name='A', difficulty='Difícil', is_open=True),
+		Trail(park_id=park.id, name='B', difficulty='fácil', is_open=True),
+		Trail(park_id=park.id, name='C', difficulty='moderada', is_open=True),
+	])
+	db.session.commit()
+
+	upgrade_db(testing_app)
+
+	db.session.expire_all()
+	assert sorted(t.difficulty for t in Trail.query) == ['dificil', 'facil', 'moderada']
+
+
+def test_park_delete_cascades_in_the_database(testing_app, admin_client, count_queries):
+	park = Park.query.first()
+	other = Park(name='Outro Parque', type='Estadual')
+	db.session.add(other)
+	db.session.commit()
+	_seed_rows()
+	db.session.add_all(BiodiversityItem(park_id=park.id, name=f'Espécie {i}', type='flora') for i in range(200))
+	db.session.add(Trail(park_id=other.id, name='Trilha do Outro', difficulty='facil', is_open=True))
+	db.session.commit()
+	recount(db.session.connection())
+	db.session.commit()
+	park_id = park.id
+
+	resp, statements = count_queries(admin_client.post, f'/admin/parks/{park_id}/delete')
+
+	assert resp.status_code == 302
+	# Nenhum filho é carregado pelo ORM
+	assert not [s for s in statements if 'FROM biodiversity_items' in s and 'count' not in s.lower()]
+	assert len(statements) < 20
+	for model in (Trail, Event, AvailabilityPeriod, BiodiversityItem):
+		assert model.query.filter_by(park_id=park_id).count() == 0
+	assert Trail.query.count() == 1
+	assert search('Bromélia') == []
+	stats = counter_stats()
+	assert (stats['parks_count'], stats['trails_count'], stats['events_count']) == (1, 1, 0)
+	assert stats == aggregate_stats()
+
+
+def test_upgrade_db_adds_on_delete_cascade(testing_app):
+	_seed_rows()
+	park_id = Park.query.first().id
+	# Banco anterior: trilhas sem ON DELETE CASCADE
+	db.session.execute(db.text('PRAGMA foreign_keys=OFF'))
+	db.session.execute(db.text('ALTER TABLE trails RENAME TO trails_old'))
+	db.session.execute(db.text(
+		'CREATE TABLE trails (id INTEGER PRIMARY KEY, park_id INTEGER NOT NULL REFERENCES parks (id), '
+		'name VARCHAR(200) NOT NULL, difficulty VARCHAR(50) NOT NULL, duration_estimated VARCHAR(50), '
+		'description TEXT, is_open BOOLEAN NOT NULL)'))
+	db.session.execute(db.text('INSERT INTO trails SELECT * FROM trails_old'))
+	db.session.execute(db.text('DROP TABLE trails_old'))
+	db.session.commit()
+	db.session.execute(db.text('PRAGMA foreign_keys=ON'))
+	assert [t.name for t in tables_to_rebuild(db.session.connection())] == ['trails']
+
+	upgrade_db(testing_app)
+
+	assert tables_to_rebuild(db.session.connection()) == []
+	assert db.session.execute(db.text('PRAGMA foreign_keys')).scalar() == 1
+	assert Trail.query.count() == 1
+	assert 'ix_trails_park_name' in {ix['name'] for ix in inspect(db.engine).get_indexes('trails')}
+	assert [r.title for r in search('Trilha')] != []
+	db.session.execute(db.text('DELETE FROM parks WHERE id = :id'), {'id': park_id})
+	db.session.commit()
+	assert Trail.query.count() == 0
+	assert BiodiversityItem.query.count() == 0
@@ -0,0 +1,87 @@
+import json
+
+from src.app import db
+from src.app.counters import counter_stats
+from src.app.importer import import_file, import_rows, read_rows
+from src.app.models import Trail, Event
+
+
+def _write_csv(path, lines):
+	path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+	return str(path)
+
+
+def test_import_trails_upserts_in_batches(testing_app, tmp_path, count_queries):
+	path = _write_csv(tmp_path / 'trilhas.csv', [
+		'park,name,difficulty,duration_estimated,is_open',
+		*[f'Parque Teste,Trilha {i},moderada,2h,sim' for i in range(25)],
+		'Parque Teste,Trilha 0,difícil,5h,não',
+		'Parque Inexistente,Trilha X,fácil,,sim',
+		'Parque Teste,Trilha Y,impossível,,sim',
+	])
+
+	result, statements = count_queries(import_rows, 'trails', read_rows(path), batch_size=10)
+
+	assert (result.read, result.inserted, result.updated, result.invalid) == (28, 25, 1, 2)
+	assert [line for line, _ in result.errors] == [28, 29]
+	assert 'parque desconhecido' in result.errors[0][1]
+	# Uma consulta de parques e poucas instruções por lote, não uma por linha
+	assert len(statements) < 30
+	assert Trail.query.count() == 25
+	first = Trail.query.filter_by(name='Trilha 0').one()
+	assert (first.difficulty, first.duration_estimated, first.is_open) == ('dificil', '5h', False)
+
+	stats = counter_stats()
+	assert stats['trails_count'] == 25
+	assert stats['trails_open'] == 24
+
+
+def test_import_dry_run_validates_without_writing(testing_app, tmp_path, capsys):
+	path = tmp_path / 'eventos.ndjson'
+	path.write_text('\n'.join([
+		json.dumps({'park': 'Parque Teste', 'title': 'Mutirão', 'start_datetime': '2030-01-05T09:00:00',
+		            'end_datetime': '2030-01-05T12:00'}),
+		json.dumps({'park': 'Parque Teste', 'title': 'Sem data'}),
+		'{quebrado',
+	]), encoding='utf-8')
+
+	result = import_file(testing_app, 'events', str(path), dry_run=True)
+
+	assert (result.read, result.inserted, result.invalid) == (3, 1, 2)
+	assert Event.query.count() == 0
+	assert 'linhas/s' in capsys.readouterr().out
+
+	trails = _write_csv(tmp_path / 'trilhas.csv', [
+		'park,name,difficulty',
+		'Parque Teste,Trilha Extrema,extrema',
+		'Parque Teste,Trilha Sem Dificuldade,',
+	])
+	result = import_file(testing_app, 'trails', trails, dry_run=True)
+
+	assert result.errors[0] == (2, "dificuldade inválida: 'extrema' (use facil/moderada/dificil)")
+	assert result.errors[1][0] == 3 and 'difficulty' in result.errors[1][1]
+	assert Trail.query.count() == 0
+
+
+def test_export_round_trips_through_import(testing_app, tmp_path):
+	from src.app.exporter import export_to_file, iter_export
+
+	path = _write_csv(tmp_path / 'trilhas.csv', [
+		'park,name,difficulty,is_open',
+		*[f'Parque Teste,Trilha {i},fácil,{"sim" if i % 2 else "não"}' for i in range(7)],
+	])
+	import_rows('trails', read_rows(path))
+
+	# Um pedaço por bloco lido do banco
+	chunks = list(iter_export('trails', 'csv', chunk_size=3))
+	assert len(chunks) == 3
+	assert chunks[0].splitlines()[0] == 'id,park_id,park,name,difficulty,duration_estimated,description,is_open'
+
+	out = tmp_path / 'trilhas.ndjson'
+	export_to_file(testing_app, 'trails', str(out), fmt='ndjson')
+	rows = [json.loads(line) for line in out.read_text(encoding='utf-8').splitlines()]
+	assert len(rows) == 7
+	assert rows[1]['park'] == 'Parque Teste' and rows[1]['is_open'] is True
+
+	result = import_rows('trails', read_rows(str(out)))
+	assert (result.inserted, result.updated, result.invalid) == (0, 7, 0)
@@ -0,0 +1,92 @@
+from datetime import date, datetime, time, timedelta
+
+from src.app import db
+from src.app.models import Park, Trail, Event, AvailabilityPeriod, BiodiversityItem
+from src.app.park_detail import load_park_detail
+
+
+def _seed_park(name='Parque Detalhe'):
+	park = Park(name=name, type='Estadual', location='Teresópolis')
+	db.session.add(park)
+	db.session.flush()
+	now = datetime.utcnow()
+	today = date.today()
+	db.session.add_all([
+		Trail(park_id=park.id, name='Trilha B', difficulty='moderada', is_open=True),
+		Trail(park_id=park.id, name='Trilha A', difficulty='facil', is_open=False, duration_estimated='2h'),
+		Event(park_id=park.id, title='Depois', start_datetime=now + timedelta(days=3),
+		      end_datetime=now + timedelta(days=3, hours=2), is_active=True),
+		Event(park_id=park.id, title='Antes', start_datetime=now + timedelta(days=1),
+		      end_datetime=now + timedelta(days=1, hours=2), is_active=True),
+		Event(park_id=park.id, title='Inativo', start_datetime=now + timedelta(days=2),
+		      end_datetime=now + timedelta(days=2, hours=2), is_active=False),
+		Event(park_id=park.id, title='Passado', start_datetime=now - timedelta(days=2),
+		      end_datetime=now - timedelta(days=2, hours=-2), is_active=True),
+		AvailabilityPeriod(park_id=park.id, season_name='Temporada', open_time='08:00', close_time='17:00',
+		                   start_date=today - timedelta(days=10), end_date=today + timedelta(days=10)),
+	])
+	db.session.add_all(BiodiversityItem(park_id=park.id, name=f'Espécie {i:02d}', type='fauna' if i % 2 else 'flora')
+	                   for i in range(12))
+	db.session.commit()
+	return park.id
+
+
+def test_loader_fetches_everything_in_one_query(testing_app, count_queries):
+	park_id = _seed_park()
+
+	# Hora local no dia do primeiro evento: ele começa antes da próxima virada do dia
+	local_now = datetime.combine(date.today() + timedelta(days=1), time(0, 30))
+	detail, statements = count_queries(load_park_detail, park_id, local_now=local_now)
+
+	assert len(statements) == 1
+	assert detail.park.name == 'Parque Detalhe'
+	assert [t.name for t in detail.trails] == ['Trilha A', 'Trilha B']
+	assert detail.trails[0].duration_estimated == '2h'
+	assert [e.title for e in detail.upcoming_events] == ['Antes', 'Depois']
+	assert isinstance(detail.upcoming_events[0].start_datetime, datetime)
+	assert len(detail.biodiversity_items) == 10
+	assert [(b.type, b.name) for b in detail.biodiversity_items] == sorted((b.type, b.name) for b in detail.biodiversity_items)
+	assert detail.biodiversity_items[0].type == 'fauna'
+	assert detail.current_availability.season_name == 'Temporada'
+	# Conteúdo muda quando o primeiro evento começa
+	assert detail.next_change == detail.upcoming_events[0].start_datetime
+	assert load_park_detail(9999) is None
+
+
+def test_detail_page_served_from_per_park_cache(testing_app, admin_client, count_queries):
+	park_a = _seed_park('Parque A')
+	park_b = _seed_park('Parque B')
+	cache = testing_app.extensions['park_detail_cache']
+	page_cache = testing_app.extensions['page_cache']
+	for park_id in (park_a, park_b):
+		resp = admin_client.get(f'/parks/{park_id}')
+		assert resp.status_code == 200
+		assert 'Trilha A' in resp.get_data(as_text=True)
+	page_cache.clear()
+
+	resp, statements = count_queries(admin_client.get, f'/parks/{park_a}')
+	assert 'Temporada' in resp.get_data(as_text=True)
+	assert not [s for s in statements if 'json_group_array' in s]
+	assert cache.stats()['hits'] == 1
+
+	trail = Trail.query.filter_by(park_id=park_a, name='Trilha B').one()
+	admin_client.post(f'/admin/trails/{trail.id}/edit', data={
+		'park_id': park_a, 'name': 'Trilha Renomeada', 'difficulty': 'moderada', 'is_open': 'y',
+	})
+	assert cache.stats()['entries'] == 1  # só o parque B continua em cache
+	assert 'Trilha Renomeada' in admin_client.get(f'/parks/{park_a}').get_data(as_text=True)
+	assert admin_client.get('/parks/9999').status_code == 404
+
+
+def test_cached_detail_expires_at_next_change(testing_app):
+	park_id = _seed_park()
+	cache = testing_app.extensions['park_detail_cache']
+	first = cache.get(park_id)
+	assert cache.get(park_id) is first
+
+	# Simula a passagem do horário do primeiro evento
+	cache._entries[park_id] = first._replace(next_change=datetime.utcnow() - timedelta(seconds=1))
+	again = cache.get(park_id)
+
+	assert again is not first
+	assert cache.stats()['expirations'] == 1
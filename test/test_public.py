@@ -0,0 +1,60 @@
+import re
+
+from src.app import db
+from src.app.models import Park, Trail
+
+
+def test_keyset_pagination_walks_forward_and_back(testing_app, testing_client, count_queries):
+	park = Park.query.first()
+	names = [f'Trilha {c}' for c in 'GFEDCBA']
+	db.session.add_all([Trail(park_id=park.id, name=n, difficulty='fácil', is_open=True) for n in names])
+	db.session.commit()
+	testing_app.config['PAGE_SIZE'] = 3
+
+	def page(url):
+		resp, statements = count_queries(testing_client.get, url)
+		assert resp.status_code == 200
+		if 'after=' in url or 'before=' in url:
+			# Continua pela chave (name, id), nunca pulando linhas com OFFSET
+			assert any('(trails.name, trails.id) >' in s or '(trails.name, trails.id) <' in s for s in statements)
+		html = resp.get_data(as_text=True)
+		items = re.findall(r'<h3>(Trilha \w)</h3>', html)
+		links = dict((kind, url) for url, kind in re.findall(r'href="([^"]+)">(← Anteriores|Próximos →)', html))
+		return items, {k: v.replace('&amp;', '&') for k, v in links.items()}
+
+	first, links = page('/trails')
+	assert first == ['Trilha A', 'Trilha B', 'Trilha C']
+	assert list(links) == ['Próximos →']
+
+	second, links = page(links['Próximos →'])
+	assert second == ['Trilha D', 'Trilha E', 'Trilha F']
+	third, links = page(links['Próximos →'])
+	assert third == ['Trilha G']
+	assert list(links) == ['← Anteriores']
+
+	back, links = page(links['← Anteriores'])
+	assert back == second
+	assert testing_client.get('/trails?after=lixo').status_code == 400
+
+
+def test_trails_page_shows_facet_counts_from_one_query(testing_client, count_queries):
+	park = Park.query.first()
+	other = Park(name='Outro Parque', type='Nacional')
+	db.session.add(other)
+	db.session.flush()
+	db.session.add_all([
+		Trail(park_id=park.id, name='T1', difficulty='facil', is_open=True),
+		Trail(park_id=park.id, name='T2', difficulty='dificil', is_open=True),
+		Trail(park_id=park.id, name='T3', difficulty='dificil', is_open=False),
+		Trail(park_id=other.id, name='T4', difficulty='dificil', is_open=True),
+	])
+	db.session.commit()
+
+	resp, statements = count_queries(testing_client.get, '/trails?difficulty=Difícil')
+	html = resp.get_data(as_text=True)
+	assert 'T2' in html and 'T4' in html and 'T1' not in html
+	assert 'value="dificil" selected>Difícil (2)' in html
+	assert 'Fácil (1)' in html
+	# Contagens por parque respeitam a dificuldade escolhida
+	assert 'Parque Teste (1)' in html and 'Outro Parque (1)' in html
+	assert sum('GROUP BY' in s for s in statements) == 1
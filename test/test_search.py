@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+from src.app import db
+from src.app.cli import reindex_db
+from src.app.models import Park, Trail, Event
+from src.app.search import search
+
+
+def _park():
+	return Park.query.filter_by(name='Parque Teste').one()
+
+
+def test_search_is_accent_insensitive_and_highlights(testing_app):
+	park = _park()
+	db.session.add(Trail(park_id=park.id, name='Pedra do Sino', difficulty='difícil',
+	                     description='Subida íngreme <b>até</b> o cume'))
+	db.session.commit()
+
+	results = search('ingreme')
+	assert [(r.entity, r.park_id) for r in results] == [('trail', park.id)]
+	assert '<mark>íngreme</mark>' in results[0].snippet
+	assert '&lt;b&gt;' in results[0].snippet
+
+	# Título pesa mais que a descrição no bm25
+	db.session.add(Trail(park_id=park.id, name='Trilha do Cume', difficulty='fácil'))
+	db.session.commit()
+	assert [r.title.striptags() for r in search('cume')] == ['Trilha do Cume', 'Pedra do Sino']
+
+
+def test_search_index_follows_writes(testing_app):
+	park = _park()
+	trail = Trail(park_id=park.id, name='Trilha Suspensa', difficulty='fácil')
+	start = datetime.utcnow() + timedelta(days=3)
+	event = Event(park_id=park.id, title='Mutirão de limpeza', start_datetime=start,
+	              end_datetime=start + timedelta(hours=2), is_active=True)
+	db.session.add_all([trail, event])
+	db.session.commit()
+	assert [r.entity for r in search('suspensa')] == ['trail']
+	assert [r.entity for r in search('mutir')] == ['event']  # prefixo
+
+	trail.name = 'Trilha Pênsil'
+	event.is_active = False
+	db.session.commit()
+	assert search('suspensa') == []
+	assert [r.id for r in search('pensil')] == [trail.id]
+	assert search('mutirao') == []
+
+	db.session.delete(trail)
+	db.session.commit()
+	assert search('pensil') == []
+
+	assert reindex_db(testing_app) == 1  # apenas o parque
+
+
+def test_search_page(testing_client):
+	resp = testing_client.get('/search?q=parque teste')
+	html = resp.get_data(as_text=True)
+	assert resp.status_code == 200
+	assert '<mark>Parque</mark> <mark>Teste</mark>' in html
+
+	# Sintaxe do FTS5 digitada pelo usuário é tratada como texto
+	assert testing_client.get('/search?q=" OR NEAR(').status_code == 200
+	assert testing_client.get('/search?q=').status_code == 200
@@ -0,0 +1,70 @@
+import subprocess
+import sys
+
+from src.app.cli import ENTITIES
+from src.app.config import BASE_DIR, config_by_name
+from src.app.exporter import EXPORT_MODELS
+from src.app.importer import IMPORT_SPECS
+from src.app.startup import measure_startup, parse_importtime
+
+
+def test_db_only_app_skips_views_and_heavy_imports():
+	code = (
+		"import sys\n"
+		"from src.app import create_app\n"
+		"app = create_app('testing', load_views=False)\n"
+		"print(sorted(app.blueprints), 'passlib' in sys.modules, 'src.app.routes_admin' in sys.modules)\n"
+	)
+	out = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, capture_output=True, text=True, check=True)
+	assert out.stdout.strip() == '[] False False'
+
+
+def test_cli_skips_forms_unless_importing():
+	code = (
+		"import sys\n"
+		"import src.app.cli\n"
+		"print(sorted(m for m in ('email_validator', 'src.app.forms', 'src.app.importer', 'src.app.startup') if m in sys.modules))\n"
+	)
+	out = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, capture_output=True, text=True, check=True)
+	assert out.stdout.strip() == '[]'
+	assert ENTITIES == tuple(sorted(IMPORT_SPECS))
+	assert EXPORT_MODELS == {entity: spec.model for entity, spec in IMPORT_SPECS.items()}
+
+
+def test_admin_forms_load_on_first_form_view():
+	code = (
+		"import sys\n"
+		"from src.app import create_app, db\n"
+		"app = create_app('testing')\n"
+		"with app.app_context():\n"
+		"    db.create_all()\n"
+		"loaded = lambda: 'src.app.forms' in sys.modules or 'email_validator' in sys.modules\n"
+		"client = app.test_client()\n"
+		"before = (loaded(), client.get('/parks').status_code, loaded())\n"
+		"print(before, client.get('/admin/login').status_code, loaded())\n"
+	)
+	out = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, capture_output=True, text=True, check=True)
+	assert out.stdout.strip() == '(False, 200, False) 200 True'
+
+
+def test_startup_report_leaves_configured_database_alone():
+	database = config_by_name['development'].DATABASE_PATH
+	before = database.stat().st_mtime_ns if database.exists() else None
+
+	report = measure_startup('development', path='/parks')
+
+	assert report['status'] == 200
+	assert report['total_ms'] > 0
+	after = database.stat().st_mtime_ns if database.exists() else None
+	assert after == before
+
+
+def test_parse_importtime_groups_by_package():
+	output = '\n'.join([
+		'import time: self [us] | cumulative | imported package',
+		'import time:      1000 |       1000 |     sqlalchemy.sql',
+		'import time:       500 |       1500 |   sqlalchemy',
+		'import time:      2000 |       2000 |   src.app.models',
+		'import time:       250 |       4000 | src.app',
+	])
+	assert parse_importtime(output) == {'sqlalchemy': 1.5, 'src.app.models': 2.0, 'src.app': 0.25}